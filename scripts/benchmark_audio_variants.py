@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Sweep audio variants (sample rate, silence trimming, clipping) and report the
+audio tokens saved and the quality impact.
+
+Offline (default): preprocesses a sample of a scenario's recordings with each
+variant and reports mean seconds, payload bytes, Gemini and OpenAI audio
+tokens, preprocessing time (cold and cached) and the share of the signal
+energy kept. Without recordings on disk, synthetic ones (stereo 44.1 kHz
+calls padded with silence) are generated.
+
+End to end (--system): runs the queries with each variant, evaluates them and
+reports per (variant, query) the audio seconds sent, audio tokens saved,
+latency, cost, quality and the quality change against the first variant.
+
+Examples:
+  python scripts/benchmark_audio_variants.py --use-case medical --sample 100
+  python scripts/benchmark_audio_variants.py --use-case medical \
+      --system palimpzest --queries 2 5 --variants original 16k 16k-10s
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from runner.audio_variants import (  # noqa: E402
+    AudioVariant,
+    AudioVariantCache,
+    decode_audio,
+    use_audio_variant,
+)
+from runner.media_tokens import audio_tokens  # noqa: E402
+
+DEFAULT_VARIANTS = ["original", "16k-notrim", "16k", "16k-10s", "8k"]
+AUDIO_SUFFIXES = {".wav", ".flac", ".mp3"}
+
+
+def sample_recordings(use_case: str, paths, sample: int, seed: int):
+    """Encoded recordings from paths, else the scenario's files, else synthetic."""
+    files = []
+    for path in [Path(p) for p in paths] or [REPO_ROOT / "files" / use_case]:
+        if path.is_file():
+            files.append(path)
+        elif path.is_dir():
+            files.extend(
+                p for p in path.rglob("*") if p.suffix.lower() in AUDIO_SUFFIXES
+            )
+    random.Random(seed).shuffle(files)
+    if files:
+        return [(str(p), p.read_bytes()) for p in files[:sample]]
+
+    print(f"No recordings found for {use_case}, generating {sample} synthetic ones")
+    rng = np.random.default_rng(seed)
+    sample_rate = 44100
+    recordings = []
+    for i in range(sample):
+        lead, call, tail = rng.uniform([0.5, 2.0, 0.5], [3.0, 15.0, 5.0])
+        t = np.arange(int(call * sample_rate)) / sample_rate
+        signal = 0.5 * np.sin(2 * np.pi * rng.uniform(200, 2000) * t)
+        signal *= 0.5 + 0.5 * np.sin(2 * np.pi * rng.uniform(1, 5) * t)
+        mono = np.concatenate(
+            [
+                rng.normal(0, 1e-4, int(lead * sample_rate)),
+                signal + rng.normal(0, 0.01, len(signal)),
+                rng.normal(0, 1e-4, int(tail * sample_rate)),
+            ]
+        )
+        stereo = np.stack([mono, mono], axis=1)
+        pcm = (np.clip(stereo, -1, 1) * 32767).astype("<i2")
+        out = io.BytesIO()
+        with wave.open(out, "wb") as audio:
+            audio.setnchannels(2)
+            audio.setsampwidth(2)
+            audio.setframerate(sample_rate)
+            audio.writeframes(pcm.tobytes())
+        recordings.append((f"synthetic_{i}.wav", out.getvalue()))
+    return recordings
+
+
+def energy(data: bytes) -> float:
+    """Signal energy of the (downmixed) recording, independent of its rate."""
+    samples, sample_rate = decode_audio(data)
+    samples = samples.mean(axis=1) if samples.ndim > 1 else samples
+    return float(np.sum(samples.astype(np.float64) ** 2)) / sample_rate
+
+
+def offline_sweep(recordings, variants):
+    rows = []
+    for spec in variants:
+        variant = AudioVariant.parse(spec)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = AudioVariantCache(variant, cache_dir) if variant else None
+            for path, data in recordings:
+                start_time = time.time()
+                encoded = (cache.get(data) if cache else None) or data
+                cold = time.time() - start_time
+                start_time = time.time()
+                if cache:
+                    cache.get(data)
+                cached = time.time() - start_time
+
+                samples, sample_rate = decode_audio(encoded)
+                seconds = len(samples) / sample_rate
+                original_energy = energy(data)
+                kept = energy(encoded) / original_energy if original_energy else 1.0
+                rows.append(
+                    {
+                        "variant": spec,
+                        "seconds": seconds,
+                        "payload_kb": len(base64.b64encode(encoded)) / 1024,
+                        "gemini_tokens": audio_tokens(seconds, "gemini"),
+                        "openai_tokens": audio_tokens(seconds, "gpt-4o"),
+                        "encode_ms": cold * 1000,
+                        "cached_ms": cached * 1000,
+                        "energy_kept": min(1.0, kept),
+                    }
+                )
+    df = pd.DataFrame(rows)
+    return df.groupby("variant", sort=False).mean().round(3).reset_index()
+
+
+def end_to_end_sweep(args, variants):
+    from evaluator.generic_evaluator import load_evaluator, quality_score
+    from run import get_runner_class
+
+    runner = get_runner_class(args.system, args.use_case)(
+        use_case=args.use_case,
+        scale_factor=args.scale_factor,
+        skip_setup=args.skip_setup,
+        model_name=args.model,
+    )
+    evaluator = load_evaluator(args.use_case, args.scale_factor)
+    queries = args.queries or runner._discover_queries()
+    cache_dir = (
+        runner.files_path / "cache" / "audio_variants" / f"sf_{args.scale_factor}"
+    )
+
+    rows = []
+    for spec in variants:
+        print(f"\n=== Audio variant: {spec} ===")
+        cache = use_audio_variant(spec, cache_dir)
+        runner.metrics = runner.execute_queries(queries)
+        runner.save_metrics()
+        evaluator.evaluate_system(runner.system_name, queries=queries)
+        with open(runner.metrics_path / f"{runner.system_name}.json") as f:
+            evaluated = json.load(f)
+        for query_id in queries:
+            data = evaluated.get(f"Q{query_id}", {})
+            success = data.get("status") == "success"
+            rows.append(
+                {
+                    "variant": spec,
+                    "query_id": query_id,
+                    "status": data.get("status"),
+                    "audio_seconds_sent": data.get("audio_seconds_sent"),
+                    "audio_tokens_saved": data.get("audio_tokens_saved", 0),
+                    "execution_time": data.get("execution_time"),
+                    "token_usage": data.get("token_usage"),
+                    "money_cost": data.get("money_cost"),
+                    "quality": quality_score(data) if success else None,
+                }
+            )
+        if cache is not None:
+            print(cache.summary())
+    use_audio_variant("original", cache_dir)
+
+    results = pd.DataFrame(rows)
+    baseline = results[results["variant"] == variants[0]].set_index("query_id")
+    results["quality_change"] = results["quality"] - results["query_id"].map(
+        baseline["quality"]
+    )
+    return results
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark audio variants (sample rate, trimming, clipping)"
+    )
+    parser.add_argument("--use-case", default="medical")
+    parser.add_argument("--variants", nargs="+", default=DEFAULT_VARIANTS)
+    parser.add_argument(
+        "--recordings", nargs="*", default=[], help="Audio files or directories"
+    )
+    parser.add_argument("--sample", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--system", help="Also run the queries with this system per variant"
+    )
+    parser.add_argument(
+        "--queries", nargs="+", type=lambda q: int(q.lstrip("Q")), default=None
+    )
+    parser.add_argument("--scale-factor", type=int)
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    parser.add_argument("--skip-setup", action="store_true")
+    parser.add_argument("--output", help="CSV file for the results")
+    args = parser.parse_args()
+
+    recordings = sample_recordings(
+        args.use_case, args.recordings, args.sample, args.seed
+    )
+    summary = offline_sweep(recordings, args.variants)
+    print(
+        f"\nAudio variants over {len(recordings)} recordings (means per recording):"
+    )
+    print(summary.to_string(index=False))
+    if args.output:
+        summary.to_csv(args.output, index=False)
+
+    if args.system:
+        results = end_to_end_sweep(args, args.variants)
+        print(results.to_string(index=False))
+        if args.output:
+            stem, ext = os.path.splitext(args.output)
+            results.to_csv(f"{stem}_{args.system}{ext}", index=False)
+        # Force terminate background threads (as run.py does)
+        os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
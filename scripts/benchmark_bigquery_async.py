@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Offline comparison of sequential vs. concurrent BigQuery job submission,
+using the in-process FakeBigQueryClient (no credentials or network needed).
+
+Example:
+  python scripts/benchmark_bigquery_async.py --num-queries 10 --running-seconds 2
+  python scripts/benchmark_bigquery_async.py --max-concurrent-jobs 4 --server-slots 2
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from runner.generic_bigquery_runner.fake_bigquery_client import (  # noqa: E402
+    FakeBigQueryClient,
+)
+from runner.generic_bigquery_runner.job_scheduler import (  # noqa: E402
+    JobOutcome,
+    download_results,
+    run_jobs_concurrently,
+)
+
+
+def run_sequential(client, queries):
+    outcomes = {}
+    for key, sql in queries.items():
+        outcome = JobOutcome()
+        start_time = time.time()
+        download_results(client.query(sql), outcome)
+        outcome.total_time = time.time() - start_time
+        outcomes[key] = outcome
+    return outcomes
+
+
+def summarize(mode, outcomes, wall_time):
+    return {
+        "mode": mode,
+        "queries": len(outcomes),
+        "failed": sum(o.error is not None for o in outcomes.values()),
+        "wall_seconds": round(wall_time, 2),
+        "mean_queued": round(
+            sum(o.queued_time or 0 for o in outcomes.values()) / len(outcomes), 2
+        ),
+        "mean_running": round(
+            sum(o.running_time or 0 for o in outcomes.values()) / len(outcomes), 2
+        ),
+        "mean_execution": round(
+            sum(
+                (o.total_time or 0) - (o.download_time or 0)
+                for o in outcomes.values()
+            )
+            / len(outcomes),
+            2,
+        ),
+        "mean_download": round(
+            sum(o.download_time or 0 for o in outcomes.values()) / len(outcomes), 3
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark BigQuery job scheduling with a fake client"
+    )
+    parser.add_argument("--num-queries", type=int, default=10)
+    parser.add_argument("--running-seconds", type=float, default=1.0)
+    parser.add_argument("--queued-seconds", type=float, default=0.2)
+    parser.add_argument("--max-concurrent-jobs", type=int, default=10)
+    parser.add_argument(
+        "--server-slots",
+        type=int,
+        default=None,
+        help="Simulated server-side concurrency (default: unlimited)",
+    )
+    parser.add_argument("--rows", type=int, default=1000)
+    args = parser.parse_args()
+
+    result = pd.DataFrame({"id": range(args.rows), "answer": "yes"})
+    queries = {q: f"SELECT {q} -- fake" for q in range(1, args.num_queries + 1)}
+
+    rows = []
+    for mode in ("sequential", "concurrent"):
+        client = FakeBigQueryClient(
+            results=result,
+            queued_seconds=args.queued_seconds,
+            running_seconds=args.running_seconds,
+            max_concurrent_jobs=args.server_slots,
+        )
+        start_time = time.time()
+        if mode == "sequential":
+            outcomes = run_sequential(client, queries)
+        else:
+            outcomes = run_jobs_concurrently(
+                client,
+                queries,
+                max_concurrent_jobs=args.max_concurrent_jobs,
+                poll_interval=0.05,
+            )
+        rows.append(summarize(mode, outcomes, time.time() - start_time))
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for CAESURA's Text Question Answering backend on the
+movie reviews table.
+
+Example:
+  python scripts/benchmark_caesura_text_qa.py --scale-factor 2000 --num-rows 500
+  python scripts/benchmark_caesura_text_qa.py --batch-sizes 2 8 auto
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import runner.generic_caesura_runner  # noqa: F401,E402  (puts caesura on sys.path)
+from caesura.tools.backend.text_qa import TextQA  # noqa: E402
+
+DEFAULT_QUESTION = "Is the sentiment of the review positive or negative?"
+
+
+def load_reviews(scale_factor: int, num_rows: int) -> pd.Series:
+    data_dir = SRC_DIR.parent / "files" / "movie" / "data" / f"sf_{scale_factor}"
+    reviews_file = data_dir / "Reviews.csv"
+    if not reviews_file.exists():
+        raise FileNotFoundError(
+            f"{reviews_file} not found. Run the movie scenario setup first."
+        )
+    reviews = pd.read_csv(reviews_file).dropna(subset=["reviewText"])
+    if num_rows:
+        reviews = reviews.head(num_rows)
+    return reviews["reviewText"]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark CAESURA TextQA throughput on movie reviews"
+    )
+    parser.add_argument("--scale-factor", type=int, default=2000)
+    parser.add_argument(
+        "--num-rows",
+        type=int,
+        default=500,
+        help="Number of reviews to process (0 for all)",
+    )
+    parser.add_argument("--question", type=str, default=DEFAULT_QUESTION)
+    parser.add_argument(
+        "--batch-sizes",
+        nargs="+",
+        default=["auto"],
+        help="Batch sizes to compare; 'auto' derives it from free memory",
+    )
+    args = parser.parse_args()
+
+    texts = load_reviews(args.scale_factor, args.num_rows)
+    questions = pd.Series([args.question] * len(texts))
+    print(f"Benchmarking TextQA on {len(texts)} reviews (sf={args.scale_factor})")
+
+    rows = []
+    for batch_size in args.batch_sizes:
+        extractor = TextQA(
+            batch_size=None if batch_size == "auto" else int(batch_size)
+        )
+        start_time = time.time()
+        extractor.extract(texts.values, questions)
+        elapsed = time.time() - start_time
+        extractor.close()
+        rows.append(
+            {
+                "batch_size": batch_size,
+                "rows": len(texts),
+                "unique_pairs": extractor.last_stats["num_unique_pairs"],
+                "batches": extractor.last_stats["num_batches"],
+                "seconds": round(elapsed, 2),
+                "rows_per_second": round(len(texts) / elapsed, 2),
+            }
+        )
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Build and lookup benchmark for CAESURA's RelevantValueIndex on synthetic
+string columns.
+
+Example:
+  python scripts/benchmark_caesura_value_index.py --num-values 100000
+  python scripts/benchmark_caesura_value_index.py --num-values 200000 --num-queries 500
+"""
+
+import argparse
+import random
+import string
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+import runner.generic_caesura_runner  # noqa: F401,E402  (puts caesura on sys.path)
+from caesura.database.index import RelevantValueIndex  # noqa: E402
+
+
+def make_values(num_values: int, seed: int) -> list:
+    rng = random.Random(seed)
+    words = [
+        "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10)))
+        for _ in range(max(num_values // 20, 100))
+    ]
+    values = set()
+    while len(values) < num_values:
+        values.add(" ".join(rng.choices(words, k=rng.randint(1, 4))))
+    return list(values)
+
+
+def make_queries(values: list, num_queries: int, seed: int) -> list:
+    """Queries are misspelled prefixes of existing values, like keywords in a user query."""
+    rng = random.Random(seed + 1)
+    queries = []
+    for value in rng.sample(values, num_queries):
+        query = list(value[: rng.randint(4, max(4, len(value)))])
+        query[rng.randrange(len(query))] = rng.choice(string.ascii_lowercase)
+        queries.append("".join(query))
+    return queries
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark CAESURA RelevantValueIndex build and lookup times"
+    )
+    parser.add_argument("--num-values", type=int, default=100000)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--num", type=int, default=10, help="Values per lookup")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    values = make_values(args.num_values, args.seed)
+    queries = make_queries(values, args.num_queries, args.seed)
+    print(f"Benchmarking RelevantValueIndex on {len(values)} distinct values")
+
+    index = RelevantValueIndex()
+    start_time = time.time()
+    index.build(values)
+    build_seconds = time.time() - start_time
+
+    start_time = time.time()
+    for query in queries:
+        index.get_relevant_values(query, num=args.num)
+    lookup_seconds = time.time() - start_time
+
+    stats = {
+        "values": len(index.values),
+        "n_grams": len(index.keys),
+        "postings": len(index.postings),
+        "index_mb": round(
+            (index.keys.nbytes + index.offsets.nbytes + index.postings.nbytes) / 2**20, 2
+        ),
+        "build_seconds": round(build_seconds, 2),
+        "lookup_ms": round(lookup_seconds / len(queries) * 1000, 3),
+    }
+    print(pd.DataFrame([stats]).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
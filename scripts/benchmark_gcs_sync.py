@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Offline check of incremental GCS sync against a filesystem-backed bucket.
+
+Runs a full sync, a no-op re-sync, and a re-sync after modifying and removing
+some files, and reports how many files each pass uploaded and deleted.
+
+Example:
+  python scripts/benchmark_gcs_sync.py --num-files 2000 --file-kb 64 --changed 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from runner.generic_bigquery_runner.gcs_sync import (  # noqa: E402
+    LocalBucket,
+    sync_listed_files,
+)
+
+
+def run_pass(name, bucket, df):
+    start_time = time.time()
+    _, result = sync_listed_files(bucket, df, "path", "images")
+    return {
+        "pass": name,
+        "seconds": round(time.time() - start_time, 3),
+        "uploaded": len(result.uploaded),
+        "unchanged": result.unchanged,
+        "deleted": len(result.deleted),
+        "fingerprint": result.fingerprint[:12],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark incremental GCS sync with a local bucket"
+    )
+    parser.add_argument("--num-files", type=int, default=1000)
+    parser.add_argument("--file-kb", type=int, default=64)
+    parser.add_argument("--changed", type=int, default=20)
+    parser.add_argument("--removed", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(tmp_dir) / "data"
+        data_dir.mkdir()
+        paths = []
+        for i in range(args.num_files):
+            path = data_dir / f"img_{i}.jpg"
+            path.write_bytes(os.urandom(args.file_kb * 1024))
+            paths.append(str(path))
+        df = pd.DataFrame({"id": range(args.num_files), "path": paths})
+        bucket = LocalBucket(Path(tmp_dir) / "bucket", "local-bucket")
+
+        rows = [run_pass("initial", bucket, df), run_pass("unchanged", bucket, df)]
+
+        for path in paths[: args.changed]:
+            Path(path).write_bytes(os.urandom(args.file_kb * 1024))
+        rows.append(run_pass("modified+removed", bucket, df.iloc[: -args.removed or None]))
+
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Sweep perceptual-hash deduplication thresholds and report the LLM calls saved
+and the quality impact.
+
+Offline (default): builds (or loads) the hash index of a scenario's images and
+reports per threshold the number of groups, the share of image calls saved
+by evaluating one representative per group and, with a label column (e.g.,
+Species for animals), the share of images whose label differs from their
+representative's (the answers a label-level filter would get wrong). Without
+images on disk, synthetic bursts of near-duplicates are generated.
+
+End to end (--system): runs the queries with each threshold, evaluates them
+and reports per (threshold, query) the image requests, calls saved, latency,
+cost, quality and the quality change against the first threshold.
+
+Examples:
+  python scripts/benchmark_image_dedup.py --use-case animals --scale-factor 200 \
+      --label-column Species
+  python scripts/benchmark_image_dedup.py --use-case animals --scale-factor 200 \
+      --system lotus --queries 1 3 --thresholds off 0 6 10
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from PIL import Image, ImageEnhance
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from runner.image_dedup import ImageHashIndex, use_image_dedup  # noqa: E402
+
+DEFAULT_THRESHOLDS = ["off", "0", "4", "6", "10", "14"]
+
+
+def synthetic_dataset(data_path: Path, bursts: int, seed: int):
+    """Bursts of 1-5 near-duplicate shots (brightness, crop, JPEG quality)."""
+    print(f"No images found, generating {bursts} synthetic bursts in {data_path}")
+    rng = np.random.default_rng(seed)
+    (data_path / "images").mkdir(parents=True)
+    rows = []
+    for burst in range(bursts):
+        scene = (rng.random((30, 40, 3)) * 255).astype(np.uint8)
+        scene = Image.fromarray(scene).resize((800, 600), Image.BICUBIC)
+        for shot in range(rng.integers(1, 6)):
+            left, top = rng.integers(0, 40, size=2)
+            image = scene.crop((left, top, left + 760, top + 560))
+            image = ImageEnhance.Brightness(image).enhance(rng.uniform(0.9, 1.1))
+            path = data_path / "images" / f"{burst}_{shot}.jpg"
+            image.save(path, quality=int(rng.integers(70, 95)))
+            rows.append({"ImagePath": str(path), "Label": f"burst_{burst}"})
+    pd.DataFrame(rows).to_csv(data_path / "image_data.csv", index=False)
+    return "Label"
+
+
+def image_labels(data_path: Path, label_column: str) -> dict:
+    """Label of every image path referenced next to the label column."""
+    labels = {}
+    for csv_file in data_path.glob("*.csv"):
+        df = pd.read_csv(csv_file, dtype=str)
+        if label_column not in df.columns:
+            continue
+        for column in df.columns:
+            if column != label_column:
+                labels.update(zip(df[column], df[label_column]))
+    return labels
+
+
+def offline_sweep(index: ImageHashIndex, thresholds, labels: dict):
+    rows = []
+    for spec in thresholds:
+        if spec == "off":
+            representatives = list(range(len(index.hashes)))  # one per image
+        else:
+            representatives = index.groups(int(spec))
+        row = {
+            "threshold": spec,
+            "images": len(index.hashes),
+            "groups": len(set(representatives)),
+        }
+        row["calls_saved"] = (
+            1 - row["groups"] / row["images"] if row["images"] else 0.0
+        )
+        if labels:
+            # Label of each group's representative (its first member)
+            rep_label = {}
+            for path, rep in zip(index.paths, representatives):
+                rep_label.setdefault(rep, labels.get(path))
+            mismatches = [
+                labels.get(path) != rep_label[rep]
+                for path, rep in zip(index.paths, representatives)
+            ]
+            row["label_mismatch"] = float(np.mean(mismatches))
+        rows.append(row)
+    return pd.DataFrame(rows).round(3)
+
+
+def end_to_end_sweep(args, thresholds):
+    from evaluator.generic_evaluator import load_evaluator, quality_score
+    from run import get_runner_class
+
+    runner = get_runner_class(args.system, args.use_case)(
+        use_case=args.use_case,
+        scale_factor=args.scale_factor,
+        skip_setup=args.skip_setup,
+        model_name=args.model,
+    )
+    evaluator = load_evaluator(args.use_case, args.scale_factor)
+    queries = args.queries or runner._discover_queries()
+
+    rows = []
+    for spec in thresholds:
+        print(f"\n=== Image dedup threshold: {spec} ===")
+        dedup = use_image_dedup(spec, runner.data_path)
+        runner.metrics = runner.execute_queries(queries)
+        runner.save_metrics()
+        evaluator.evaluate_system(runner.system_name, queries=queries)
+        with open(runner.metrics_path / f"{runner.system_name}.json") as f:
+            evaluated = json.load(f)
+        for query_id in queries:
+            data = evaluated.get(f"Q{query_id}", {})
+            success = data.get("status") == "success"
+            rows.append(
+                {
+                    "threshold": spec,
+                    "query_id": query_id,
+                    "status": data.get("status"),
+                    "image_requests": data.get("image_requests"),
+                    "llm_calls_saved": data.get("llm_calls_saved", 0),
+                    "execution_time": data.get("execution_time"),
+                    "token_usage": data.get("token_usage"),
+                    "money_cost": data.get("money_cost"),
+                    "quality": quality_score(data) if success else None,
+                }
+            )
+        if dedup is not None:
+            print(dedup.summary())
+    use_image_dedup("off")
+
+    results = pd.DataFrame(rows)
+    baseline = results[results["threshold"] == thresholds[0]].set_index("query_id")
+    results["quality_change"] = results["quality"] - results["query_id"].map(
+        baseline["quality"]
+    )
+    return results
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark perceptual-hash deduplication of images"
+    )
+    parser.add_argument("--use-case", default="animals")
+    parser.add_argument("--scale-factor", type=int)
+    parser.add_argument("--thresholds", nargs="+", default=DEFAULT_THRESHOLDS)
+    parser.add_argument(
+        "--data-path", help="Data directory (default: the scenario's sf_<N>)"
+    )
+    parser.add_argument(
+        "--label-column",
+        help="Ground-truth label of the images (e.g., Species) to report how "
+        "often a group mixes labels",
+    )
+    parser.add_argument("--bursts", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--system", help="Also run the queries with this system per threshold"
+    )
+    parser.add_argument(
+        "--queries", nargs="+", type=lambda q: int(q.lstrip("Q")), default=None
+    )
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    parser.add_argument("--skip-setup", action="store_true")
+    parser.add_argument("--output", help="CSV file for the results")
+    args = parser.parse_args()
+
+    data_path = Path(
+        args.data_path
+        or REPO_ROOT / "files" / args.use_case / "data" / f"sf_{args.scale_factor}"
+    )
+    label_column = args.label_column
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index = ImageHashIndex.load(data_path)
+        if not index.hashes:
+            data_path = Path(tmp_dir)
+            label_column = synthetic_dataset(data_path, args.bursts, args.seed)
+            index = ImageHashIndex.load(data_path)
+        labels = image_labels(data_path, label_column) if label_column else {}
+        summary = offline_sweep(index, args.thresholds, labels)
+    print(f"\nImage dedup over {len(index.hashes)} images:")
+    print(summary.to_string(index=False))
+    if args.output:
+        summary.to_csv(args.output, index=False)
+
+    if args.system:
+        results = end_to_end_sweep(args, args.thresholds)
+        print(results.to_string(index=False))
+        if args.output:
+            stem, ext = os.path.splitext(args.output)
+            results.to_csv(f"{stem}_{args.system}{ext}", index=False)
+        # Force terminate background threads (as run.py does)
+        os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
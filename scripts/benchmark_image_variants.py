@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Sweep image variants (resolution cap and encoding) and report image tokens,
+payload bytes, latency and quality.
+
+Offline (default): re-encodes a sample of a scenario's images with each
+variant and reports the mean base64 payload, Gemini and OpenAI image tokens,
+re-encoding time (cold and cached) and fidelity (PSNR against the original).
+Without images on disk, synthetic photos are generated.
+
+End to end (--system): runs the queries with each variant, evaluates them and
+reports latency, tokens, cost and answer quality per (variant, query).
+
+Examples:
+  python scripts/benchmark_image_variants.py --use-case ecomm --sample 200
+  python scripts/benchmark_image_variants.py --use-case ecomm --system lotus \
+      --queries 2 10 --variants original 1024 768 512
+"""
+
+import argparse
+import base64
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+from PIL import Image
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SRC_DIR = REPO_ROOT / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from runner.media_tokens import image_tokens  # noqa: E402
+from runner.image_variants import (  # noqa: E402
+    ImageVariant,
+    ImageVariantCache,
+    use_image_variant,
+)
+
+DEFAULT_VARIANTS = ["original", "1024", "768", "512", "768-webp", "512-webp"]
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def sample_images(use_case: str, paths, sample: int, seed: int):
+    """Encoded images from paths, else the scenario's files, else synthetic."""
+    files = []
+    for path in [Path(p) for p in paths] or [REPO_ROOT / "files" / use_case]:
+        if path.is_file():
+            files.append(path)
+        elif path.is_dir():
+            files.extend(
+                p for p in path.rglob("*") if p.suffix.lower() in IMAGE_SUFFIXES
+            )
+    random.Random(seed).shuffle(files)
+    if files:
+        return [(str(p), p.read_bytes()) for p in files[:sample]]
+
+    print(f"No images found for {use_case}, generating {sample} synthetic ones")
+    rng = np.random.default_rng(seed)
+    images = []
+    for i in range(sample):
+        width, height = rng.integers(800, 3000, size=2)
+        y, x = np.mgrid[0:height, 0:width]
+        base = np.stack(
+            [x * 255 // width, y * 255 // height, (x + y) * 255 // (width + height)],
+            axis=-1,
+        )
+        noise = rng.normal(0, 12, size=base.shape)
+        pixels = np.clip(base + noise, 0, 255).astype(np.uint8)
+        out = io.BytesIO()
+        Image.fromarray(pixels).save(out, format="JPEG", quality=95)
+        images.append((f"synthetic_{i}.jpg", out.getvalue()))
+    return images
+
+
+def psnr(original: bytes, variant: bytes) -> float:
+    """PSNR (dB) of the variant, upscaled back, against the original."""
+    with Image.open(io.BytesIO(original)) as a, Image.open(io.BytesIO(variant)) as b:
+        a = a.convert("RGB")
+        b = b.convert("RGB").resize(a.size, Image.BICUBIC)
+        mse = np.mean((np.asarray(a, float) - np.asarray(b, float)) ** 2)
+    return float("inf") if mse == 0 else float(10 * np.log10(255**2 / mse))
+
+
+def offline_sweep(images, variants):
+    rows = []
+    for spec in variants:
+        variant = ImageVariant.parse(spec)
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ImageVariantCache(variant, cache_dir) if variant else None
+            for path, data in images:
+                start_time = time.time()
+                encoded, _ = cache.get(data) if cache else (data, None)
+                cold = time.time() - start_time
+                start_time = time.time()
+                if cache:
+                    cache.get(data)
+                cached = time.time() - start_time
+                with Image.open(io.BytesIO(encoded)) as image:
+                    width, height = image.size
+                rows.append(
+                    {
+                        "variant": spec,
+                        "payload_kb": len(base64.b64encode(encoded)) / 1024,
+                        "gemini_tokens": image_tokens(width, height, "gemini"),
+                        "openai_tokens": image_tokens(width, height, "gpt-4o"),
+                        "encode_ms": cold * 1000,
+                        "cached_ms": cached * 1000,
+                        "psnr_db": psnr(data, encoded) if cache else float("inf"),
+                    }
+                )
+    df = pd.DataFrame(rows)
+    return df.groupby("variant", sort=False).mean().round(2).reset_index()
+
+
+def end_to_end_sweep(args, variants):
+    from evaluator.generic_evaluator import load_evaluator, quality_score
+    from run import get_runner_class
+
+    runner = get_runner_class(args.system, args.use_case)(
+        use_case=args.use_case,
+        scale_factor=args.scale_factor,
+        skip_setup=args.skip_setup,
+        model_name=args.model,
+    )
+    evaluator = load_evaluator(args.use_case, args.scale_factor)
+    queries = args.queries or runner._discover_queries()
+
+    rows = []
+    for spec in variants:
+        print(f"\n=== Image variant: {spec} ===")
+        cache = use_image_variant(spec)
+        runner.metrics = runner.execute_queries(queries)
+        runner.save_metrics()
+        evaluator.evaluate_system(runner.system_name, queries=queries)
+        with open(runner.metrics_path / f"{runner.system_name}.json") as f:
+            evaluated = json.load(f)
+        for query_id in queries:
+            data = evaluated.get(f"Q{query_id}", {})
+            success = data.get("status") == "success"
+            rows.append(
+                {
+                    "variant": spec,
+                    "query_id": query_id,
+                    "status": data.get("status"),
+                    "execution_time": data.get("execution_time"),
+                    "token_usage": data.get("token_usage"),
+                    "money_cost": data.get("money_cost"),
+                    "quality": quality_score(data) if success else None,
+                }
+            )
+        if cache is not None:
+            print(cache.summary())
+    use_image_variant("original")
+    return pd.DataFrame(rows)
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Benchmark image variants (resolution cap and encoding)"
+    )
+    parser.add_argument("--use-case", default="ecomm")
+    parser.add_argument("--variants", nargs="+", default=DEFAULT_VARIANTS)
+    parser.add_argument(
+        "--images", nargs="*", default=[], help="Image files or directories"
+    )
+    parser.add_argument("--sample", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--system", help="Also run the queries with this system per variant"
+    )
+    parser.add_argument(
+        "--queries", nargs="+", type=lambda q: int(q.lstrip("Q")), default=None
+    )
+    parser.add_argument("--scale-factor", type=int)
+    parser.add_argument("--model", default="gemini-2.5-flash")
+    parser.add_argument("--skip-setup", action="store_true")
+    parser.add_argument("--output", help="CSV file for the results")
+    args = parser.parse_args()
+
+    images = sample_images(args.use_case, args.images, args.sample, args.seed)
+    summary = offline_sweep(images, args.variants)
+    print(f"\nImage variants over {len(images)} images (means per image):")
+    print(summary.to_string(index=False))
+    if args.output:
+        summary.to_csv(args.output, index=False)
+
+    if args.system:
+        results = end_to_end_sweep(args, args.variants)
+        print(results.to_string(index=False))
+        if args.output:
+            stem, ext = os.path.splitext(args.output)
+            results.to_csv(f"{stem}_{args.system}{ext}", index=False)
+        # Force terminate background threads (as run.py does)
+        os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
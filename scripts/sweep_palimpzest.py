@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Run every Palimpzest optimizer configuration for a scenario and write the
+per-query cost/latency/quality Pareto frontier.
+
+Replaces looping over PALIMPZEST_CONFIG_FILE values with evaluate_palimpzest.sh:
+data is loaded once and, with --llm-cache, LLM responses are shared between
+configurations.
+
+Example:
+  python scripts/sweep_palimpzest.py --use-case movie --scale-factor 2000 \
+      --queries 1 2 3 --sample-budget 50
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+sys.path.insert(0, str(SRC_DIR))
+
+from runner.generic_palimpzest_runner.config_sweep import (  # noqa: E402
+    list_configs,
+    run_config_sweep,
+)
+
+
+def main():
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Sweep Palimpzest configurations and compute Pareto frontiers"
+    )
+    parser.add_argument("--use-case", default="movie")
+    parser.add_argument("--scale-factor", type=int)
+    parser.add_argument(
+        "--configs",
+        nargs="+",
+        default=None,
+        help=f"Configuration files (default: all of {', '.join(list_configs())})",
+    )
+    parser.add_argument(
+        "--queries",
+        nargs="+",
+        type=lambda q: int(q.lstrip("Q")),
+        default=None,
+        help="Query IDs (default: all implemented queries)",
+    )
+    parser.add_argument(
+        "--sample-budget",
+        type=int,
+        default=None,
+        help="Optimizer sample budget (LLM calls spent sampling operators)",
+    )
+    parser.add_argument(
+        "--llm-cache",
+        action="store_true",
+        help="Share cached LLM responses between configurations; latencies then depend on the run order and are not used for the Pareto frontiers",  # noqa: E501
+    )
+    parser.add_argument("--skip-setup", action="store_true")
+    args = parser.parse_args()
+
+    run_config_sweep(
+        use_case=args.use_case,
+        scale_factor=args.scale_factor,
+        configs=args.configs,
+        queries=args.queries,
+        sample_budget=args.sample_budget,
+        llm_cache=args.llm_cache,
+        skip_setup=args.skip_setup,
+    )
+
+    # Force terminate background threads (as run.py does)
+    os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
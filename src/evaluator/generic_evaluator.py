@@ -15,6 +15,8 @@ from __future__ import annotations
 
 import abc
 import dataclasses
+import importlib
+import io
 import json
 from dataclasses import dataclass
 from pathlib import Path
@@ -171,6 +173,26 @@ class GenericEvaluator(abc.ABC):
 
         print(f"[{self.__class__.__name__}] Metrics saved → {out_f}")
 
+    def evaluate_results(
+        self, query_id: int, system_results: pd.DataFrame
+    ) -> "QueryMetricRetrieval | QueryMetricAggregation | SingleAccuracyScore":
+        """
+        Evaluate in-memory results of *query_id* (e.g. from a budget sweep).
+
+        The results are round-tripped through CSV first so they are compared
+        with the same column types as results loaded by `evaluate_system`.
+        """
+        buffer = io.StringIO()
+        system_results.to_csv(buffer, index=False)
+        buffer.seek(0)
+        try:
+            sys_df = pd.read_csv(buffer)
+        except pd.errors.EmptyDataError:
+            sys_df = pd.DataFrame()
+        return self._evaluate_single_query(
+            query_id, sys_df, self._get_ground_truth(query_id)
+        )
+
     def _load_system_results(
         self, system_name: str, query_id: int
     ) -> pd.DataFrame:
@@ -709,3 +731,35 @@ class GenericEvaluator(abc.ABC):
             raise ValueError(
                 f"Unsupported accuracy metric type: {accuracy_metric_type}"
             )
+
+
+def quality_score(metric: Any) -> float:
+    """
+    Map any evaluation dataclass (or its dict) to one quality in [0, 1].
+
+    Same rules as the aggregate tables: F1, else accuracy, else
+    1 / (1 + relative error), else the (non-negative) rank correlation.
+    """
+    data = dataclasses.asdict(metric) if dataclasses.is_dataclass(metric) else metric
+    if data.get("f1_score") is not None:
+        return float(data["f1_score"])
+    if data.get("accuracy") is not None:
+        return float(data["accuracy"])
+    if data.get("relative_error") is not None:
+        return 1.0 / (1.0 + float(data["relative_error"]))
+    if data.get("spearman_correlation") is not None:
+        return max(0.0, float(data["spearman_correlation"]))
+    return 0.0
+
+
+def load_evaluator(use_case: str, scale_factor: int) -> GenericEvaluator:
+    """Instantiate the evaluator defined in `scenario.<use_case>.evaluation.evaluate`."""
+    module = importlib.import_module(f"scenario.{use_case}.evaluation.evaluate")
+    for value in vars(module).values():
+        if (
+            isinstance(value, type)
+            and issubclass(value, GenericEvaluator)
+            and value.__module__ == module.__name__
+        ):
+            return value(use_case, scale_factor)
+    raise ValueError(f"No evaluator found for use case {use_case}")
@@ -12,6 +12,7 @@ import os
 import sys
 from typing import List
 
+import pandas as pd
 from dotenv import load_dotenv
 
 # Add src directory to Python path
@@ -212,6 +213,66 @@ def run_benchmark(
     return results
 
 
+def estimate_benchmark(
+    systems: List[str],
+    use_cases: List[str],
+    queries: List[int] = None,
+    skip_setup: bool = False,
+    model_name: str = "gemini-2.5-flash",
+    scale_factor: str = None,
+):
+    """
+    Estimate LLM calls, tokens, cost and latency without calling any model.
+
+    Args:
+        systems: List of system names to estimate
+        use_cases: List of use cases to estimate
+        queries: Optional list of specific query IDs (e.g., [1, 5])
+        skip_setup: Whether to skip setup phase
+        model_name: Model name to use for systems that support it
+        scale_factor: Scale factor to estimate
+    """
+    from runner.dry_run import DRY_RUN_SYSTEMS, DryRun, print_estimates
+
+    estimates = []
+    for use_case in use_cases:
+        for system in systems:
+            print(f"\n--- Dry run of {system} on {use_case} ---")
+            if system not in DRY_RUN_SYSTEMS:
+                print(f"Skipping {system}: dry runs are not supported")
+                continue
+
+            runner_class = get_runner_class(system, use_case)
+            if not runner_class:
+                print(f"Skipping {system} due to import error")
+                continue
+
+            try:
+                with DryRun() as dry_run:
+                    runner = runner_class(
+                        use_case=use_case,
+                        scale_factor=scale_factor,
+                        skip_setup=skip_setup,
+                        model_name=model_name,
+                    )
+                    estimates.append(
+                        dry_run.estimate(
+                            runner, queries or runner._discover_queries()
+                        )
+                    )
+            except Exception as e:
+                print(f"✗ Error estimating {system}: {e}")
+                import traceback
+
+                traceback.print_exc()
+
+    if estimates:
+        print("\n" + "=" * 60)
+        print("ESTIMATE SUMMARY")
+        print("=" * 60)
+        print_estimates(pd.concat(estimates, ignore_index=True))
+
+
 def main():
     load_dotenv()
 
@@ -228,6 +289,9 @@ Examples:
 
   # Run queries using Q-prefix notation
   python run.py --systems lotus --queries Q1 Q5 Q10
+
+  # Estimate calls, tokens, cost and latency without calling any model
+  python run.py --systems lotus palimpzest --scale-factor 5000 --dry-run
         """,
     )
 
@@ -271,6 +335,33 @@ Examples:
         help="Factor to control the dataset size. Note that each use case has its own range for its respective scale factor.",  # noqa: E501
     )
 
+    parser.add_argument(
+        "--image-variant",
+        type=str,
+        default=None,
+        help="Downscale and re-encode the images sent to the models, e.g. 768, 512-webp or 1024-jpeg-90 (default: original images). See runner/image_variants.py.",  # noqa: E501
+    )
+
+    parser.add_argument(
+        "--audio-variant",
+        type=str,
+        default=None,
+        help="Preprocess the recordings sent to the models (mono, resampled, silence trimmed), e.g. 16k or 16k-30s to also clip to 30 seconds (default: original recordings). See runner/audio_variants.py.",  # noqa: E501
+    )
+
+    parser.add_argument(
+        "--image-dedup",
+        type=str,
+        default=None,
+        help="Send only one request per group of near-duplicate images and fan its response out to the others; the value is the maximum Hamming distance between the 64-bit perceptual hashes of a group, e.g. 0 or 6 (default: off). See runner/image_dedup.py.",  # noqa: E501
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Render the queries' prompts over the data without calling any model and print the estimated LLM calls, tokens, cost and latency per query.",  # noqa: E501
+    )
+
     parser.add_argument(
         "--verbose", action="store_true", help="Enable verbose output"
     )
@@ -292,6 +383,28 @@ Examples:
     print(f"Queries: {', '.join(map(str, query_ids)) if query_ids else 'All'}")
     print(f"Scale factor: {args.scale_factor}")
 
+    # Read by the runners when they are created
+    if args.image_variant:
+        os.environ["SEMBENCH_IMAGE_VARIANT"] = args.image_variant
+        print(f"Image variant: {args.image_variant}")
+    if args.audio_variant:
+        os.environ["SEMBENCH_AUDIO_VARIANT"] = args.audio_variant
+        print(f"Audio variant: {args.audio_variant}")
+    if args.image_dedup:
+        os.environ["SEMBENCH_IMAGE_DEDUP"] = args.image_dedup
+        print(f"Image dedup threshold: {args.image_dedup}")
+
+    if args.dry_run:
+        estimate_benchmark(
+            systems=args.systems,
+            use_cases=args.use_cases,
+            queries=query_ids,
+            skip_setup=args.skip_setup,
+            model_name=args.model,
+            scale_factor=args.scale_factor,
+        )
+        os._exit(0)
+
     # Run benchmark
     results = run_benchmark(
         systems=args.systems,
@@ -0,0 +1,390 @@
+"""
+Preprocessed audio variants for LLM requests.
+
+Audio is the most expensive input modality in every pricing table, and
+Palimpzest (``AudioFilepath``) and ThalamusDB embed the scenarios' recordings
+as-is (base64 ``input_audio`` or ``data:audio`` parts sent through litellm).
+With an audio variant selected (``run.py --audio-variant`` or the
+SEMBENCH_AUDIO_VARIANT environment variable), every embedded recording is
+replaced by a preprocessed WAV:
+- downmixed to mono and resampled (16 kHz by default);
+- leading and trailing silence trimmed (frames more than 40 dB below the
+  recording's peak);
+- optionally clipped to a maximum duration.
+
+    original        send recordings unchanged (default)
+    16k             mono 16 kHz, silence trimmed
+    16k-30s         ... and clipped to 30 seconds
+    8k-notrim       mono 8 kHz, silence kept
+
+Since audio tokens are billed per second, trimming and clipping reduce
+tokens; downmixing and resampling reduce payload bytes. Variants are cached
+per scenario and scale factor (``files/<scenario>/cache/audio_variants/
+sf_<N>/<variant>``) by the hash of the original recording; recordings with
+no audio left after preprocessing are sent unchanged. Only PCM WAV is
+decoded; other formats are decoded with soundfile if it is installed, else
+sent unchanged. BigQuery reads recordings from GCS and gets the originals.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from runner.litellm_patch import (
+    install_message_hook,
+    map_message_parts,
+    part_url,
+    with_part_url,
+)
+
+VARIANT_ENV = "SEMBENCH_AUDIO_VARIANT"
+DEFAULT_SAMPLE_RATE = 16000
+SILENCE_DB = -40.0  # relative to the recording's peak frame
+FRAME_SECONDS = 0.02
+PAD_SECONDS = 0.1  # kept around the non-silent part
+
+
+@dataclass(frozen=True)
+class AudioVariant:
+    """Preprocessing applied to the recordings sent to a model."""
+
+    sample_rate: int = DEFAULT_SAMPLE_RATE
+    trim_silence: bool = True
+    max_seconds: Optional[float] = None
+
+    @classmethod
+    def parse(cls, spec: Optional[str]) -> Optional["AudioVariant"]:
+        """
+        Parse "<rate>k[-<max>s][-notrim]", e.g. "16k-30s".
+
+        Returns:
+            The variant, or None for "original" (or an empty spec)
+        """
+        if not spec or spec == "original":
+            return None
+        variant = {}
+        for part in spec.lower().split("-"):
+            if part.endswith("k"):
+                variant["sample_rate"] = int(float(part[:-1]) * 1000)
+            elif part.endswith("s"):
+                variant["max_seconds"] = float(part[:-1])
+                if variant["max_seconds"] <= 0:
+                    raise ValueError(f"Clipping to {part} in '{spec}' leaves no audio")
+            elif part == "notrim":
+                variant["trim_silence"] = False
+            else:
+                raise ValueError(
+                    f"Unknown audio variant option '{part}' in '{spec}'"
+                )
+        return cls(**variant)
+
+    @property
+    def name(self) -> str:
+        parts = [f"{self.sample_rate / 1000:g}k"]
+        if self.max_seconds is not None:
+            parts.append(f"{self.max_seconds:g}s")
+        if not self.trim_silence:
+            parts.append("notrim")
+        return "-".join(parts)
+
+    def process(self, samples: np.ndarray, sample_rate: int) -> np.ndarray:
+        """
+        Preprocess one recording.
+
+        Args:
+            samples: Float samples in [-1, 1], shape (frames,) or
+                (frames, channels)
+            sample_rate: Sample rate of samples
+
+        Returns:
+            Mono float samples at self.sample_rate (empty only for an empty
+            recording)
+        """
+        if samples.ndim > 1:
+            samples = samples.mean(axis=1)
+        if sample_rate != self.sample_rate and len(samples) > 0:
+            samples = _resample(samples, sample_rate, self.sample_rate)
+        if self.trim_silence:
+            samples = _trim_silence(samples, self.sample_rate)
+        if self.max_seconds is not None:
+            samples = samples[: int(self.max_seconds * self.sample_rate)]
+        return samples
+
+    def encode(self, data: bytes) -> Tuple[bytes, float, float]:
+        """
+        Decode, preprocess and re-encode one recording as 16-bit PCM WAV.
+
+        Returns:
+            (WAV bytes, original seconds, variant seconds); None as WAV bytes
+            if no audio is left, in which case the original should be sent
+        """
+        samples, sample_rate = decode_audio(data)
+        processed = self.process(samples, sample_rate)
+        if len(processed) == 0:
+            return None, len(samples) / sample_rate, 0.0
+        return (
+            encode_wav(processed, self.sample_rate),
+            len(samples) / sample_rate,
+            len(processed) / self.sample_rate,
+        )
+
+
+def decode_audio(data: bytes) -> Tuple[np.ndarray, int]:
+    """Float samples in [-1, 1] and the sample rate of an encoded recording."""
+    try:
+        with wave.open(io.BytesIO(data)) as audio:
+            width = audio.getsampwidth()
+            channels = audio.getnchannels()
+            sample_rate = audio.getframerate()
+            frames = audio.readframes(audio.getnframes())
+    except (wave.Error, EOFError):
+        import soundfile  # optional: compressed or float formats
+
+        samples, sample_rate = soundfile.read(io.BytesIO(data), dtype="float32")
+        return samples, sample_rate
+
+    if width == 1:  # unsigned 8-bit
+        samples = (np.frombuffer(frames, np.uint8).astype(np.float32) - 128) / 128
+    elif width == 3:  # packed 24-bit
+        raw = np.frombuffer(frames, np.uint8).reshape(-1, 3)
+        ints = (
+            raw[:, 0].astype(np.int32)
+            | raw[:, 1].astype(np.int32) << 8
+            | raw[:, 2].astype(np.int32) << 16
+        )
+        ints = np.where(ints >= 1 << 23, ints - (1 << 24), ints)
+        samples = ints.astype(np.float32) / (1 << 23)
+    else:
+        dtype = {2: np.int16, 4: np.int32}[width]
+        samples = np.frombuffer(frames, dtype).astype(np.float32)
+        samples /= float(np.iinfo(dtype).max) + 1
+    return samples.reshape(-1, channels), sample_rate
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Mono 16-bit PCM WAV of float samples."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    out = io.BytesIO()
+    with wave.open(out, "wb") as audio:
+        audio.setnchannels(1)
+        audio.setsampwidth(2)
+        audio.setframerate(sample_rate)
+        audio.writeframes(pcm.tobytes())
+    return out.getvalue()
+
+
+def _resample(samples: np.ndarray, rate_in: int, rate_out: int) -> np.ndarray:
+    try:
+        from math import gcd
+
+        from scipy.signal import resample_poly
+
+        divisor = gcd(rate_in, rate_out)
+        return resample_poly(samples, rate_out // divisor, rate_in // divisor)
+    except ImportError:  # linear interpolation, no anti-aliasing filter
+        frames_out = int(round(len(samples) * rate_out / rate_in))
+        positions = np.arange(frames_out) * rate_in / rate_out
+        return np.interp(positions, np.arange(len(samples)), samples)
+
+
+def _trim_silence(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    frame = max(1, int(FRAME_SECONDS * sample_rate))
+    frames = len(samples) // frame
+    if frames == 0:
+        return samples
+    rms = np.sqrt(
+        np.mean(samples[: frames * frame].reshape(frames, frame) ** 2, axis=1)
+    )
+    peak = rms.max()
+    if peak <= 0:  # all silent: nothing to tell apart, keep it all
+        return samples
+    loud = np.flatnonzero(20 * np.log10(np.maximum(rms, 1e-10) / peak) > SILENCE_DB)
+    pad = int(PAD_SECONDS * sample_rate)
+    start = max(0, loud[0] * frame - pad)
+    end = min(len(samples), (loud[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+class AudioVariantCache:
+    """On-disk cache of the variants of recordings embedded in requests."""
+
+    def __init__(self, variant: AudioVariant, cache_dir: Path):
+        self.variant = variant
+        self.cache_dir = Path(cache_dir) / variant.name
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self._lock:
+            self.recordings = 0
+            self.hits = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.seconds_in = 0.0
+            self.seconds_out = 0.0
+
+    def seconds(self) -> Tuple[float, float]:
+        """Seconds of original and of variant audio rewritten so far."""
+        with self._lock:
+            return self.seconds_in, self.seconds_out
+
+    def get(self, data: bytes) -> Optional[bytes]:
+        """
+        The (cached) variant of an encoded recording, None if the original
+        is to be sent (the variant would contain no audio).
+        """
+        key = hashlib.sha1(data).hexdigest()
+        path = self.cache_dir / f"{key}.wav"
+        # Empty marker: the variant would be empty
+        original_path = self.cache_dir / f"{key}.orig"
+        hit = True
+        if path.exists():
+            variant = path.read_bytes()
+        elif original_path.exists():
+            variant = None
+        else:
+            hit = False
+            variant, _, _ = self.variant.encode(data)
+            # Written under a temporary name: other threads may read it
+            tmp_path = self.cache_dir / f"{key}.{threading.get_ident()}.tmp"
+            tmp_path.write_bytes(variant or b"")
+            os.replace(tmp_path, original_path if variant is None else path)
+
+        seconds_in = _wav_seconds(data)
+        sent = data if variant is None else variant
+        with self._lock:
+            self.recordings += 1
+            self.hits += hit
+            self.bytes_in += len(data)
+            self.bytes_out += len(sent)
+            self.seconds_in += seconds_in
+            self.seconds_out += (
+                seconds_in if variant is None else _wav_seconds(variant)
+            )
+        return variant
+
+    def prepare(self, paths: Iterable[str], max_workers: int = 8) -> int:
+        """
+        Precompute the variants of recording files.
+
+        Returns:
+            Number of recordings processed
+        """
+
+        def prepare_one(path):
+            with open(path, "rb") as f:
+                self.get(f.read())
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return len(list(pool.map(prepare_one, paths)))
+
+    def rewrite_messages(self, messages):
+        """Copy of chat messages with every embedded recording replaced."""
+        return map_message_parts(messages, self._rewrite_part)
+
+    def _rewrite_part(self, part):
+        if isinstance(part, dict) and part.get("type") == "input_audio":
+            audio = part["input_audio"]
+            data = self._replace(base64.b64decode(audio.get("data") or ""))
+            if data is None:
+                return part
+            return {
+                **part,
+                "input_audio": {
+                    **audio,
+                    "data": base64.b64encode(data).decode(),
+                    "format": "wav",
+                },
+            }
+        url = part_url(part)
+        if url is None or not url.startswith("data:audio") or ";base64," not in url:
+            return part
+        data = self._replace(base64.b64decode(url.split(",", 1)[1]))
+        if data is None:
+            return part
+        return with_part_url(
+            part, "data:audio/wav;base64," + base64.b64encode(data).decode()
+        )
+
+    def _replace(self, data: bytes) -> Optional[bytes]:
+        try:
+            return self.get(data)
+        except Exception:  # format not decodable here: send as is
+            return None
+
+    def summary(self) -> str:
+        return (
+            f"Audio variant {self.variant.name}: {self.recordings} recordings "
+            f"({self.hits} cached), {self.seconds_in:.0f}s -> "
+            f"{self.seconds_out:.0f}s, {self.bytes_in / 1e6:.1f}MB -> "
+            f"{self.bytes_out / 1e6:.1f}MB"
+        )
+
+
+def _wav_seconds(data: bytes) -> float:
+    try:
+        with wave.open(io.BytesIO(data)) as audio:
+            return audio.getnframes() / audio.getframerate()
+    except (wave.Error, EOFError):
+        samples, sample_rate = decode_audio(data)
+        return len(samples) / sample_rate
+
+
+_active: Optional[AudioVariantCache] = None
+
+
+def use_audio_variant(
+    spec: Optional[str], cache_dir: Path
+) -> Optional[AudioVariantCache]:
+    """
+    Select the variant of the recordings sent through litellm.
+
+    Can be called again to switch variants (or back to "original").
+
+    Args:
+        spec: Variant spec (see AudioVariant.parse); None reads
+            SEMBENCH_AUDIO_VARIANT
+        cache_dir: Directory of the cached variants (per scenario and scale
+            factor)
+
+    Returns:
+        The active cache, or None if recordings are sent unchanged
+    """
+    global _active
+    if spec is None:
+        spec = os.environ.get(VARIANT_ENV)
+    variant = AudioVariant.parse(spec)
+    if variant is None:
+        _active = None
+        return None
+    cache_dir = Path(cache_dir)
+    if (
+        _active is None
+        or _active.variant != variant
+        or _active.cache_dir.parent != cache_dir
+    ):
+        _active = AudioVariantCache(variant, cache_dir)
+    if not install_message_hook("_audio_variants", _rewrite_messages):
+        print("Warning: litellm is not installed, recordings are sent unchanged")
+    print(f"Recordings are sent as variant {variant.name}")
+    return _active
+
+
+def active_audio_variant() -> Optional[AudioVariantCache]:
+    """The cache of the selected variant, None if recordings are unchanged."""
+    return _active
+
+
+def _rewrite_messages(messages):
+    cache = _active
+    return cache.rewrite_messages(messages) if cache is not None else None
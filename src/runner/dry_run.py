@@ -0,0 +1,454 @@
+"""
+Pre-execution cost and latency estimates (``run.py --dry-run``).
+
+A dry run executes each query's own code over the actual data, but no LLM is
+called: requests made through litellm (LOTUS, Palimpzest, ThalamusDB) get
+litellm's built-in mock response, and FlockMTL's requests go to its local
+StubLLMServer. Every request is rendered and counted:
+- text with a local tokenizer (tiktoken if installed, else ~4 characters per
+  token), images and audio with the providers' published token formulas;
+- the mocked answers accept every row, so the requests seen are those of a
+  run in which every semantic filter passes everything. They are scaled by
+  the operator selectivities of the last real run of the query
+  (``metrics/{system}_operators.csv``), assuming the operators form a
+  pipeline;
+- output tokens per request and seconds per token also come from the last
+  real run (``metrics/{system}.json``), else from defaults.
+
+Estimates are printed per (system, query) and saved to
+``metrics/{system}_estimate.csv``. BigQuery and CAESURA call their models
+outside of this process and cannot be dry-run. LOTUS prompts answered from
+LOTUS's own cache are not counted.
+"""
+
+import base64
+import io
+import json
+import math
+import os
+import threading
+import wave
+from dataclasses import asdict, dataclass
+from typing import Dict, Hashable, List, Optional, Sequence
+
+import pandas as pd
+
+from runner.litellm_patch import part_url, patch_completion, request_messages
+from runner.media_tokens import audio_tokens, image_tokens
+from runner.model_pricing import model_pricing
+
+DRY_RUN_SYSTEMS = ("lotus", "palimpzest", "thalamusdb", "flockmtl")
+MOCK_ANSWER = "True"
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4  # role and separators per chat message
+UNKNOWN_IMAGE_SIZE = (1024, 1024)  # remote images are not downloaded
+MP3_BITS_PER_SECOND = 128_000  # duration estimate for compressed audio
+
+# Used when the query has no past run
+DEFAULT_OUTPUT_TOKENS = 8  # per request
+DEFAULT_SECONDS_PER_REQUEST = 1.0  # per concurrent worker
+
+_encoding = None
+
+
+def text_tokens(text: str) -> int:
+    """Tokens of text with tiktoken's o200k encoding, else by length."""
+    global _encoding
+    if _encoding is None:
+        try:
+            import tiktoken
+
+            _encoding = tiktoken.get_encoding("o200k_base")
+        except Exception:  # not installed, or the encoding cannot be fetched
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _data_url_bytes(url: str) -> Optional[bytes]:
+    if not url.startswith("data:") or "," not in url:
+        return None
+    return base64.b64decode(url.split(",", 1)[1])
+
+
+def _image_size(url: str):
+    from PIL import Image
+
+    try:
+        data = _data_url_bytes(url)
+        if data is not None:
+            return Image.open(io.BytesIO(data)).size
+        path = url[len("file://"):] if url.startswith("file://") else url
+        if os.path.exists(path):
+            with Image.open(path) as image:
+                return image.size
+    except Exception:
+        pass
+    return UNKNOWN_IMAGE_SIZE
+
+
+def _audio_seconds(data: bytes) -> float:
+    try:
+        with wave.open(io.BytesIO(data)) as audio:
+            return audio.getnframes() / audio.getframerate()
+    except (wave.Error, EOFError):
+        return len(data) * 8 / MP3_BITS_PER_SECOND
+
+
+def message_tokens(messages: Sequence[dict], model: str) -> Dict[str, int]:
+    """
+    Count the input tokens of chat messages per modality.
+
+    Args:
+        messages: OpenAI/litellm chat messages; content is a string or a list
+            of text, image_url, input_audio or file parts
+        model: Model the messages are sent to
+
+    Returns:
+        Dictionary with "text", "image" and "audio" token counts
+    """
+    counts = {"text": 0, "image": 0, "audio": 0}
+    for message in messages or []:
+        counts["text"] += MESSAGE_OVERHEAD_TOKENS
+        content = message.get("content") if isinstance(message, dict) else message
+        parts = content if isinstance(content, list) else [content]
+        for part in parts:
+            if part is None:
+                continue
+            if isinstance(part, str):
+                counts["text"] += text_tokens(part)
+                continue
+            kind = part.get("type")
+            if kind == "text":
+                counts["text"] += text_tokens(part.get("text") or "")
+            elif kind == "image_url":
+                counts["image"] += image_tokens(*_image_size(part_url(part)), model)
+            elif kind == "input_audio":
+                data = base64.b64decode(part["input_audio"].get("data") or "")
+                counts["audio"] += audio_tokens(_audio_seconds(data), model)
+            elif kind == "file":
+                url = part_url(part)
+                if url.startswith("data:audio"):
+                    data = _data_url_bytes(url)
+                    counts["audio"] += audio_tokens(_audio_seconds(data), model)
+                elif url.startswith("data:image"):
+                    counts["image"] += image_tokens(*_image_size(url), model)
+            else:
+                counts["text"] += text_tokens(json.dumps(part, default=str))
+    return counts
+
+
+@dataclass
+class LLMRequest:
+    """One request answered by the dry run."""
+
+    tag: Optional[Hashable]
+    model: Optional[str]
+    text_tokens: int
+    image_tokens: int
+    audio_tokens: int
+    max_tokens: Optional[int] = None
+
+
+@dataclass
+class QueryEstimate:
+    """Estimated cost and latency of one query."""
+
+    system: str
+    query_id: int
+    scale_factor: int
+    status: str
+    llm_calls: float = 0.0
+    text_tokens: float = 0.0
+    image_tokens: float = 0.0
+    audio_tokens: float = 0.0
+    output_tokens: float = 0.0
+    total_tokens: float = 0.0
+    money_cost: float = 0.0
+    execution_time: float = None
+    pass_through: float = 1.0  # fraction of the requests a real run issues
+    history: bool = False  # calibrated by a past run
+    error: str = None
+
+
+def pass_through_ratio(operators: pd.DataFrame) -> Optional[float]:
+    """
+    Fraction of a query's all-rows-pass LLM requests that a real run issues.
+
+    Operator k only sees the rows its predecessors let through. Had they let
+    everything through, it would have issued its calls divided by the product
+    of their selectivities.
+
+    Args:
+        operators: The query's rows of a past ``{system}_operators.csv``
+
+    Returns:
+        The ratio, or None if the operators recorded no calls
+    """
+    ops = operators[operators["phase"] == "execution"].sort_values("position")
+    calls = ops["llm_calls"].fillna(0).astype(float)
+    selectivity = ops["selectivity"].astype(float).fillna(1.0).clip(upper=1.0)
+    reaching = selectivity.cumprod().shift(fill_value=1.0)
+    known = reaching > 0  # nothing is known after a selectivity of 0
+    all_pass = (calls[known] / reaching[known]).sum()
+    if all_pass <= 0:
+        return None
+    return float(calls[known].sum() / all_pass)
+
+
+class DryRun:
+    """
+    Answers LLM requests locally and records them per query.
+
+    Enter it before creating the runner, so that requests made while the
+    runner initializes (e.g., warm-up calls) are answered locally too.
+    """
+
+    def __init__(self, answer: str = MOCK_ANSWER):
+        self.answer = answer
+        # Queries run one at a time; read by every thread issuing requests
+        self.tag: Optional[Hashable] = None
+        self._requests: List[LLMRequest] = []
+        self._lock = threading.Lock()
+        self._restore = []
+
+    def record(self, model: str, messages: Sequence[dict], max_tokens=None):
+        counts = message_tokens(messages, model)
+        with self._lock:
+            self._requests.append(
+                LLMRequest(
+                    tag=self.tag,
+                    model=model,
+                    text_tokens=counts["text"],
+                    image_tokens=counts["image"],
+                    audio_tokens=counts["audio"],
+                    max_tokens=max_tokens,
+                )
+            )
+
+    def requests_for(self, tag: Hashable) -> List[LLMRequest]:
+        with self._lock:
+            return [r for r in self._requests if r.tag == tag]
+
+    def __enter__(self) -> "DryRun":
+        self._patch_litellm()
+        # Read by the FlockMTL runner when it is created
+        previous = os.environ.get("FLOCKMTL_STUB_LLM")
+        os.environ["FLOCKMTL_STUB_LLM"] = "1"
+
+        def restore_environment():
+            if previous is None:
+                os.environ.pop("FLOCKMTL_STUB_LLM", None)
+            else:
+                os.environ["FLOCKMTL_STUB_LLM"] = previous
+
+        self._restore.append(restore_environment)
+        return self
+
+    def __exit__(self, *exc_info):
+        for restore in reversed(self._restore):
+            restore()
+        self._restore = []
+
+    def _patch_litellm(self):
+        dry_run = self
+
+        def make_completion(original):
+            def completion(*args, **kwargs):
+                model, messages = request_messages(args, kwargs)
+                dry_run.record(
+                    model,
+                    messages,
+                    kwargs.get("max_tokens") or kwargs.get("max_completion_tokens"),
+                )
+                # litellm returns a response without contacting the provider
+                kwargs["mock_response"] = dry_run.answer
+                return original(*args, **kwargs)
+
+            return completion
+
+        undo = patch_completion(make_completion)
+        if undo is not None:
+            self._restore.append(undo)
+
+    def _hook_stub_llm(self, runner):
+        stub = getattr(runner, "stub_llm", None)
+        if stub is None:
+            return
+        answer = stub.answer
+
+        def recording_answer(request: dict) -> str:
+            self.record(
+                request.get("model"),
+                request.get("messages") or [],
+                request.get("max_tokens"),
+            )
+            return answer(request)
+
+        stub.answer = recording_answer
+
+    def estimate(self, runner, query_ids: Sequence[int]) -> pd.DataFrame:
+        """
+        Dry-run queries and estimate their cost and latency.
+
+        Args:
+            runner: Runner created inside this DryRun
+            query_ids: Queries to estimate
+
+        Returns:
+            One row per query (see QueryEstimate), also saved to
+            ``metrics/{system}_estimate.csv``
+        """
+        self._hook_stub_llm(runner)
+        history, operators = _load_history(runner)
+
+        estimates = []
+        for query_id in query_ids:
+            print(f"\nDry run of Q{query_id}")
+            self.tag = query_id
+            try:
+                metric = runner.execute_queries([query_id])[query_id]
+                status, error = metric.status, metric.error
+            except Exception as e:
+                status, error = "failed", str(e)
+            finally:
+                self.tag = None
+            estimate = self._estimate_query(
+                runner, query_id, history.get(f"Q{query_id}"), operators
+            )
+            estimate.status = "estimated" if status == "success" else status
+            estimate.error = error
+            estimates.append(estimate)
+
+        _fill_times(runner, estimates, history)
+        df = pd.DataFrame([asdict(e) for e in estimates])
+        estimate_file = runner.metrics_path / f"{runner.system_name}_estimate.csv"
+        df.to_csv(estimate_file, index=False)
+        print_estimates(df)
+        print(f"Estimates saved to: {estimate_file}")
+        return df
+
+    def _estimate_query(
+        self,
+        runner,
+        query_id: int,
+        past: Optional[dict],
+        operators: Optional[pd.DataFrame],
+    ) -> QueryEstimate:
+        estimate = QueryEstimate(
+            system=runner.system_name,
+            query_id=query_id,
+            scale_factor=runner.scale_factor,
+            status="estimated",
+        )
+        past_ops = (
+            operators[operators["query_id"] == query_id]
+            if operators is not None
+            else None
+        )
+        output_per_call = DEFAULT_OUTPUT_TOKENS
+        if past_ops is not None and not past_ops.empty:
+            ratio = pass_through_ratio(past_ops)
+            if ratio is not None:
+                estimate.pass_through = ratio
+                estimate.history = True
+            calls = past_ops["llm_calls"].fillna(0).sum()
+            if calls > 0:
+                output_per_call = past_ops["output_tokens"].fillna(0).sum() / calls
+
+        scale = estimate.pass_through
+        for request in self.requests_for(query_id):
+            output_tokens = output_per_call
+            if request.max_tokens:
+                output_tokens = min(output_tokens, request.max_tokens)
+            text = request.text_tokens + request.image_tokens
+            estimate.llm_calls += scale
+            estimate.text_tokens += scale * request.text_tokens
+            estimate.image_tokens += scale * request.image_tokens
+            estimate.audio_tokens += scale * request.audio_tokens
+            estimate.output_tokens += scale * output_tokens
+            pricing = model_pricing(request.model or runner.model_name)
+            if pricing is not None:
+                estimate.money_cost += (
+                    scale
+                    * (
+                        text * pricing["text"]
+                        + request.audio_tokens * pricing["audio"]
+                        + output_tokens * pricing["output"]
+                    )
+                    / 1_000_000
+                )
+        estimate.total_tokens = (
+            estimate.text_tokens
+            + estimate.image_tokens
+            + estimate.audio_tokens
+            + estimate.output_tokens
+        )
+        if past:
+            estimate.history = True
+        return estimate
+
+
+def _load_history(runner):
+    """Metrics and operator stats of the system's last real run, if any."""
+    history = {}
+    metrics_file = runner.metrics_path / f"{runner.system_name}.json"
+    if metrics_file.exists():
+        with open(metrics_file) as f:
+            history = json.load(f)
+    operators = None
+    operators_file = runner.metrics_path / f"{runner.system_name}_operators.csv"
+    if operators_file.exists():
+        operators = pd.read_csv(operators_file)
+    return history, operators
+
+
+def _seconds_per_token(past: Optional[dict]) -> Optional[float]:
+    if not past or past.get("status") != "success":
+        return None
+    tokens, seconds = past.get("token_usage") or 0, past.get("execution_time")
+    return seconds / tokens if tokens > 0 and seconds else None
+
+
+def _fill_times(runner, estimates: List[QueryEstimate], history: dict):
+    """
+    Wall time: tokens times the seconds per token of the query's last run,
+    else of the system's median query, else a fixed time per request.
+    """
+    rates = [r for r in map(_seconds_per_token, history.values()) if r]
+    median_rate = float(pd.Series(rates).median()) if rates else None
+    for estimate in estimates:
+        rate = _seconds_per_token(history.get(f"Q{estimate.query_id}"))
+        rate = rate or median_rate
+        if rate is not None:
+            estimate.execution_time = estimate.total_tokens * rate
+        else:
+            estimate.execution_time = (
+                estimate.llm_calls
+                / max(1, runner.concurrent_llm_worker)
+                * DEFAULT_SECONDS_PER_REQUEST
+            )
+
+
+def print_estimates(df: pd.DataFrame):
+    """Print estimates as a table, one line per (system, query)."""
+    if df.empty:
+        return
+    table = pd.DataFrame(
+        {
+            "system": df["system"],
+            "query": "Q" + df["query_id"].astype(str),
+            "status": df["status"],
+            "llm_calls": df["llm_calls"].round().astype(int),
+            "text_tok": df["text_tokens"].round().astype(int),
+            "image_tok": df["image_tokens"].round().astype(int),
+            "audio_tok": df["audio_tokens"].round().astype(int),
+            "output_tok": df["output_tokens"].round().astype(int),
+            "cost_usd": df["money_cost"].map("{:.4f}".format),
+            "seconds": df["execution_time"].map("{:.1f}".format),
+            "pass_through": df["pass_through"].map("{:.2f}".format),
+        }
+    )
+    print(table.to_string(index=False))
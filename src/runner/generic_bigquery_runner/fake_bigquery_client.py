@@ -0,0 +1,172 @@
+"""
+In-process stand-in for ``google.cloud.bigquery.Client``.
+
+Implements the subset of the client and QueryJob API used by the BigQuery
+runner (``query``, ``done``, ``result``, ``to_dataframe`` and the job
+timestamps), so that job scheduling can be exercised offline and without
+credentials. Jobs do not run any SQL; they return configured DataFrames after
+simulated queue and run times.
+"""
+
+import heapq
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional, Union
+
+import pandas as pd
+
+ResultSpec = Union[
+    pd.DataFrame,
+    Exception,
+    Callable[[str, object], Union[pd.DataFrame, Exception]],
+]
+
+
+class FakeRowIterator:
+    """Result rows of a finished fake job."""
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self.total_rows = len(df)
+
+    def to_dataframe(self, *args, **kwargs) -> pd.DataFrame:
+        return self._df.copy()
+
+    def to_arrow(self, *args, **kwargs):
+        import pyarrow as pa
+
+        return pa.Table.from_pandas(self._df, preserve_index=False)
+
+
+class FakeQueryJob:
+    """A fake job whose state is derived from the wall clock."""
+
+    def __init__(
+        self,
+        query: str,
+        job_config,
+        result: Union[pd.DataFrame, Exception],
+        start_at: float,
+        end_at: float,
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.query = query
+        self.job_config = job_config
+        self._result = result
+        self._created_at = time.time()
+        self._start_at = start_at
+        self._end_at = end_at
+
+    @staticmethod
+    def _to_datetime(ts: float) -> datetime:
+        return datetime.fromtimestamp(0, tz=timezone.utc) + timedelta(seconds=ts)
+
+    @property
+    def state(self) -> str:
+        now = time.time()
+        if now >= self._end_at:
+            return "DONE"
+        return "RUNNING" if now >= self._start_at else "PENDING"
+
+    @property
+    def created(self) -> datetime:
+        return self._to_datetime(self._created_at)
+
+    @property
+    def started(self) -> Optional[datetime]:
+        return self._to_datetime(self._start_at) if self.state != "PENDING" else None
+
+    @property
+    def ended(self) -> Optional[datetime]:
+        return self._to_datetime(self._end_at) if self.state == "DONE" else None
+
+    @property
+    def error_result(self) -> Optional[Dict[str, str]]:
+        if self.state == "DONE" and isinstance(self._result, Exception):
+            return {"reason": type(self._result).__name__, "message": str(self._result)}
+        return None
+
+    def reload(self, *args, **kwargs):
+        pass
+
+    def done(self, *args, **kwargs) -> bool:
+        return self.state == "DONE"
+
+    def result(self, timeout: float = None, *args, **kwargs) -> FakeRowIterator:
+        wait = self._end_at - time.time()
+        if timeout is not None and wait > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"Job {self.job_id} did not finish in {timeout}s")
+        if wait > 0:
+            time.sleep(wait)
+        if isinstance(self._result, Exception):
+            raise self._result
+        return FakeRowIterator(self._result)
+
+    def to_dataframe(self, *args, **kwargs) -> pd.DataFrame:
+        return self.result().to_dataframe()
+
+
+class FakeBigQueryClient:
+    """Offline stand-in for ``bigquery.Client``."""
+
+    def __init__(
+        self,
+        results: ResultSpec = None,
+        queued_seconds: float = 0.0,
+        running_seconds: Union[float, Callable[[str], float]] = 0.0,
+        max_concurrent_jobs: Optional[int] = None,
+        project: str = "fake-project",
+    ):
+        """
+        Initialize the fake client.
+
+        Args:
+            results: DataFrame returned by every job, an exception raised by
+                every job, or a function (query, job_config) -> DataFrame or
+                exception. Defaults to an empty DataFrame.
+            queued_seconds: Simulated time before a job starts running
+            running_seconds: Simulated run time, or a function of the query
+            max_concurrent_jobs: Server-side slots; jobs beyond it stay
+                queued until a slot frees up. None means unlimited.
+            project: Reported project id
+        """
+        self.project = project
+        self._results = results
+        self._queued_seconds = queued_seconds
+        self._running_seconds = running_seconds
+        self._max_concurrent_jobs = max_concurrent_jobs
+        self._slot_free_at = []  # min-heap of end times of occupied slots
+        self._lock = threading.Lock()
+        self.jobs = []
+
+    def _resolve_result(self, query: str, job_config):
+        if self._results is None:
+            return pd.DataFrame()
+        if callable(self._results):
+            return self._results(query, job_config)
+        return self._results
+
+    def query(self, query: str, job_config=None, **kwargs) -> FakeQueryJob:
+        running = (
+            self._running_seconds(query)
+            if callable(self._running_seconds)
+            else self._running_seconds
+        )
+        with self._lock:
+            start_at = time.time() + self._queued_seconds
+            if self._max_concurrent_jobs is not None:
+                if len(self._slot_free_at) >= self._max_concurrent_jobs:
+                    start_at = max(start_at, heapq.heappop(self._slot_free_at))
+                heapq.heappush(self._slot_free_at, start_at + running)
+            job = FakeQueryJob(
+                query,
+                job_config,
+                self._resolve_result(query, job_config),
+                start_at,
+                start_at + running,
+            )
+            self.jobs.append(job)
+        return job
@@ -0,0 +1,321 @@
+"""
+Incremental, checksum-based sync of local benchmark data to GCS and BigQuery.
+
+Setups used to delete and re-upload every media file and reload every table
+on each non-skipped setup. With this module they:
+- compare local MD5 (or CRC32C for composite objects) with the checksums GCS
+  already stores in the object metadata, and only upload files that changed,
+  in parallel through ``transfer_manager``;
+- delete objects under the synced prefix that are no longer present locally;
+- skip BigQuery load jobs when the fingerprint of the inputs matches the
+  fingerprint stored as a label on the table.
+
+``LocalBucket`` is a filesystem-backed stand-in for ``storage.Bucket`` so the
+sync logic can be exercised offline.
+"""
+
+import base64
+import hashlib
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    from google.cloud.storage import transfer_manager
+except ImportError:  # offline use with LocalBucket
+    transfer_manager = None
+
+try:
+    import google_crc32c
+except ImportError:
+    google_crc32c = None
+
+FINGERPRINT_LABEL = "sync_fingerprint"
+HASH_CHUNK_SIZE = 1 << 20
+UPLOAD_WORKERS = 16
+
+
+def _file_digests(path: str) -> Tuple[str, Optional[str]]:
+    """Base64 MD5 and CRC32C of a file, in the format GCS reports them."""
+    md5 = hashlib.md5()
+    crc = google_crc32c.Checksum() if google_crc32c is not None else None
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            md5.update(chunk)
+            if crc is not None:
+                crc.update(chunk)
+    md5_b64 = base64.b64encode(md5.digest()).decode("ascii")
+    crc_b64 = (
+        base64.b64encode(crc.digest()).decode("ascii") if crc is not None else None
+    )
+    return md5_b64, crc_b64
+
+
+def local_md5(path: str) -> str:
+    """Base64-encoded MD5 of a local file (the format of ``Blob.md5_hash``)."""
+    return _file_digests(path)[0]
+
+
+def compute_fingerprint(*parts) -> str:
+    """
+    Fingerprint of the inputs of a table.
+
+    Args:
+        parts: Local file paths (hashed by content) or other values such as
+            schemas or media fingerprints (hashed by their string form)
+
+    Returns:
+        A 40-character lowercase hex digest, valid as a BigQuery label value
+    """
+    digest = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, (str, Path)) and os.path.isfile(part):
+            digest.update(local_md5(str(part)).encode("ascii"))
+        else:
+            digest.update(str(part).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def get_table_fingerprint(bq_client, table_id: str) -> Optional[str]:
+    """Fingerprint label of a BigQuery table, or None if it has none."""
+    try:
+        return (bq_client.get_table(table_id).labels or {}).get(FINGERPRINT_LABEL)
+    except Exception:
+        return None
+
+
+def set_table_fingerprint(bq_client, table_id: str, fingerprint: str):
+    """Store the fingerprint as a label on the BigQuery table."""
+    table = bq_client.get_table(table_id)
+    table.labels = {**(table.labels or {}), FINGERPRINT_LABEL: fingerprint}
+    bq_client.update_table(table, ["labels"])
+
+
+def table_is_current(bq_client, table_id: str, fingerprint: str) -> bool:
+    """Whether the table exists and was loaded from inputs with this fingerprint."""
+    return get_table_fingerprint(bq_client, table_id) == fingerprint
+
+
+@dataclass
+class SyncResult:
+    """Outcome of syncing local files to a bucket prefix."""
+
+    uploaded: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    failed: Dict[str, Exception] = field(default_factory=dict)
+    fingerprint: str = ""
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.uploaded or self.deleted)
+
+    def summary(self) -> str:
+        return (
+            f"{len(self.uploaded)} uploaded, {self.unchanged} unchanged, "
+            f"{len(self.deleted)} deleted, {len(self.failed)} failed"
+        )
+
+
+def _matches(blob, md5_b64: str, crc_b64: Optional[str]) -> bool:
+    if getattr(blob, "md5_hash", None):
+        return blob.md5_hash == md5_b64
+    # Composite objects have no MD5, only CRC32C
+    return crc_b64 is not None and getattr(blob, "crc32c", None) == crc_b64
+
+
+def _upload_many(bucket, pairs: List[Tuple[str, object]], max_workers: int):
+    """Upload (local path, blob) pairs in parallel; returns results in order."""
+    if transfer_manager is not None and not isinstance(bucket, LocalBucket):
+        return transfer_manager.upload_many(
+            pairs,
+            max_workers=max_workers,
+            worker_type=transfer_manager.THREAD,
+        )
+
+    def upload(pair):
+        try:
+            pair[1].upload_from_filename(pair[0])
+        except Exception as e:
+            return e
+        return None
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        return list(pool.map(upload, pairs))
+
+
+def sync_files(
+    bucket,
+    files: Dict[str, str],
+    prefix: str = "",
+    delete_extra: bool = True,
+    max_workers: int = UPLOAD_WORKERS,
+) -> SyncResult:
+    """
+    Make the objects under a bucket prefix match a set of local files.
+
+    Args:
+        bucket: A ``storage.Bucket`` or ``LocalBucket``
+        files: Mapping from blob name to local file path
+        prefix: Prefix whose objects are compared (and deleted if extra)
+        delete_extra: Delete objects under the prefix that are not in files
+        max_workers: Parallel uploads
+
+    Returns:
+        SyncResult with the uploaded, deleted and unchanged objects and a
+        fingerprint over all synced object names and checksums
+    """
+    remote = {blob.name: blob for blob in bucket.list_blobs(prefix=prefix or None)}
+    result = SyncResult()
+
+    with ThreadPoolExecutor(max_workers) as pool:
+        digests = dict(zip(files, pool.map(_file_digests, files.values())))
+
+    to_upload = []
+    for name, local_path in files.items():
+        md5_b64, crc_b64 = digests[name]
+        blob = remote.get(name)
+        if blob is not None and _matches(blob, md5_b64, crc_b64):
+            result.unchanged += 1
+        else:
+            to_upload.append((local_path, bucket.blob(name)))
+
+    if to_upload:
+        for (local_path, blob), outcome in zip(
+            to_upload, _upload_many(bucket, to_upload, max_workers)
+        ):
+            if isinstance(outcome, Exception):
+                result.failed[blob.name] = outcome
+            else:
+                result.uploaded.append(blob.name)
+
+    if delete_extra:
+        for name, blob in remote.items():
+            if name not in files:
+                blob.delete()
+                result.deleted.append(name)
+
+    fingerprint = hashlib.sha1()
+    for name in sorted(files):
+        fingerprint.update(f"{name}:{digests[name][0]}\n".encode("utf-8"))
+    result.fingerprint = fingerprint.hexdigest()
+    return result
+
+
+def sync_listed_files(
+    bucket,
+    df: pd.DataFrame,
+    path_col: str,
+    gcs_folder: str,
+    max_workers: int = UPLOAD_WORKERS,
+) -> Tuple[pd.DataFrame, SyncResult]:
+    """
+    Sync the files referenced by a CSV column into a bucket folder.
+
+    Args:
+        bucket: A ``storage.Bucket`` or ``LocalBucket``
+        df: Table with one local file path per row in ``path_col``
+        path_col: Column with the local file paths
+        gcs_folder: Folder in the bucket (object names keep the file name)
+        max_workers: Parallel uploads
+
+    Returns:
+        The rows whose file exists, with ``path_col`` replaced by its
+        ``gs://`` URI and moved to the last column, and the SyncResult
+    """
+    exists = df[path_col].map(os.path.exists)
+    for missing in df.loc[~exists, path_col]:
+        print(f"Warning: File {missing} does not exist. Skipping.")
+    df = df[exists]
+
+    blob_names = df[path_col].map(
+        lambda p: os.path.join(gcs_folder, str(p).split("/")[-1])
+    )
+    result = sync_files(
+        bucket,
+        dict(zip(blob_names, df[path_col])),
+        prefix=f"{gcs_folder}/",
+        max_workers=max_workers,
+    )
+
+    records = df.drop(columns=[path_col])
+    records[path_col] = f"gs://{bucket.name}/" + blob_names
+    records = records[~blob_names.isin(result.failed.keys())]
+    return records.reset_index(drop=True), result
+
+
+def get_or_create_bucket(gcs_client, bucket_name: str):
+    bucket = gcs_client.lookup_bucket(bucket_name)
+    if bucket is None:
+        print(f"Bucket {bucket_name} not found. Creating it...")
+        bucket = gcs_client.create_bucket(bucket_name)
+    return bucket
+
+
+class LocalBlob:
+    """A file in a LocalBucket, with GCS-style checksum metadata."""
+
+    def __init__(self, bucket: "LocalBucket", name: str):
+        self.bucket = bucket
+        self.name = name
+
+    @property
+    def path(self) -> Path:
+        return self.bucket.root / self.name
+
+    @property
+    def size(self) -> Optional[int]:
+        return self.path.stat().st_size if self.path.exists() else None
+
+    @property
+    def md5_hash(self) -> Optional[str]:
+        return _file_digests(str(self.path))[0] if self.path.exists() else None
+
+    @property
+    def crc32c(self) -> Optional[str]:
+        return _file_digests(str(self.path))[1] if self.path.exists() else None
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def upload_from_filename(self, filename: str, *args, **kwargs):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f".{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(filename, tmp_path)
+        os.replace(tmp_path, self.path)
+
+    def delete(self):
+        self.path.unlink()
+
+
+class LocalBucket:
+    """Filesystem-backed stand-in for ``storage.Bucket``."""
+
+    def __init__(self, root: str, name: str = "local-bucket"):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.name = name
+
+    def blob(self, name: str) -> LocalBlob:
+        return LocalBlob(self, name)
+
+    def list_blobs(self, prefix: str = None):
+        names = sorted(
+            p.relative_to(self.root).as_posix()
+            for p in self.root.rglob("*")
+            if p.is_file() and not p.name.endswith(".tmp")
+        )
+        return [
+            LocalBlob(self, n) for n in names if prefix is None or n.startswith(prefix)
+        ]
+
+    def delete_blobs(self, blobs):
+        for blob in blobs:
+            blob.delete()
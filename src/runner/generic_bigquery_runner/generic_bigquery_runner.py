@@ -5,6 +5,14 @@ Generic BigQuery system runner implementation.
 (1) cost calculation, including audio token, reasoning token.
 (2) parameters for BigQuery SQL, including model specification and
 thinking_budgets
+
+Queries run one job at a time by default. With async_jobs (or
+BIGQUERY_ASYNC_JOBS=1), all queries are submitted up front, bounded by
+max_concurrent_jobs (BIGQUERY_MAX_CONCURRENT_JOBS, default 10), and polled.
+
+Results are downloaded through the BigQuery Storage read API unless
+BIGQUERY_STORAGE_API=0. The download is timed separately and excluded from
+execution_time, which covers submission, queueing and server execution.
 """
 
 import os
@@ -17,9 +25,102 @@ from google.cloud import bigquery
 from jinja2 import Environment
 
 from runner.generic_runner import GenericRunner, GenericQueryMetric
+from runner.generic_bigquery_runner.job_scheduler import (
+    JobOutcome,
+    create_bqstorage_client,
+    download_results,
+    run_jobs_concurrently,
+    storage_api_downloader,
+)
 
 jinja_env = Environment(variable_start_string="<<", variable_end_string=">>")
 
+# Prices per 1M tokens (USD). Input is split into audio vs "other"
+# (text/image/video).
+MODEL_PRICES = {
+    "gemini_2_5_pro": {
+        "input_other": 1.25 / 1e6,
+        "input_audio": 1.25 / 1e6,
+        "output": 10.0 / 1e6,
+    },
+    "gemini_2_5_flash": {
+        "input_other": 0.30 / 1e6,
+        "input_audio": 1.00 / 1e6,
+        "output": 2.50 / 1e6,
+    },
+    "gemini_2_5_flash_lite": {
+        "input_other": 0.10 / 1e6,
+        "input_audio": 0.30 / 1e6,
+        "output": 0.40 / 1e6,
+    },
+    "gemini_2_0_flash": {
+        "input_other": 0.15 / 1e6,
+        "input_audio": 1.00 / 1e6,
+        "output": 0.60 / 1e6,
+    },
+}
+
+# Token usage of all queries of a run, grouped by query_uuid label and model,
+# so that cost attribution needs a single scan of the inference logs.
+AGG_SQL = """
+WITH all_inference_logs AS (
+SELECT *, 'gemini_2_0_flash'        AS model_key FROM inference_logs.gemini_2_0_flash_001
+UNION ALL
+SELECT *, 'gemini_2_0_flash_lite'   AS model_key FROM inference_logs.gemini_2_0_flash_lite_001
+UNION ALL
+SELECT *, 'gemini_2_5_flash'        AS model_key FROM inference_logs.gemini_2_5_flash
+UNION ALL
+SELECT *, 'gemini_2_5_flash_lite'   AS model_key FROM inference_logs.gemini_2_5_flash_lite_preview_06_17
+UNION ALL
+SELECT *, 'gemini_2_5_pro'          AS model_key FROM inference_logs.gemini_2_5_pro
+),
+enriched AS (
+SELECT
+    JSON_VALUE(full_request, '$.labels.query_uuid') AS query_uuid,
+    model_key,
+    full_response,
+    SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.promptTokenCount') AS INT64) AS prompt_total,
+    COALESCE(ARRAY_LENGTH(JSON_QUERY_ARRAY(full_response, '$.usageMetadata.promptTokensDetails')), 0) AS prompt_details_len,
+    SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.candidatesTokenCount') AS INT64) AS output_tokens,
+    SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.thoughtsTokenCount')  AS INT64) AS reasoning_tokens,
+    SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.billablePromptUsage.textCount') AS INT64)  AS billable_text_count,
+    SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.billablePromptUsage.audioDurationSeconds') AS FLOAT64) AS billable_audio_seconds,
+    (
+    SELECT SUM(SAFE_CAST(JSON_VALUE(d, '$.tokenCount') AS INT64))
+    FROM UNNEST(JSON_QUERY_ARRAY(full_response, '$.usageMetadata.promptTokensDetails')) AS d
+    WHERE JSON_VALUE(d, '$.modality') = 'AUDIO'
+    ) AS prompt_audio_detail_sum,
+    (
+    SELECT SUM(SAFE_CAST(JSON_VALUE(d, '$.tokenCount') AS INT64))
+    FROM UNNEST(JSON_QUERY_ARRAY(full_response, '$.usageMetadata.promptTokensDetails')) AS d
+    WHERE JSON_VALUE(d, '$.modality') != 'AUDIO'
+    ) AS prompt_other_detail_sum
+FROM all_inference_logs
+WHERE JSON_VALUE(full_request, '$.labels.query_uuid') IN UNNEST(@query_uuids)
+)
+SELECT
+query_uuid,
+model_key,
+SUM( IFNULL( IF(prompt_details_len > 0, prompt_audio_detail_sum, 0), 0) ) AS prompt_audio_tokens,
+SUM( IFNULL( IF(prompt_details_len > 0, prompt_other_detail_sum, prompt_total), 0) ) AS prompt_other_tokens,
+SUM( IFNULL(output_tokens,   0) ) AS output_tokens,
+SUM( IFNULL(reasoning_tokens,0) ) AS reasoning_tokens,
+SUM( IFNULL(billable_text_count,  0) ) AS billable_text_count,
+SUM( IFNULL(billable_audio_seconds,0.0) ) AS billable_audio_seconds
+FROM enriched
+GROUP BY query_uuid, model_key
+"""  # noqa: E501
+
+# Polling for inference logs to materialize: first wait, growth factor, cap
+# per wait and overall budget (seconds).
+COST_POLL_INITIAL_DELAY = 2.0
+COST_POLL_BACKOFF = 2.0
+COST_POLL_MAX_DELAY = 30.0
+COST_POLL_TIMEOUT = 120.0
+# Queries without LLM calls never appear in the inference logs; once the
+# others have appeared, the missing ones are waited for this much longer
+COST_POLL_GRACE = 10.0
+
 
 class GenericBigQueryRunner(GenericRunner):
     """Runner for BigQuery."""
@@ -32,6 +133,10 @@ class GenericBigQueryRunner(GenericRunner):
         concurrent_llm_worker=20,
         skip_setup: bool = False,
         thinking_budget: int = 0,
+        async_jobs: bool = None,
+        max_concurrent_jobs: int = None,
+        bq_client=None,
+        use_storage_api: bool = None,
     ):
         """
         Initialize BigQuery runner.
@@ -40,6 +145,14 @@ class GenericBigQueryRunner(GenericRunner):
             use_case: The use case to run
             model_name: LLM model to use
             thinking_budget: Budget for thinking tokens (default: 0)
+            async_jobs: Submit all queries up front and poll them (default:
+                BIGQUERY_ASYNC_JOBS environment variable, else False)
+            max_concurrent_jobs: Maximum number of jobs in flight in async
+                mode (default: BIGQUERY_MAX_CONCURRENT_JOBS, else 10)
+            bq_client: Client to use instead of a new ``bigquery.Client``,
+                e.g. a FakeBigQueryClient for offline runs
+            use_storage_api: Download results through the Storage read API
+                (default: BIGQUERY_STORAGE_API environment variable, else True)
         """
         super().__init__(
             use_case,
@@ -49,11 +162,26 @@ class GenericBigQueryRunner(GenericRunner):
             skip_setup,
         )
         self.thinking_budget = thinking_budget
+        self.async_jobs = (
+            async_jobs
+            if async_jobs is not None
+            else os.environ.get("BIGQUERY_ASYNC_JOBS", "0") == "1"
+        )
+        self.max_concurrent_jobs = max_concurrent_jobs or int(
+            os.environ.get("BIGQUERY_MAX_CONCURRENT_JOBS", "10")
+        )
 
         # Set up BigQuery client (assumes GOOGLE_APPLICATION_CREDENTIALS is set)
-        self.bq_client = bigquery.Client(
+        self.bq_client = bq_client or bigquery.Client(
             project=os.environ.get("GCLOUD_PROJECT")
         )
+        if use_storage_api is None:
+            use_storage_api = os.environ.get("BIGQUERY_STORAGE_API", "1") == "1"
+        self.to_dataframe = storage_api_downloader(
+            create_bqstorage_client()
+            if use_storage_api and bq_client is None
+            else None
+        )
 
     @override
     def get_system_name(self) -> str:
@@ -80,206 +208,207 @@ class GenericBigQueryRunner(GenericRunner):
             for query_id in query_ids
         }
 
+        templated_queries = {}
         for query_id, query_text in query_texts.items():
             try:
                 # Replace variable names in the query text
-                templated_query = jinja_env.from_string(query_text).render(
+                templated_queries[query_id] = jinja_env.from_string(
+                    query_text
+                ).render(
                     connection="us.connection",
                     query_id=f"{run_uuid}-q{query_id}",
                     other_params=f", endpoint => '{self.model_name}'",
                     thinking_budget=self.thinking_budget,
                 )
-
-                start_time = time.time()
-                query_job = self.bq_client.query(templated_query)
-                df = query_job.result().to_dataframe()
-                execution_time = time.time() - start_time
-
-                query_metrics[query_id].results = df
-                query_metrics[query_id].execution_time = execution_time
-                query_metrics[query_id].status = "success"
             except Exception as e:
                 print(
-                    f"  Error executing query {query_id}: {type(e).__name__}: {e}"  # noqa: E501
+                    f"  Error rendering query {query_id}: {type(e).__name__}: {e}"  # noqa: E501
                 )
                 query_metrics[query_id].status = "failed"
                 query_metrics[query_id].error = str(e)
 
-        # Prices per 1M tokens (USD). Input is split into audio vs "other"
-        # (text/image/video).
-        MODEL_PRICES = {
-            "gemini_2_5_pro": {
-                "input_other": 1.25 / 1e6,
-                "input_audio": 1.25 / 1e6,
-                "output": 10.0 / 1e6,
-            },
-            "gemini_2_5_flash": {
-                "input_other": 0.30 / 1e6,
-                "input_audio": 1.00 / 1e6,
-                "output": 2.50 / 1e6,
-            },
-            "gemini_2_5_flash_lite": {
-                "input_other": 0.10 / 1e6,
-                "input_audio": 0.30 / 1e6,
-                "output": 0.40 / 1e6,
-            },
-            "gemini_2_0_flash": {
-                "input_other": 0.15 / 1e6,
-                "input_audio": 1.00 / 1e6,
-                "output": 0.60 / 1e6,
-            },
-        }
+        if self.async_jobs:
+            print(
+                f"  Submitting {len(templated_queries)} queries with up to {self.max_concurrent_jobs} concurrent jobs"  # noqa: E501
+            )
+            outcomes = run_jobs_concurrently(
+                self.bq_client,
+                templated_queries,
+                max_concurrent_jobs=self.max_concurrent_jobs,
+                to_dataframe=self.to_dataframe,
+            )
+        else:
+            outcomes = {
+                query_id: self._run_job(templated_query)
+                for query_id, templated_query in templated_queries.items()
+            }
 
-        AGG_SQL = """
-        -- see SQL above; identical text
-        WITH all_inference_logs AS (
-        SELECT *, 'gemini_2_0_flash'        AS model_key FROM inference_logs.gemini_2_0_flash_001
-        UNION ALL
-        SELECT *, 'gemini_2_0_flash_lite'   AS model_key FROM inference_logs.gemini_2_0_flash_lite_001
-        UNION ALL
-        SELECT *, 'gemini_2_5_flash'        AS model_key FROM inference_logs.gemini_2_5_flash
-        UNION ALL
-        SELECT *, 'gemini_2_5_flash_lite'   AS model_key FROM inference_logs.gemini_2_5_flash_lite_preview_06_17
-        UNION ALL
-        SELECT *, 'gemini_2_5_pro'          AS model_key FROM inference_logs.gemini_2_5_pro
-        ),
-        enriched AS (
-        SELECT
-            model_key,
-            full_response,
-            SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.promptTokenCount') AS INT64) AS prompt_total,
-            COALESCE(ARRAY_LENGTH(JSON_QUERY_ARRAY(full_response, '$.usageMetadata.promptTokensDetails')), 0) AS prompt_details_len,
-            SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.candidatesTokenCount') AS INT64) AS output_tokens,
-            SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.thoughtsTokenCount')  AS INT64) AS reasoning_tokens,
-            SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.billablePromptUsage.textCount') AS INT64)  AS billable_text_count,
-            SAFE_CAST(JSON_VALUE(full_response, '$.usageMetadata.billablePromptUsage.audioDurationSeconds') AS FLOAT64) AS billable_audio_seconds,
-            (
-            SELECT SUM(SAFE_CAST(JSON_VALUE(d, '$.tokenCount') AS INT64))
-            FROM UNNEST(JSON_QUERY_ARRAY(full_response, '$.usageMetadata.promptTokensDetails')) AS d
-            WHERE JSON_VALUE(d, '$.modality') = 'AUDIO'
-            ) AS prompt_audio_detail_sum,
-            (
-            SELECT SUM(SAFE_CAST(JSON_VALUE(d, '$.tokenCount') AS INT64))
-            FROM UNNEST(JSON_QUERY_ARRAY(full_response, '$.usageMetadata.promptTokensDetails')) AS d
-            WHERE JSON_VALUE(d, '$.modality') != 'AUDIO'
-            ) AS prompt_other_detail_sum
-        FROM all_inference_logs
-        WHERE JSON_VALUE(full_request, '$.labels.query_uuid') = @query_uuid
+        for query_id, outcome in outcomes.items():
+            self._apply_outcome(query_metrics[query_id], outcome)
+
+        self._collect_costs(run_uuid, query_metrics)
+
+        return query_metrics
+
+    def _run_job(self, templated_query: str) -> JobOutcome:
+        """Submit one query and block until its results are downloaded."""
+        outcome = JobOutcome()
+        start_time = time.time()
+        try:
+            query_job = self.bq_client.query(templated_query)
+            download_results(query_job, outcome, self.to_dataframe)
+        except Exception as e:
+            outcome.error = e
+        outcome.total_time = time.time() - start_time
+        return outcome
+
+    def _apply_outcome(self, metric: GenericQueryMetric, outcome: JobOutcome):
+        """Copy results and per-job timings of a finished job into its metric."""
+        if outcome.error is not None:
+            print(
+                f"  Error executing query {metric.query_id}: {type(outcome.error).__name__}: {outcome.error}"  # noqa: E501
+            )
+            metric.status = "failed"
+            metric.error = str(outcome.error)
+            return
+
+        metric.results = outcome.results
+        # Client-side download is reported as download_time, not execution
+        metric.execution_time = outcome.total_time - (outcome.download_time or 0.0)
+        metric.queued_time = outcome.queued_time
+        metric.running_time = outcome.running_time
+        metric.download_time = outcome.download_time
+        metric.status = "success"
+
+        def fmt(seconds):
+            return "n/a" if seconds is None else f"{seconds:.2f}s"
+
+        print(
+            f"  Q{metric.query_id}: total {fmt(outcome.total_time)} (queued {fmt(outcome.queued_time)}, "  # noqa: E501
+            f"running {fmt(outcome.running_time)}, download {fmt(outcome.download_time)})"  # noqa: E501
         )
-        SELECT
-        model_key,
-        SUM( IFNULL( IF(prompt_details_len > 0, prompt_audio_detail_sum, 0), 0) ) AS prompt_audio_tokens,
-        SUM( IFNULL( IF(prompt_details_len > 0, prompt_other_detail_sum, prompt_total), 0) ) AS prompt_other_tokens,
-        SUM( IFNULL(output_tokens,   0) ) AS output_tokens,
-        SUM( IFNULL(reasoning_tokens,0) ) AS reasoning_tokens,
-        SUM( IFNULL(billable_text_count,  0) ) AS billable_text_count,
-        SUM( IFNULL(billable_audio_seconds,0.0) ) AS billable_audio_seconds
-        FROM enriched
-        GROUP BY model_key
-        """  # noqa: E501
-
-        for query_id, metrics in query_metrics.items():
-            if metrics.status == "failed":
-                continue
 
-            # Wait a moment for inference logs to materialize in BigQuery
-            print(f"  Waiting 5 seconds for inference logs to materialize for query {query_id}...")
-            time.sleep(5)
-
-            max_retries = 3  # 3 * 5s = 15s additional wait if needed
-            retry_count = 0
-            cost_retrieved = False
-
-            while retry_count < max_retries and not cost_retrieved:
-                try:
-                    job = self.bq_client.query(
-                        AGG_SQL,
-                        job_config=bigquery.QueryJobConfig(
-                            query_parameters=[
-                                bigquery.ScalarQueryParameter(
-                                    "query_uuid",
-                                    "STRING",
-                                    f"{run_uuid}-q{query_id}",
-                                )
-                            ]
-                        ),
-                    )
-                    df = job.result().to_dataframe()
-
-                    if df.empty:
-                        raise ValueError("usage not materialized yet (no rows)")
-
-                    # Totals across all models for this query
-                    total_prompt_other = int(
-                        df["prompt_other_tokens"].fillna(0).sum()
-                    )
-                    total_prompt_audio = int(
-                        df["prompt_audio_tokens"].fillna(0).sum()
-                    )
-                    total_output = int(df["output_tokens"].fillna(0).sum())
-                    total_reasoning = int(
-                        df["reasoning_tokens"].fillna(0).sum()
-                    )
-
-                    print(
-                        f"{total_prompt_other}, {total_prompt_audio}, {total_output}, {total_reasoning}"  # noqa: E501
-                    )
-
-                    # Token usage should match usageMetadata.totalTokenCount
-                    # when present:
-                    total_token_usage = (
-                        total_prompt_other
-                        + total_prompt_audio
-                        + total_output
-                        + total_reasoning
-                    )
-
-                    # Money: per-model pricing
-                    total_cost = 0.0
-                    for row in df.itertuples(index=False):
-                        model = row.model_key
-                        prices = MODEL_PRICES.get(model)
-                        if not prices:
-                            # Unknown model: count tokens but skip billing (or
-                            # set a fallback if you prefer)
-                            print(
-                                f"  Warning: No pricing configured for model '{model}'. Cost will exclude this model."  # noqa: E501
+    def _collect_costs(
+        self, run_uuid, query_metrics: Dict[int, GenericQueryMetric]
+    ):
+        """
+        Attribute token usage and cost to all successful queries of a run.
+
+        Runs one grouped AGG_SQL scan for all query uuids. If some uuids have
+        not materialized in the inference logs yet, it waits with exponential
+        backoff and scans again, until all are present or COST_POLL_TIMEOUT
+        is exhausted. Once some uuids are present, the others are only waited
+        for COST_POLL_GRACE seconds longer (queries that made no LLM calls
+        never appear); missing uuids are recorded with a cost of 0.
+        """
+        expected = {
+            f"{run_uuid}-q{query_id}": metrics
+            for query_id, metrics in query_metrics.items()
+            if metrics.status != "failed"
+        }
+        if not expected:
+            return
+
+        usage = None
+        delay = COST_POLL_INITIAL_DELAY
+        waited = 0.0
+        deadline = COST_POLL_TIMEOUT
+        attempt = 0
+        while True:
+            print(
+                f"  Waiting {delay:.0f} seconds for inference logs to materialize..."  # noqa: E501
+            )
+            time.sleep(delay)
+            waited += delay
+            attempt += 1
+            try:
+                job = self.bq_client.query(
+                    AGG_SQL,
+                    job_config=bigquery.QueryJobConfig(
+                        query_parameters=[
+                            bigquery.ArrayQueryParameter(
+                                "query_uuids", "STRING", list(expected)
                             )
-                            continue
-
-                        in_cost = (
-                            int(row.prompt_other_tokens) * prices["input_other"]
-                        ) + (
-                            int(row.prompt_audio_tokens) * prices["input_audio"]
-                        )
-                        # Reasoning tokens billed at output rate
-                        out_cost = (
-                            int(row.output_tokens) + int(row.reasoning_tokens)
-                        ) * prices["output"]
-
-                        total_cost += in_cost + out_cost
-
-                    metrics.token_usage = int(total_token_usage)
-                    metrics.money_cost = float(total_cost)
-                    cost_retrieved = True
-
-                except Exception as e:
-                    retry_count += 1
-                    if retry_count < max_retries:
-                        print(
-                            f"  Error getting cost for query {query_id} (attempt {retry_count}/{max_retries}): {type(e).__name__}: {e}, retrying in 5 seconds..."  # noqa: E501
-                        )
-                        time.sleep(5)
-                    else:
-                        print(
-                            f"  Final error getting cost for query {query_id}: {type(e).__name__}: {e}"  # noqa: E501
-                        )
-
-            if not cost_retrieved:
+                        ]
+                    ),
+                )
+                usage = job.result().to_dataframe()
+                missing = set(expected) - set(usage["query_uuid"])
+            except Exception as e:
                 print(
-                    f"  Could not retrieve cost data for query {query_id} after {max_retries} attempts, setting to 0"  # noqa: E501
+                    f"  Error getting cost (attempt {attempt}): {type(e).__name__}: {e}"  # noqa: E501
+                )
+                missing = set(expected)
+
+            if len(missing) < len(expected):
+                deadline = min(deadline, waited + COST_POLL_GRACE)
+            if not missing or waited >= deadline:
+                break
+            print(
+                f"  Usage of {len(missing)}/{len(expected)} queries not materialized yet"  # noqa: E501
+            )
+            delay = min(
+                delay * COST_POLL_BACKOFF,
+                COST_POLL_MAX_DELAY,
+                deadline - waited,
+            )
+
+        for query_uuid, metrics in expected.items():
+            rows = (
+                usage[usage["query_uuid"] == query_uuid]
+                if usage is not None
+                else None
+            )
+            if rows is None or rows.empty:
+                print(
+                    f"  Could not retrieve cost data for query {metrics.query_id} after {attempt} attempts, setting to 0"  # noqa: E501
                 )
                 metrics.token_usage = 0
                 metrics.money_cost = 0.0
+                continue
+            metrics.token_usage, metrics.money_cost = self._compute_cost(rows)
+
+    def _compute_cost(self, df):
+        """Token usage and money cost from the per-model usage rows of one query."""
+        # Totals across all models for this query
+        total_prompt_other = int(df["prompt_other_tokens"].fillna(0).sum())
+        total_prompt_audio = int(df["prompt_audio_tokens"].fillna(0).sum())
+        total_output = int(df["output_tokens"].fillna(0).sum())
+        total_reasoning = int(df["reasoning_tokens"].fillna(0).sum())
+
+        print(
+            f"{total_prompt_other}, {total_prompt_audio}, {total_output}, {total_reasoning}"  # noqa: E501
+        )
 
-        return query_metrics
+        # Token usage should match usageMetadata.totalTokenCount when present:
+        total_token_usage = (
+            total_prompt_other
+            + total_prompt_audio
+            + total_output
+            + total_reasoning
+        )
+
+        # Money: per-model pricing
+        total_cost = 0.0
+        for row in df.itertuples(index=False):
+            model = row.model_key
+            prices = MODEL_PRICES.get(model)
+            if not prices:
+                # Unknown model: count tokens but skip billing (or set a
+                # fallback if you prefer)
+                print(
+                    f"  Warning: No pricing configured for model '{model}'. Cost will exclude this model."  # noqa: E501
+                )
+                continue
+
+            in_cost = (int(row.prompt_other_tokens) * prices["input_other"]) + (
+                int(row.prompt_audio_tokens) * prices["input_audio"]
+            )
+            # Reasoning tokens billed at output rate
+            out_cost = (
+                int(row.output_tokens) + int(row.reasoning_tokens)
+            ) * prices["output"]
+
+            total_cost += in_cost + out_cost
+
+        return int(total_token_usage), float(total_cost)
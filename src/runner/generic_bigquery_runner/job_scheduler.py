@@ -0,0 +1,217 @@
+"""
+Concurrent submission of BigQuery jobs.
+
+BigQuery runs AI.IF / AI.GENERATE work server-side, so the client does not
+need to wait for one query before submitting the next. ``run_jobs_concurrently``
+keeps up to ``max_concurrent_jobs`` jobs in flight, polls them, and downloads
+each result as soon as its job is done.
+
+Every job is timed in three parts:
+- queued: job creation until BigQuery starts running it
+- running: start until end of execution on the server
+- download: fetching the result rows into a DataFrame
+
+Results are downloaded through the BigQuery Storage read API (Arrow record
+batches) with one read client shared by all jobs, instead of paging through
+the REST row iterator. Results that fit in the first REST page are used as is.
+"""
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+import pandas as pd
+
+try:
+    from google.cloud import bigquery_storage
+except ImportError:  # REST download only
+    bigquery_storage = None
+
+JOB_POLL_INTERVAL = 0.5  # seconds between polling rounds
+
+
+@dataclass
+class JobOutcome:
+    """Result and timings of one BigQuery job."""
+
+    results: Optional[pd.DataFrame] = None
+    error: Optional[Exception] = None
+    total_time: float = None
+    queued_time: float = None
+    running_time: float = None
+    download_time: float = None
+    job_id: Optional[str] = None
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+
+def job_phase_times(job) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Server-side queued and running seconds of a finished job.
+
+    Args:
+        job: A finished QueryJob (or a stand-in with created/started/ended)
+
+    Returns:
+        (queued seconds, running seconds); None where timestamps are missing
+    """
+    created = getattr(job, "created", None)
+    started = getattr(job, "started", None)
+    ended = getattr(job, "ended", None)
+    queued = (started - created).total_seconds() if created and started else None
+    running = (ended - started).total_seconds() if started and ended else None
+    return queued, running
+
+
+def create_bqstorage_client():
+    """
+    Create a BigQuery Storage read client to share across downloads.
+
+    Returns:
+        A ``BigQueryReadClient``, or None if the library is not installed or
+        the client cannot be created (downloads then use REST)
+    """
+    if bigquery_storage is None:
+        return None
+    try:
+        return bigquery_storage.BigQueryReadClient()
+    except Exception as e:
+        print(f"  BigQuery Storage API unavailable, downloading over REST: {e}")
+        return None
+
+
+def storage_api_downloader(bqstorage_client) -> Callable:
+    """
+    Download function reading results through the Storage read API.
+
+    Args:
+        bqstorage_client: Shared ``BigQueryReadClient``, or None for REST
+
+    Returns:
+        A function (job, rows) -> DataFrame for ``download_results``. If a
+        read session cannot be opened (e.g. missing permission), it falls
+        back to the REST row iterator.
+    """
+
+    def to_dataframe(job, rows) -> pd.DataFrame:
+        if bqstorage_client is None:
+            return rows.to_dataframe(create_bqstorage_client=False)
+        try:
+            return rows.to_dataframe(
+                bqstorage_client=bqstorage_client, create_bqstorage_client=False
+            )
+        except Exception as e:
+            print(
+                f"  Storage API download failed, retrying over REST: {type(e).__name__}: {e}"  # noqa: E501
+            )
+            return job.result().to_dataframe(create_bqstorage_client=False)
+
+    return to_dataframe
+
+
+def download_results(job, outcome: JobOutcome, to_dataframe: Callable = None):
+    """
+    Wait for a job, download its rows and fill in the outcome.
+
+    Args:
+        job: A submitted QueryJob
+        outcome: Outcome to update in place
+        to_dataframe: Optional function (job, rows) -> DataFrame, e.g. from
+            ``storage_api_downloader``; by default ``rows.to_dataframe()``
+    """
+    rows = job.result()  # raises if the job failed
+    download_start = time.time()
+    outcome.results = (
+        to_dataframe(job, rows)
+        if to_dataframe is not None
+        else rows.to_dataframe()
+    )
+    outcome.download_time = time.time() - download_start
+    outcome.queued_time, outcome.running_time = job_phase_times(job)
+    outcome.job_id = getattr(job, "job_id", None)
+
+
+def _end_time(job, submit_time: float, seen_time: float) -> float:
+    """
+    When a job finished: its server-side end time if known, else when it was
+    seen done (which lags by up to one polling interval).
+    """
+    ended = getattr(job, "ended", None)
+    if ended is not None:
+        end_time = ended.timestamp()
+        # Ignore end times made implausible by clock skew
+        if submit_time <= end_time <= seen_time:
+            return end_time
+    return seen_time
+
+
+def run_jobs_concurrently(
+    client,
+    queries: Dict[Hashable, str],
+    max_concurrent_jobs: int = 10,
+    poll_interval: float = JOB_POLL_INTERVAL,
+    job_config_fn: Callable[[Hashable], Any] = None,
+    to_dataframe: Callable = None,
+) -> Dict[Hashable, JobOutcome]:
+    """
+    Submit all queries, bounded by a concurrency limit, and collect results.
+
+    Args:
+        client: A ``bigquery.Client`` or a stand-in with the same ``query`` API
+        queries: Mapping from query key to SQL text, submitted in order
+        max_concurrent_jobs: Maximum number of jobs in flight
+        poll_interval: Seconds to sleep between polling rounds
+        job_config_fn: Optional function returning the job config for a key
+        to_dataframe: Optional download function, see ``download_results``
+
+    Returns:
+        Mapping from query key to its JobOutcome; failed jobs carry ``error``
+    """
+    pending = deque(queries.items())
+    in_flight: Dict[Hashable, Tuple[Any, float]] = {}
+    outcomes: Dict[Hashable, JobOutcome] = {}
+
+    while pending or in_flight:
+        while pending and len(in_flight) < max_concurrent_jobs:
+            key, sql = pending.popleft()
+            submit_time = time.time()
+            try:
+                job_config = job_config_fn(key) if job_config_fn else None
+                job = client.query(sql, job_config=job_config)
+            except Exception as e:
+                outcomes[key] = JobOutcome(error=e, total_time=0.0)
+                continue
+            in_flight[key] = (job, submit_time)
+
+        # Find all finished jobs before downloading any, so that downloads
+        # of other jobs do not count towards a job's time
+        finished = {}
+        for key, (job, submit_time) in list(in_flight.items()):
+            try:
+                if not job.done():
+                    continue
+            except Exception as e:
+                outcomes[key] = JobOutcome(
+                    error=e, total_time=time.time() - submit_time
+                )
+                del in_flight[key]
+                continue
+            finished[key] = _end_time(job, submit_time, time.time())
+
+        for key, end_time in finished.items():
+            job, submit_time = in_flight.pop(key)
+            outcome = JobOutcome()
+            try:
+                download_results(job, outcome, to_dataframe)
+            except Exception as e:
+                outcome.error = e
+            # As for a job run on its own: until done, plus the download
+            outcome.total_time = (
+                end_time - submit_time + (outcome.download_time or 0.0)
+            )
+            outcomes[key] = outcome
+
+        if in_flight:
+            time.sleep(poll_interval)
+
+    return {key: outcomes[key] for key in queries}
@@ -3,9 +3,12 @@ from caesura.database.index import RelevantValueIndex
 from caesura.database.table import Table
 from pathlib import Path
 from fuzzywuzzy import fuzz
-from pandasql import sqldf
+import duckdb
 import sqlparse
 
+from caesura.database.serializer import DEFAULT_MAX_TOKENS, serialize_table
+from caesura.database.sql_compat import sqlite_to_duckdb
+
 from caesura.observations import ExecutionError
 
 
@@ -33,6 +36,9 @@ class Database():
         self._working_set = {}
         self._relevant_values_indexes = {}
         self.history = list()
+        self._connection = None
+        self.tool_stats = list()
+        self._registered = {}
 
     @property
     def tables(self):
@@ -41,6 +47,7 @@ class Database():
     def clear_working_set(self):
         self.history = list()
         self._working_set = {}
+        self._sync_registered_tables()
         logger.info("Working set cleared!", stack_info=True)
 
     def final_result(self):
@@ -72,6 +79,10 @@ class Database():
         else:
             return f"{added_str}\n{columns_str}\n{rows_str}"
 
+    def stage_working_memory(self, table):
+        """Makes a table that is still being filled visible in the working set, without adding it to the history."""
+        self._working_set[table.name] = table
+
     def add_image_table(self, name: str, path: Path, description: str, file_paths=()):
         """Adds an image table to the database."""
         self._tables[name] = Table.create_image_table(name, path, description, file_paths=file_paths)
@@ -130,56 +141,63 @@ class Database():
         result += "A column with the TEXT datatype stores long text.\n"
         return result + "\n"
 
-    def peek_table(self, table, num_rows=5, max_num_rows=10, columns=None, example_text=False):
+    def peek_table(self, table, num_rows=5, max_num_rows=10, columns=None, example_text=False,
+                   max_tokens=DEFAULT_MAX_TOKENS):
         """Peeks at a table."""
         df = table.data_frame
         datatypes = [table.get_datatype_for_column(c) for c in columns or table.get_columns()]
-        method = "key-value"
-        if columns:
-            df = df[columns]
-            method = "markdown"
+        method = "markdown" if columns else "key-value"
         ds_num_rows = len(df)
-        if ds_num_rows > max_num_rows:
-            result =  self.serialize(df.head(num_rows), datatypes=datatypes, method=method, example_text=example_text)
-            if ds_num_rows > num_rows:
-                result += f"\n and {ds_num_rows - num_rows} more rows. \n"
-        else:
-            result = self.serialize(df, datatypes=datatypes, method=method, example_text=example_text)
+        result, num_serialized = serialize_table(df, datatypes=datatypes, method=method, example_text=example_text,
+                                                 max_tokens=max_tokens, columns=columns,
+                                                 max_rows=num_rows if ds_num_rows > max_num_rows else None)
+        if ds_num_rows > num_serialized:
+            result += f"\n and {ds_num_rows - num_serialized} more rows. \n"
         return result
 
-    def serialize(self, df, datatypes, method="markdown", example_text=True):
-        df_orig = df
-        df = df.copy()
-        example_texts = {}
-        for c, dt, in zip(df.columns, datatypes):
-            if dt == "TEXT":
-                df[c] = df[c].apply(lambda _: "<TEXT>")
-                example_texts[c] = " ".join(df_orig[c].iloc[0].split()[:200]) + " ..."
-
-        result = ""
-        if method == "key-value":
-            result = []
-            for _, row in df.iterrows():
-                row_serialized = " | ".join(f"{c}: {v}" for c, v in zip(df.columns, row))
-                result.append(row_serialized)
-            result = "\n".join(result)
-        elif method == "markdown":
-            result = df.to_markdown()
-        else:
-            raise ValueError("Unknown serialization methods.")
-
-        if example_text and example_texts:
-            result += "\n\nExample texts for columns of TEXT datatype. Data-GPT is able to process these and to extract relevant information in structured form:\n" + \
-                "\n".join(f"Column '{k}': {v}" for k, v in example_texts.items())
-        return result
+    def serialize(self, df, datatypes, method="markdown", example_text=True, max_tokens=DEFAULT_MAX_TOKENS):
+        """Serializes a data frame within a token budget."""
+        return serialize_table(df, datatypes=datatypes, method=method, example_text=example_text,
+                               max_tokens=max_tokens)[0]
 
     def peek(self, table_name, *args, **kwargs):
         """Peeks at a table."""
         return self.peek_table(self.tables[table_name], *args, **kwargs)
 
+    @property
+    def connection(self):
+        """Persistent in-process DuckDB connection used for SQL steps."""
+        if self._connection is None:
+            self._connection = duckdb.connect()
+            try:
+                self._connection.execute("SET integer_division = true")  # SQLite semantics
+            except duckdb.Error:
+                logger.warning("DuckDB does not support integer_division; '/' uses float division.")
+        return self._connection
+
+    def _sync_registered_tables(self):
+        """Registers DataFrames as DuckDB views (zero-copy), only if they changed since the last query."""
+        if self._connection is None:
+            return
+        tables = self.tables
+        for name in list(self._registered):
+            if name not in tables:
+                self._connection.unregister(name)
+                del self._registered[name]
+        for name, table in tables.items():
+            df = table.data_frame
+            signature = (df, tuple(df.columns), len(df))
+            registered = self._registered.get(name)
+            if registered is None or registered[0] is not df or registered[1:] != signature[1:]:
+                self._connection.register(name, df)
+                self._registered[name] = signature
+
     def sql(self, result_name, query):
         """Executes an SQL query on the database."""
-        result = sqldf(query, {k: v.data_frame for k, v in self.tables.items()})
+        connection = self.connection
+        self._sync_registered_tables()
+        identifiers = set(self.tables) | {str(c) for t in self.tables.values() for c in t.data_frame.columns}
+        result = connection.execute(sqlite_to_duckdb(query, identifiers)).df()
         cols = []
         remove = False
         for c in result.columns:
@@ -1,35 +1,75 @@
+import numpy as np
 import pandas as pd
 
 
 class RelevantValueIndex():
     def __init__(self, n=5, padding=4):
-        self.map = None
-        self.values = set()
+        """Inverted index from hashed character n-grams to the values containing them.
+
+        N-grams are hashed to int64 keys. The index stores the sorted unique keys, and for each key an offset into a
+        posting array of value ids (sorted by key, then value id). Lookups are a binary search per query n-gram
+        followed by a vectorized count of the matched postings.
+        """
+        self.values = np.empty(0, dtype=object)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.postings = np.empty(0, dtype=np.int32)
         self.n = n
         self.padding = padding
 
     def build(self, values):
-        values = pd.Series(values)
-        self.map = pd.DataFrame({"values": values, "n-grams": values.map(self.get_n_grams)})
-        self.map = self.map.explode("n-grams")
-        self.map = self.map.groupby("n-grams").agg(list)
-        self.values = set(values)
+        self.values = np.asarray(pd.unique(pd.Series(values, dtype=object)), dtype=object)
+        hashes = []
+        value_ids = []
+        for i, value in enumerate(self.values):
+            n_grams = self._get_n_grams(value)
+            hashes.extend(hash(g) for g in n_grams)
+            value_ids.extend([i] * len(n_grams))
+        hashes = np.asarray(hashes, dtype=np.int64)
+        value_ids = np.asarray(value_ids, dtype=np.int32)
+
+        order = np.lexsort((value_ids, hashes))
+        hashes = hashes[order]
+        self.postings = value_ids[order]
+        self.keys, starts = np.unique(hashes, return_index=True)
+        self.offsets = np.append(starts, len(hashes)).astype(np.int64)
 
     def get_relevant_values(self, *keywords, num=10):
-        n_grams = self.get_n_grams(*keywords)
-        n_grams = [x for x in n_grams if x in self.map.index]
-        values = self.map.loc[n_grams]
-        values = values.explode("values")["values"].value_counts(sort=True).index
-        values = values[:num].tolist()
+        scores = self.score(*keywords)
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > num:
+            candidates = candidates[np.argpartition(-scores[candidates], num - 1)[:num]]
+        # Highest score first, ties broken by insertion order
+        candidates = candidates[np.lexsort((candidates, -scores[candidates]))]
+        values = self.values[candidates].tolist()
         values += self.get_remaining(values, num)
         return values
-    
+
+    def score(self, *keywords):
+        """Number of query n-grams shared with each value."""
+        query = np.fromiter((hash(g) for g in self.get_n_grams(*keywords)), dtype=np.int64)
+        positions = np.minimum(np.searchsorted(self.keys, query), max(len(self.keys) - 1, 0))
+        if len(self.keys) > 0:
+            positions = positions[self.keys[positions] == query]
+        else:
+            positions = positions[:0]
+        if len(positions) == 0:
+            return np.zeros(len(self.values), dtype=np.int64)
+        starts, ends = self.offsets[positions], self.offsets[positions + 1]
+        lengths = ends - starts
+        # Gather all matched postings at once: start of each run, plus the position inside the run
+        run_starts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        matched = self.postings[run_starts + np.arange(lengths.sum())]
+        return np.bincount(matched, minlength=len(self.values))
+
     def get_remaining(self, values, total_num):
-        values = set(values)
-        sample = list()
         num = total_num - len(values)
-        for element in self.values:
-            if element not in values:
+        if num <= 0:
+            return []
+        chosen = set(values)
+        sample = list()
+        for element in self.values[:num + len(chosen)]:
+            if element not in chosen:
                 sample.append(element)
             if len(sample) >= num:
                 break
@@ -40,7 +80,7 @@ class RelevantValueIndex():
         for k in keywords:
             result |= self._get_n_grams(k)
         return list(result)
-    
+
     def _get_n_grams(self, keyword):
         result = set()
         if pd.isna(keyword):
@@ -0,0 +1,67 @@
+import pandas as pd
+
+
+CHARS_PER_TOKEN = 4  # rough average for English text and GPT tokenizers
+DEFAULT_MAX_TOKENS = 1024
+MAX_EXAMPLE_TEXT_WORDS = 200
+MIN_VALUE_CHARS = 20
+EXAMPLE_TEXT_PREFIX = "\n\nExample texts for columns of TEXT datatype. Data-GPT is able to process these and to extract " \
+    "relevant information in structured form:\n"
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def serialize_table(df, datatypes, method="markdown", example_text=True, max_tokens=DEFAULT_MAX_TOKENS,
+                    max_rows=None, columns=None):
+    """Serializes a table for a prompt within a token budget.
+
+    Works on whole columns instead of rows. Rows are only taken while they fit into the budget, long values are
+    truncated and TEXT columns are masked. Returns the serialized table and the number of serialized rows.
+    """
+    if method not in ("key-value", "markdown"):
+        raise ValueError("Unknown serialization methods.")
+    columns = list(columns if columns is not None else df.columns)
+    budget = max_tokens * CHARS_PER_TOKEN
+    text_columns = [c for c, dt in zip(columns, datatypes) if dt == "TEXT"]
+
+    examples = ""
+    if example_text and text_columns and len(df):
+        examples = EXAMPLE_TEXT_PREFIX + "\n".join(
+            f"Column '{c}': " + " ".join(str(df[c].iloc[0]).split()[:MAX_EXAMPLE_TEXT_WORDS]) + " ..."
+            for c in text_columns)
+        examples = examples[:budget // 2]
+        budget -= len(examples)
+
+    # Every row costs at least its keys and separators, which bounds the rows worth converting
+    min_row_chars = sum(len(str(c)) + 5 for c in columns)
+    num_rows = min(len(df), max_rows if max_rows is not None else len(df), budget // max(min_row_chars, 1) + 1)
+    df = df.iloc[:num_rows]
+
+    value_chars = max(MIN_VALUE_CHARS, budget // max(len(columns), 1))
+    cells = {}
+    for c in columns:
+        if c in text_columns:
+            cells[c] = pd.Series("<TEXT>", index=df.index)
+            continue
+        values = df[c].astype(str)
+        cells[c] = values.where(values.str.len() <= value_chars, values.str.slice(0, value_chars - 3) + "...")
+
+    if method == "key-value":
+        parts = [f"{c}: " + cells[c] for c in columns]
+        rows = parts[0].str.cat(parts[1:], sep=" | ") if parts else pd.Series("", index=df.index)
+        num_rows = _num_rows_in_budget(rows.str.len() + 1, budget)
+        result = "\n".join(rows.iloc[:num_rows])
+    else:
+        row_lengths = sum(cells[c].str.len() + 3 for c in columns) if columns else pd.Series(0, index=df.index)
+        num_rows = _num_rows_in_budget(row_lengths, budget)
+        result = pd.DataFrame({c: cells[c].iloc[:num_rows] for c in columns}).to_markdown()
+    return result + examples, num_rows
+
+
+def _num_rows_in_budget(row_lengths, budget):
+    """Number of leading rows that fit into the budget, but at least one."""
+    if len(row_lengths) == 0:
+        return 0
+    return max(1, int((row_lengths.cumsum() <= budget).sum()))
@@ -0,0 +1,96 @@
+import re
+import sqlparse
+from sqlparse import tokens as T
+
+
+LIKE_PATTERN = re.compile(r"((?:NOT\s+)?)LIKE", re.IGNORECASE)
+STRFTIME_PATTERN = re.compile(r"\bstrftime\(\s*('(?:[^']|'')*')\s*,", re.IGNORECASE)
+NAME = r'(?:"((?:[^"]|"")*)"|(\w+))'
+# Output aliases (not the type of a CAST, which is followed by ')' or '(') and CTE names
+ALIAS_PATTERN = re.compile(r"\bAS\s+" + NAME + r"(?!\s*[()])", re.IGNORECASE)
+CTE_PATTERN = re.compile(NAME + r"\s*(?:\([^()]*\)\s*)?AS\s*\(", re.IGNORECASE)
+
+
+def defined_names(query):
+    """Names the query defines itself: output and table aliases (AS x) and common table expressions (x AS (...))."""
+    names = set()
+    for pattern in (ALIAS_PATTERN, CTE_PATTERN):
+        for quoted, bare in pattern.findall(query):
+            names.add(quoted.replace('""', '"') if quoted else bare)
+    return names
+
+
+def sqlite_to_duckdb(query, identifiers=()):
+    """Rewrites the SQLite dialect emitted by the planner into DuckDB SQL.
+
+    Handles the SQLite behaviors the planner relies on:
+     - LIKE is case-insensitive in SQLite, so it becomes ILIKE.
+     - Double-quoted strings that do not name a table, a column or an alias or CTE of the query are string literals
+       in SQLite.
+     - strftime(format, value) takes its arguments in the reverse order in DuckDB.
+    Integer division is handled by the connection setting (see Database).
+
+    >>> print(sqlite_to_duckdb('SELECT year, COUNT(*) AS "num" FROM movies WHERE genre LIKE "drama" '
+    ...                  'GROUP BY year ORDER BY "num" DESC', {"movies", "year", "genre"}))
+    SELECT year, COUNT(*) AS "num" FROM movies WHERE genre ILIKE 'drama' GROUP BY year ORDER BY "num" DESC
+    >>> print(sqlite_to_duckdb('WITH "recent" AS (SELECT * FROM movies) SELECT strftime("%Y", date) FROM "recent"',
+    ...                  {"movies", "date"}))
+    WITH "recent" AS (SELECT * FROM movies) SELECT strftime(CAST(date AS TIMESTAMP), '%Y') FROM "recent"
+    """
+    identifiers = {i.lower() for i in identifiers} | {n.lower() for n in defined_names(query)}
+    result = []
+    for token in sqlparse.parse(query)[0].flatten():
+        value = token.value
+        if (token.is_keyword or token.ttype in T.Operator.Comparison) and LIKE_PATTERN.fullmatch(value):
+            value = LIKE_PATTERN.sub(r"\1ILIKE", value)
+        elif token.ttype in T.Literal.String.Symbol and value.startswith('"'):
+            name = value[1:-1]
+            if name.lower() not in identifiers:
+                value = "'" + name.replace("'", "''") + "'"
+        result.append(value)
+    query = "".join(result)
+    return rewrite_strftime(query)
+
+
+def _argument_end(query, start):
+    """Index of the ',' or ')' ending the function argument starting at start, skipping nested calls and strings."""
+    depth = 0
+    quote = None
+    for i in range(start, len(query)):
+        char = query[i]
+        if quote is not None:
+            if char == quote:
+                quote = None  # an escaped quote ('') re-opens right away
+        elif char in "'\"":
+            quote = char
+        elif char == "(":
+            depth += 1
+        elif char == ")":
+            if depth == 0:
+                return i
+            depth -= 1
+        elif char == "," and depth == 0:
+            return i
+    return None
+
+
+def rewrite_strftime(query):
+    """Rewrites SQLite's strftime(format, value) into DuckDB's strftime(CAST(value AS TIMESTAMP), format).
+
+    The value may contain nested calls (including strftime itself). Calls with modifiers (more than two arguments)
+    have no DuckDB equivalent and are left unchanged.
+    """
+    result = []
+    pos = 0
+    while (match := STRFTIME_PATTERN.search(query, pos)) is not None:
+        end = _argument_end(query, match.end())
+        if end is None or query[end] != ")":
+            result.append(query[pos:match.end()])
+            pos = match.end()
+            continue
+        value = rewrite_strftime(query[match.end():end].strip())
+        result.append(query[pos:match.start()])
+        result.append(f"strftime(CAST({value} AS TIMESTAMP), {match.group(1)})")
+        pos = end + 1
+    result.append(query[pos:])
+    return "".join(result)
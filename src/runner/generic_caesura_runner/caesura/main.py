@@ -1,4 +1,6 @@
+from collections import defaultdict
 from pathlib import Path
+import time
 import langchain
 import logging
 from caesura.model import MyOpenAI
@@ -6,6 +8,7 @@ from caesura.phases import PlanningPhase, DiscoveryPhase, MappingPhase, MappingP
 from langchain.cache import SQLiteCache
 from caesura.phases.base_phase import PhaseList
 from caesura.phases.runner import RunnerPhase
+from caesura.plan_cache import PLAN_CACHE_PATH, PlanCache
 from caesura.scenarios import get_database
 from caesura.tools import ImageSelectTool, SqlTool, TransformTool, VisualQATool, PlottingTool
 from caesura.tools.noop import NoopTool
@@ -27,7 +30,8 @@ MAX_NUM_ERRORS = {
 }
 
 class Caesura():
-    def __init__(self, database, model_name="gpt-3.5-turbo-0613", interactive=True, log_path=None):
+    def __init__(self, database, model_name="gpt-3.5-turbo-0613", interactive=True, log_path=None,
+                 use_plan_cache=False, plan_cache_path=None):
         self.database = database
         self.interactive = interactive
         self.working_memory = dict()
@@ -39,6 +43,9 @@ class Caesura():
         self.log_path = log_path
         self.file_handler = None
         self.last_result = None
+        self.plan_cache = PlanCache(plan_cache_path or PLAN_CACHE_PATH) if use_plan_cache else None
+        self.plan_cache_hit = False
+        self.phase_times = defaultdict(float)
 
         # setup
         self.setup_logging()
@@ -57,6 +64,10 @@ class Caesura():
             logging.root.addHandler(self.file_handler)
 
     def setup_tools(self):
+        # Models are shared via the model registry, so re-creating the tools
+        # does not reload them from disk.
+        for tool in self.tools:
+            tool.close()
         self.tools = list()
         self.tools.append(ImageSelectTool(self.database))
         self.tools.append(VisualQATool(self.database))
@@ -74,7 +85,8 @@ class Caesura():
             PlanningPhase(llm=self.llm, database=self.database, max_num_errors=self.max_num_errors),
             MappingPhase(llm=self.llm, database=self.database, max_num_errors=self.max_num_errors),
             RunnerPhase(llm=self.llm, database=self.database, max_num_errors=self.max_num_errors),
-            reset_on_error=True
+            reset_on_error=True,
+            phase_times=self.phase_times
         )
 
     def run(self, query):
@@ -86,7 +98,17 @@ class Caesura():
         
         # Reset token usage at start of query
         self.llm.reset_token_usage()
-        
+        self.phase_times.clear()
+        self.plan_cache_hit = False
+
+        cache_key = None
+        if self.plan_cache is not None:
+            cache_key = self.plan_cache.make_key(query, self.database, self.llm.model_name)
+            final_plan = self.run_cached_plan(cache_key)
+            if final_plan is not None:
+                self.log_final_plan(query, final_plan, self.last_result)
+                return
+
         while num_tries < self.max_num_tries:
             try:
                 final_plan = self.phases.run(query=query, tools=self.tools)
@@ -109,7 +131,33 @@ class Caesura():
             if self.interactive:
                 raise error
             return
+        if self.plan_cache is not None and final_plan is not None:
+            self.plan_cache.save(cache_key, query, self.llm.model_name, final_plan)
         self.log_final_plan(query, final_plan, final_result)
+
+    def run_cached_plan(self, cache_key):
+        """Executes a cached plan, skipping discovery, planning and mapping. Returns None if there is none or it fails."""
+        start_time = time.time()
+        plan = self.plan_cache.load(cache_key, self.tools, self.database)
+        self.phase_times["PlanCache"] += time.time() - start_time
+        if plan is None:
+            return None
+
+        start_time = time.time()
+        try:
+            RunnerPhase(llm=self.llm, database=self.database, max_num_errors=self.max_num_errors).run_plan(plan)
+        except Exception as e:
+            logger.warning(f"Cached plan failed, planning from scratch: {e}")
+            self.plan_cache.invalidate(cache_key)
+            self.database.clear_working_set()
+            return None
+        finally:
+            self.phase_times[RunnerPhase.__name__] += time.time() - start_time
+
+        self.plan_cache_hit = True
+        self.last_result = self.database.final_result()
+        self.database.clear_working_set()
+        return plan
     
     def get_final_result(self):
         """Get the final result from the last query execution."""
@@ -119,6 +167,15 @@ class Caesura():
         """Get token usage from the LLM."""
         return self.llm.get_token_usage()
     
+    def get_timings(self):
+        """Seconds spent planning (discovery, planning, mapping or plan cache lookup) and executing the last query."""
+        execution_time = self.phase_times.get(RunnerPhase.__name__, 0.0)
+        return {
+            "planning_seconds": sum(self.phase_times.values()) - execution_time,
+            "execution_seconds": execution_time,
+            "plan_cache_hit": self.plan_cache_hit,
+        }
+
     def reset_for_new_query(self):
         """Reset the agent state for a new query execution."""
         # Reset phases
@@ -129,6 +186,8 @@ class Caesura():
         self.database.clear_working_set()
         # Reset token usage
         self.llm.reset_token_usage()
+        # Reset throughput statistics of chunked tools
+        self.database.tool_stats = list()
 
     def restart_after_error(self, e):
         logger.warning(e, exc_info=True)
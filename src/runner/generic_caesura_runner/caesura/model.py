@@ -5,7 +5,6 @@ import logging
 from typing import Any
 from openai import Completion
 from langchain.chat_models import ChatOpenAI
-from langchain.prompts.chat import ChatPromptTemplate
 
 
 logger = logging.getLogger(__name__)
@@ -30,6 +29,8 @@ MAX_NUM_TOKENS_HARD = {
     "gpt-4-0613": 8_192 - 1024
 }
 
+TOKENS_PER_MESSAGE = 4  # role and separators of a chat message
+
 MULTIPLIER = 0.5
 REDUCE_MULTIPLIER = False
 
@@ -72,16 +73,23 @@ class MyOpenAI(ChatOpenAI):
 
             self.client = MyClient(self.client, self)
 
-        num_tokens = self.get_prompt_len(prompts)
+        # Tokenize every message once and shorten the prompt based on these counts
+        message_lens = [self.get_num_tokens(p.content) + TOKENS_PER_MESSAGE for p in prompts]
+        num_tokens = sum(message_lens) + 100
         while num_tokens > self.max_num_tokens_soft and len(prompts) > 3:
             prompts = prompts[:2] + prompts[3:]
-            num_tokens = self.get_prompt_len(prompts)
+            num_tokens -= message_lens.pop(2)
 
+        # Tokens per character vary, so the first message is re-measured after every cut
         while num_tokens > self.max_num_tokens_hard:
-                prompts[0].content = prompts[0].content[100:]
-                if prompts[0].content == "":
-                    raise ValueError("Prompt too long. No more possibility to shorten it. Abort!")
-                num_tokens = self.get_prompt_len(prompts)
+            content = prompts[0].content
+            excess_chars = int(len(content) * (num_tokens - self.max_num_tokens_hard) / max(message_lens[0], 1)) + 1
+            prompts[0].content = content[excess_chars:]
+            if prompts[0].content == "":
+                raise ValueError("Prompt too long. No more possibility to shorten it. Abort!")
+            first_len = self.get_num_tokens(prompts[0].content) + TOKENS_PER_MESSAGE
+            num_tokens += first_len - message_lens[0]
+            message_lens[0] = first_len
 
         current_call = time.time()
         delta = current_call - self.last_call
@@ -121,9 +129,6 @@ class MyOpenAI(ChatOpenAI):
         self.last_call = current_call
         return result
 
-    def get_prompt_len(self, prompts):
-        return self.get_num_tokens(ChatPromptTemplate.from_messages(prompts).format()) + 100
-
 
 class MyClient(Completion):
     def __init__(self, client, llm):
@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+from collections import defaultdict
 from copy import copy
 import logging
+import time
 
 from caesura.observations import ExecutionError, Observation, PlanFinished
 
@@ -97,12 +99,14 @@ class EndPhase():
 
 
 class PhaseList():
-    def __init__(self, *phases, reset_on_error=True):
+    def __init__(self, *phases, reset_on_error=True, phase_times=None):
+        """phase_times accumulates the seconds spent in each phase, keyed by the phase class name."""
         for i, p in enumerate(phases):
             p.previous = phases[i - 1] if i - 1 > -1 else None
             p.next = phases[i + 1] if i + 1 < len(phases) else EndPhase(p)
         self.current_phase = phases[0]
         self.reset_on_error = reset_on_error
+        self.phase_times = phase_times if phase_times is not None else defaultdict(float)
 
     def get_next_phase(self, proceed_to_next_phase=True):
         if proceed_to_next_phase:
@@ -122,6 +126,7 @@ class PhaseList():
         state["step_nr"] = 1
         proceed_to_next_phase = False
         while (phase := self.get_next_phase(proceed_to_next_phase)) != None:
+            start_time = time.time()
             try:
                 result = phase.run(**state)
                 state.update(result)
@@ -141,3 +146,5 @@ class PhaseList():
                 state["step_nr"] += 1
                 self.collect_observation(o)
                 proceed_to_next_phase = False
+            finally:
+                self.phase_times[type(phase).__name__] += time.time() - start_time
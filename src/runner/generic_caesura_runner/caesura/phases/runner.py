@@ -1,10 +1,26 @@
+import logging
 from caesura.phases.base_phase import Phase
 from caesura.observations import Observation, ExecutionError
 
 
+logger = logging.getLogger(__name__)
+
 class RunnerPhase(Phase):
     is_step_by_step = True
 
+    def run_plan(self, plan):
+        """Executes all steps of an already mapped plan, without any LLM calls. Raises the first ExecutionError."""
+        for step_nr, step in enumerate(plan, start=1):
+            if not step.tool_execs:
+                raise ExecutionError(description=f"Step {step_nr} has no tool calls.")
+            try:
+                self.execute(step_nr, step)
+            except Observation as o:
+                # Steps end with an Observation; only errors (a subclass) abort the plan
+                if isinstance(o, ExecutionError):
+                    raise
+                logger.info(o)
+
     def execute(self, step_nr, step, **kwargs):
         observation = None
         for i, call in enumerate(step.tool_execs):
@@ -17,6 +17,20 @@ class Plan(list):
     def without_tools(self):
         return self.__str__(without_tools=True)
 
+    def to_dict(self):
+        return [step.to_dict() for step in self]
+
+    @staticmethod
+    def from_dict(steps, tools, available_tables):
+        """Rebuilds a plan with its tool calls. Raises ExecutionError if it does not fit the current tables or tools."""
+        available_tables = set(available_tables)
+        result = Plan()
+        for s in steps:
+            result.append(PlanStep.from_dict(s, tools, available_tables))
+            if result[-1].output_table is not None:
+                available_tables.add(result[-1].output_table)
+        return result
+
 
 class PlanStep():
     def __init__(self, description, available_tables):
@@ -84,6 +98,30 @@ class PlanStep():
     def get_step_prompt(self):
         return self.__str__(without_tools=True, without_output=True)
 
+    def to_dict(self):
+        return {
+            "description": self.description,
+            "input_tables": self.input_tables,
+            "output_table": self.output_table,
+            "new_columns": self.new_columns,
+            "tool_execs": [{"tool": call.tool.name, "args": list(call.args)} for call in self.tool_execs],
+        }
+
+    @staticmethod
+    def from_dict(step, tools, available_tables):
+        tools = {t.name: t for t in tools}
+        result = PlanStep(step["description"], available_tables=available_tables)
+        result.set_input(step["input_tables"])
+        result.set_output(step["output_table"])
+        result.set_new_columns(step["new_columns"])
+        tool_execs = ToolExecutions()
+        for call in step["tool_execs"]:
+            if call["tool"] not in tools:
+                raise ExecutionError(description=f"Tool {call['tool']} does not exist.")
+            tool_execs.append(ToolExecution(tools[call["tool"]], tuple(call["args"])))
+        result.set_tool_calls(tool_execs)
+        return result
+
 
 class ToolExecutions(list):
     def __str__(self):
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import uuid
+
+from caesura.observations import ExecutionError
+from caesura.plan import Plan
+
+
+logger = logging.getLogger(__name__)
+
+PLAN_CACHE_PATH = Path(".plan_cache/")
+
+
+def normalize_query(query):
+    """Lower-cases the query and collapses whitespace and trailing punctuation."""
+    return re.sub(r"\s+", " ", query).strip().strip(".?!").strip().lower()
+
+
+class PlanCache():
+    def __init__(self, path=PLAN_CACHE_PATH):
+        """Stores validated final plans (including tool calls) on disk.
+
+        Entries are keyed by the normalized query, a hash of the database description and the model name, so plans
+        are only re-used for the same question over the same schema.
+        """
+        self.path = Path(path)
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, query, database, model_name):
+        schema_hash = hashlib.sha1(database.describe().encode("utf-8")).hexdigest()
+        key = json.dumps([normalize_query(query), schema_hash, model_name])
+        return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+    def entry_path(self, key):
+        return self.path / f"{key}.json"
+
+    def load(self, key, tools, database):
+        """Returns the cached plan, or None if there is none or it does not fit the current tables and tools."""
+        path = self.entry_path(key)
+        if not path.exists():
+            self.misses += 1
+            return None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            plan = Plan.from_dict(entry["plan"], tools, database.tables.keys())
+        except (OSError, ValueError, KeyError, ExecutionError) as e:
+            logger.warning(f"Ignoring invalid plan cache entry {path}: {e}")
+            self.invalidate(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.info(f"Plan cache hit for query: {entry['query']}")
+        return plan
+
+    def save(self, key, query, model_name, plan):
+        entry = {"query": query, "model": model_name, "plan": plan.to_dict()}
+        try:
+            self.path.mkdir(exist_ok=True, parents=True)
+            tmp_path = self.path / f"{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f, indent=2)
+            os.replace(tmp_path, self.entry_path(key))
+        except OSError as e:
+            logger.warning(f"Could not write plan cache entry: {e}")
+
+    def invalidate(self, key):
+        self.entry_path(key).unlink(missing_ok=True)
@@ -0,0 +1,98 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_STORE_PATH = Path(".image_embeddings/")
+HASH_CHUNK_SIZE = 1 << 20
+SQLITE_MAX_VARIABLES = 900
+
+
+def file_content_hash(path):
+    """SHA-1 of the file contents, so copies of an image under another path or scale factor share one embedding."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ImageEmbeddingStore():
+    def __init__(self, model_name, path=EMBEDDING_STORE_PATH):
+        """Persistent image embeddings and image-text scores of one model, keyed by image content hash.
+
+        Content hashes are memoized per (path, mtime, size), so unchanged files are not re-read on every ingestion.
+        """
+        path = Path(path)
+        path.mkdir(exist_ok=True, parents=True)
+        self.db_path = path / (model_name.replace("/", "--") + ".sqlite")
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(self.db_path, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, embedding BLOB)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS file_hashes (file_key TEXT PRIMARY KEY, hash TEXT)")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS scores "
+                                    "(query TEXT, hash TEXT, score REAL, PRIMARY KEY (query, hash))")
+
+    def content_hashes(self, paths):
+        """Returns a dict from path to content hash."""
+        file_keys = {}
+        for p in paths:
+            stat = os.stat(p)
+            file_keys[p] = f"{os.path.abspath(p)}:{stat.st_mtime_ns}:{stat.st_size}"
+        known = dict(self._select("file_hashes", "file_key", "hash", list(file_keys.values())))
+
+        result = {}
+        new_rows = []
+        for p, file_key in file_keys.items():
+            if file_key not in known:
+                known[file_key] = file_content_hash(p)
+                new_rows.append((file_key, known[file_key]))
+            result[p] = known[file_key]
+        if new_rows:
+            with self.lock, self.connection:
+                self.connection.executemany("INSERT OR REPLACE INTO file_hashes VALUES (?, ?)", new_rows)
+        return result
+
+    def get_many(self, hashes):
+        """Returns a dict from content hash to embedding for all stored hashes."""
+        return {h: np.frombuffer(e, dtype=np.float32)
+                for h, e in self._select("embeddings", "hash", "embedding", list(hashes))}
+
+    def put_many(self, embeddings):
+        """Stores a dict from content hash to embedding."""
+        rows = [(h, np.asarray(e, dtype=np.float32).tobytes()) for h, e in embeddings.items()]
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?)", rows)
+
+    def get_scores(self, query, hashes):
+        """Returns a dict from content hash to the stored score of the image for the query text."""
+        return dict(self._select("scores", "hash", "score", list(hashes), query=query))
+
+    def put_scores(self, query, scores):
+        """Stores a dict from content hash to the score of the image for the query text."""
+        with self.lock, self.connection:
+            self.connection.executemany("INSERT OR REPLACE INTO scores VALUES (?, ?, ?)",
+                                        [(query, h, float(s)) for h, s in scores.items()])
+
+    def _select(self, table, key_column, value_column, keys, query=None):
+        result = []
+        condition = "" if query is None else "query = ? AND "
+        with self.lock:
+            for i in range(0, len(keys), SQLITE_MAX_VARIABLES):
+                chunk = keys[i: i + SQLITE_MAX_VARIABLES]
+                placeholders = ", ".join("?" * len(chunk))
+                result += self.connection.execute(
+                    f"SELECT {key_column}, {value_column} FROM {table} "
+                    f"WHERE {condition}{key_column} IN ({placeholders})",
+                    ([query] if query is not None else []) + chunk).fetchall()
+        return result
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,69 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import logging
+import os
+from pathlib import Path
+import uuid
+from PIL import Image, ImageFile
+
+
+logger = logging.getLogger(__name__)
+
+Image.MAX_IMAGE_PIXELS = None
+ImageFile.LOAD_TRUNCATED_IMAGES = True
+THUMBNAIL_PATH = Path(".thumbnails/")
+THUMBNAIL_MAX_SIZE = 768  # BLIP works on 384x384 inputs, so this keeps enough detail
+NUM_DECODE_WORKERS = 4
+MAX_PREFETCHED_BATCHES = 4
+
+
+def get_thumbnail_path(image_path, max_size=THUMBNAIL_MAX_SIZE):
+    """Returns the cache location of the thumbnail. The key covers path and mtime, so edited images are re-decoded."""
+    stat = os.stat(image_path)
+    key = f"{os.path.abspath(image_path)}:{stat.st_mtime_ns}:{stat.st_size}:{max_size}"
+    return THUMBNAIL_PATH / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".jpg")
+
+
+def load_thumbnail(image_path, max_size=THUMBNAIL_MAX_SIZE):
+    """Loads a resized RGB version of the image, from the on-disk cache if possible."""
+    cache_path = get_thumbnail_path(image_path, max_size)
+    if cache_path.exists():
+        with Image.open(cache_path) as image:
+            return image.convert("RGB")
+
+    with Image.open(image_path) as image:
+        image.draft("RGB", (max_size, max_size))  # lets JPEG decode at reduced resolution
+        image = image.convert("RGB")
+    image.thumbnail((max_size, max_size))
+    try:
+        THUMBNAIL_PATH.mkdir(exist_ok=True)
+        tmp_path = cache_path.with_name(f"{uuid.uuid4().hex}.tmp.jpg")
+        image.save(tmp_path, quality=95)
+        os.replace(tmp_path, cache_path)
+    except OSError as e:
+        logger.warning(f"Could not cache thumbnail for {image_path}: {e}")
+    return image
+
+
+def prefetch_batches(image_paths, batch_size, preprocess, num_workers=NUM_DECODE_WORKERS,
+                     max_prefetch=MAX_PREFETCHED_BATCHES, max_size=THUMBNAIL_MAX_SIZE):
+    """Decodes, resizes and preprocesses batches of images in background threads.
+
+    Yields (batch_paths, preprocess(images)) in the original order. At most max_prefetch batches are in flight,
+    which bounds memory while the caller runs model inference on the current batch.
+    """
+    batches = [image_paths[i: i + batch_size] for i in range(0, len(image_paths), batch_size)]
+
+    def load_batch(paths):
+        return preprocess([load_thumbnail(p, max_size) for p in paths])
+
+    with ThreadPoolExecutor(num_workers) as pool:
+        pending = deque()
+        next_batch = 0
+        while next_batch < len(batches) or pending:
+            while next_batch < len(batches) and len(pending) < max_prefetch:
+                pending.append((batches[next_batch], pool.submit(load_batch, batches[next_batch])))
+                next_batch += 1
+            paths, future = pending.popleft()
+            yield paths, future.result()
@@ -1,22 +1,35 @@
-from contextlib import ExitStack
-import requests
-from PIL import Image
+import torch
 from transformers import BlipProcessor, BlipForQuestionAnswering
 
+from caesura.tools.backend.image_loader import prefetch_batches
+from runner.model_registry import MODEL_REGISTRY
+
+MODEL_NAME = "Salesforce/blip-vqa-base"
+MODEL_KEY = ("blip-vqa", MODEL_NAME)
+
+
+def load_model():
+    return (BlipForQuestionAnswering.from_pretrained(MODEL_NAME),
+            BlipProcessor.from_pretrained(MODEL_NAME))
+
 
 class VisualQA():
     def __init__(self):
-        self.model = BlipForQuestionAnswering.from_pretrained("Salesforce/blip-vqa-base")
-        self.processor = BlipProcessor.from_pretrained("Salesforce/blip-vqa-base")
+        self.model, self.processor = MODEL_REGISTRY.acquire(MODEL_KEY, load_model)
+
+    def close(self):
+        """Release the shared model."""
+        MODEL_REGISTRY.release(MODEL_KEY)
 
     def extract(self, image_paths: str, query: str, batch_size:int = 10):
-        """Retrieves images from the database."""
+        """Answers the question for each image. Images are decoded in the background while the model runs."""
         results = []
-        for i in range(0, len(image_paths), batch_size):
-            with ExitStack() as stack:
-                images = [stack.enter_context(Image.open(image_path)) for image_path in image_paths[i: i + batch_size]]
-                inputs = self.processor(images=images, text=query, return_tensors="pt", padding=True)
-                outputs = self.model.generate(**inputs, max_length=20)
 
+        def preprocess(images):
+            return self.processor(images=images, text=query, return_tensors="pt", padding=True)
+
+        with torch.inference_mode():
+            for _, inputs in prefetch_batches(image_paths, batch_size, preprocess):
+                outputs = self.model.generate(**inputs, max_length=20)
                 results.extend([self.processor.decode(o, skip_special_tokens=True) for o in outputs])
         return results
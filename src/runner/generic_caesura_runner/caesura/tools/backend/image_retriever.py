@@ -1,4 +1,4 @@
-from contextlib import ExitStack, contextmanager
+import time
 from PIL import Image
 from transformers import AutoProcessor, BlipForImageTextRetrieval
 import chromadb
@@ -6,32 +6,45 @@ from chromadb.config import Settings
 import torch
 from tqdm import tqdm
 from torch.nn.functional import normalize
-import uuid
 from pathlib import Path
-from caesura.database.table import Table
 
+from caesura.tools.backend.embedding_store import ImageEmbeddingStore
+from caesura.tools.backend.image_loader import prefetch_batches
 from caesura.utils import get_paths_from_images
-import numpy as np
 import logging
 from PIL import ImageFile
-import concurrent
+
+from runner.model_registry import MODEL_REGISTRY
 
 
 logger = logging.getLogger(__name__)
 
 Image.MAX_IMAGE_PIXELS = None
 CHROMADB_PATH = Path(".chromadb/")
-IMAGE_PATH = Path(".images/")
-IMAGE_MAX_PIXELS = 20_000_000
+INGEST_BATCH_SIZE = 32
+CHROMADB_ADD_BATCH_SIZE = 1000
 ImageFile.LOAD_TRUNCATED_IMAGES = True
+MODEL_NAME = "Salesforce/blip-itm-base-coco"
+MODEL_KEY = ("blip-itm", MODEL_NAME)
+
+
+def load_model():
+    return (BlipForImageTextRetrieval.from_pretrained(MODEL_NAME),
+            AutoProcessor.from_pretrained(MODEL_NAME))
 
 
 class ImageRetriever():
     def __init__(self, init_db=True):
-        self.model = BlipForImageTextRetrieval.from_pretrained("Salesforce/blip-itm-base-coco")
-        self.processor = AutoProcessor.from_pretrained("Salesforce/blip-itm-base-coco")
+        self.model, self.processor = MODEL_REGISTRY.acquire(MODEL_KEY, load_model)
         self.index = dict()
         self.client = None
+        self.store = ImageEmbeddingStore(MODEL_NAME)
+        self.last_ingest_stats = {}
+
+    def close(self):
+        """Release the shared model."""
+        MODEL_REGISTRY.release(MODEL_KEY)
+        self.store.close()
 
     def setup_index(self, table, column):
         """Setup chromadb index."""
@@ -40,7 +53,8 @@ class ImageRetriever():
                 chroma_db_impl="duckdb+parquet",
                 persist_directory=str(CHROMADB_PATH),
             ))
-        collection_name = f"ir-{table.name}-{column}-{len(table.data_frame[column])}"
+        # Not tied to the row count: a larger scale factor only adds its new images to the collection
+        collection_name = f"ir-{table.name}-{column}"
         try:
             self.index[column] = self.client.create_collection(collection_name)
         except ValueError:  # collection already exists
@@ -64,87 +78,93 @@ class ImageRetriever():
         downsized_paths = result["documents"][0]
         image_paths = result["ids"][0]
 
-        result = []
-        for i in range(0, len(image_paths), batch_size):
-            with ExitStack() as stack:
-                images = [stack.enter_context(Image.open(p)) for p in downsized_paths[i: i + batch_size]]
-                inputs = self.processor(images=images, text=query, return_tensors="pt")
-                outputs = self.model(**inputs, use_itm_head=True)
+        # ITM scores only depend on the (query, image) pair, so pairs scored before are not run through the model
+        hashes = self.store.content_hashes(downsized_paths)
+        scores = self.store.get_scores(query, set(hashes.values()))
+        new_paths = list({h: p for p, h in hashes.items() if h not in scores}.values())
 
-                distance = outputs.itm_score[:, 0].view(-1)
-                # sort images by distance
-                distance, indices = distance.view(-1).sort(dim=-1, descending=False)
-                result += [image_paths[i + j] for j in indices.tolist() if distance[j] < threshold]
-        return result
-
-    def on_ingest(self, table, start_index, end_index, batch_size=100, num_processes=50):
-        """Called when a new data is ingested."""
-        with torch.no_grad():
-            for col in table.get_columns():
-                if table.get_datatype_for_column(col) == "IMAGE":
-                    self.setup_index(table, col)
-
-                    values = table.get_values(col)
-                    images = get_paths_from_images(values)
-                    ingested_images = set(self.index[col].get()["ids"])
-                    images = [i for i in images if i not in ingested_images]
-                    batches = [(images[i: i + batch_size], table, col) for i in range(0, len(images), batch_size)]
-                    with tqdm(total=len(batches)) as pbar:
-                        with concurrent.futures.ThreadPoolExecutor(num_processes) as pool:
-                            futures = [pool.submit(self.ingest_batch, batch) for batch in batches]
-                            for future in concurrent.futures.as_completed(futures):
-                                result = future.result()
-                                pbar.update(1)
-                                self.index[col].add(**result)
-
-
-    def ingest_batch(self, batch):
-        batch, table, col = batch
-        return self.get_visual_embeddings(batch, table_name=table.name, column=col)
-
-    @contextmanager
-    def load_images(self, image_paths):
-        """Loads images from the database. If the image is too large, it is down-sampled."""
-        IMAGE_PATH.mkdir(exist_ok=True)
-        result_images = []
-        result_paths = []
-        with ExitStack() as stack:
-            for path in image_paths:
-                image = stack.enter_context(Image.open(path))
-                if np.prod(image.size) > IMAGE_MAX_PIXELS:
-                    ratio = np.sqrt(IMAGE_MAX_PIXELS / np.prod(image.size))
-                    image.thumbnail((int(image.size[0] * ratio), int(image.size[1] * ratio)))
-                # store image in cache directory
-                name = uuid.uuid4().hex + ".png"
-                try:
-                    image.convert('RGB').save(IMAGE_PATH / name)
-                    result_paths.append(str(IMAGE_PATH / name))
-                    result_images.append(image)
-                except Exception as e:
-                    logger.warning(str(e))
-                    pass
-            yield result_images, result_paths
-
-    def get_visual_embeddings(self, image_paths, table_name, column):
-        """Return embeddings for images.
-        
-        Args:
-            image_paths (list): list of image paths
-            table_name (str): name of table
-            column (str): name of column
-        Returns:
-            embeddings for images and metadata to be stored in chromadb.
+        def preprocess(images):
+            return self.processor(images=images, text=query, return_tensors="pt")
+
+        with torch.inference_mode():
+            for paths, inputs in prefetch_batches(new_paths, batch_size, preprocess):
+                outputs = self.model(**inputs, use_itm_head=True)
+                batch_scores = {hashes[p]: s for p, s in zip(paths, outputs.itm_score[:, 0].view(-1).tolist())}
+                self.store.put_scores(query, batch_scores)
+                scores.update(batch_scores)
+        logger.info(f"Image select scored {len(new_paths)} of {len(downsized_paths)} candidates, "
+                    f"{len(downsized_paths) - len(new_paths)} from the score cache.")
+
+        # sort images by distance
+        distances = [scores[hashes[p]] for p in downsized_paths]
+        order = sorted(range(len(image_paths)), key=lambda i: distances[i])
+        return [image_paths[i] for i in order if distances[i] < threshold]
+
+    def on_ingest(self, table, start_index, end_index, batch_size=INGEST_BATCH_SIZE):
+        """Called when a new data is ingested.
+
+        Embeddings are looked up by image content in the persistent store, so only images never seen before are
+        embedded. These are decoded in background threads while the model embeds the previous batch.
         """
-        with self.load_images(image_paths) as (batch_images, downsized_paths):
-            inputs = self.processor(images=batch_images, return_tensors="pt")
-            outputs = self.model.vision_model(**inputs)[0]
-            image_feat = normalize(self.model.vision_proj(outputs[:, 0, :]), dim=-1)
-            return dict(
-                embeddings=image_feat.tolist(),
-                documents=downsized_paths,
-                metadatas=[{"table": table_name, "column": column} for _ in range(len(image_paths))],
-                ids=image_paths
-            )
+        for col in table.get_columns():
+            if table.get_datatype_for_column(col) == "IMAGE":
+                self.setup_index(table, col)
+                collection = self.index[col]
+
+                images = list(dict.fromkeys(get_paths_from_images(table.get_values(col))))
+                ingested_images = set(collection.get()["ids"])
+                stale_images = list(ingested_images - set(images))
+                if stale_images:
+                    collection.delete(ids=stale_images)
+                images = [i for i in images if i not in ingested_images]
+                if not images:
+                    continue
+
+                start_time = time.time()
+                hashes = self.store.content_hashes(images)
+                embeddings = self.store.get_many(set(hashes.values()))
+                # One representative path per unseen content hash
+                new_images = list({h: p for p, h in hashes.items() if h not in embeddings}.values())
+                self.embed_new_images(new_images, hashes, embeddings, batch_size)
+
+                for i in range(0, len(images), CHROMADB_ADD_BATCH_SIZE):
+                    batch = images[i: i + CHROMADB_ADD_BATCH_SIZE]
+                    collection.add(
+                        embeddings=[embeddings[hashes[p]].tolist() for p in batch],
+                        documents=batch,
+                        metadatas=[{"table": table.name, "column": col} for _ in batch],
+                        ids=batch,
+                    )
+                elapsed = time.time() - start_time
+                self.last_ingest_stats = {
+                    "table": table.name, "column": col, "images": len(images), "embedded": len(new_images),
+                    "seconds": round(elapsed, 3), "images_per_second": round(len(images) / max(elapsed, 1e-9), 3),
+                }
+                logger.info(f"Ingested {len(images)} images of {table.name}.{col} ({len(new_images)} embedded) "
+                            f"in {elapsed:.2f}s ({self.last_ingest_stats['images_per_second']:.2f} images/s)")
+
+    def embed_new_images(self, image_paths, hashes, embeddings, batch_size=INGEST_BATCH_SIZE):
+        """Embeds the images in one batched inference loop and adds them to the store and the embeddings dict."""
+        def preprocess(images):
+            return self.processor(images=images, return_tensors="pt")
+
+        start_time = time.time()
+        with torch.inference_mode(), tqdm(total=len(image_paths)) as pbar:
+            for paths, inputs in prefetch_batches(image_paths, batch_size, preprocess):
+                image_feat = self.get_visual_embeddings(inputs).cpu().numpy()
+                batch_embeddings = {hashes[p]: e for p, e in zip(paths, image_feat)}
+                self.store.put_many(batch_embeddings)
+                embeddings.update(batch_embeddings)
+                pbar.update(len(paths))
+        if image_paths:
+            elapsed = time.time() - start_time
+            logger.info(f"Embedded {len(image_paths)} new images in {elapsed:.2f}s "
+                        f"({len(image_paths) / max(elapsed, 1e-9):.2f} images/s)")
+
+    def get_visual_embeddings(self, inputs):
+        """Return normalized embeddings for preprocessed images."""
+        outputs = self.model.vision_model(pixel_values=inputs["pixel_values"])[0]
+        return normalize(self.model.vision_proj(outputs[:, 0, :]), dim=-1)
 
     def get_text_embeddings(self, query):
         """Return embeddings for text.
@@ -1,54 +1,91 @@
+import logging
+import psutil
 import torch
 from typing import List
 from transformers import AutoTokenizer, BartForQuestionAnswering
-BATCH_SIZE = 2
 
+from runner.model_registry import MODEL_REGISTRY
+
+MODEL_NAME = "valhalla/bart-large-finetuned-squadv1"
+MODEL_KEY = ("bart-qa", MODEL_NAME)
+MAX_BATCH_SIZE = 64
+MAX_SEQUENCE_LENGTH = 1024
+MEMORY_FRACTION = 0.5  # share of the free memory that activations may use
+ACTIVATION_FACTOR = 24  # activation floats per token, hidden dim and layer (empirical)
+
+logger = logging.getLogger(__name__)
+
+
+def load_model():
+    return (AutoTokenizer.from_pretrained(MODEL_NAME),
+            BartForQuestionAnswering.from_pretrained(MODEL_NAME))
 
 
 class TextQA():
-    def __init__(self):
-        self.tokenizer = AutoTokenizer.from_pretrained("valhalla/bart-large-finetuned-squadv1")
-        self.model = BartForQuestionAnswering.from_pretrained("valhalla/bart-large-finetuned-squadv1")
+    def __init__(self, batch_size=None):
+        """Extractive question answering over texts.
+
+        Args:
+            batch_size: fixed batch size. If None, it is derived from the available memory per length bucket.
+        """
+        self.tokenizer, self.model = MODEL_REGISTRY.acquire(MODEL_KEY, load_model)
+        self.batch_size = batch_size
+        self.last_stats = {}
 
+    def close(self):
+        """Release the shared model."""
+        MODEL_REGISTRY.release(MODEL_KEY)
 
     def extract(self, texts: List[str], query: List[str]):
-        """Retrieves images from the database."""
-        data = self.tokenizer(query.tolist(), texts.tolist(), return_tensors="pt", padding=True, truncation=True)
-        _, uq_indexes, uq_inverse = unique(data["input_ids"], dim=0)
-        data_unique = {k: v[uq_indexes] for k, v in data.items()}
-        result_values = list()
-        for i in range(0, data_unique["input_ids"].shape[0], BATCH_SIZE):
-            inputs = {k: v[i: i + BATCH_SIZE] for k, v in data.items()}
-            result = self.model(**inputs)
-            start = result["start_logits"].argmax(1)
-            end = result["start_logits"].argmax(1)
-            for i in range(len(start)):
-                value = self.tokenizer.decode(data["input_ids"][i][start[i]: end[i] + 1]).strip()
-                result_values.append(value)
-        result = [result_values[i] for i in uq_inverse]
-        return result
-
-
-def unique(x, dim=None):
-    """Unique elements of x and indices of those unique elements
-    https://github.com/pytorch/pytorch/issues/36748#issuecomment-619514810
-
-    e.g.
-
-    unique(tensor([
-        [1, 2, 3],
-        [1, 2, 4],
-        [1, 2, 3],
-        [1, 2, 5]
-    ]), dim=0)
-    => (tensor([[1, 2, 3],
-                [1, 2, 4],
-                [1, 2, 5]]),
-        tensor([0, 1, 3]))
-    """
-    unique, inverse = torch.unique(
-        x, sorted=True, return_inverse=True, dim=dim)
-    perm = torch.arange(inverse.size(0), dtype=inverse.dtype,
-                        device=inverse.device)
-    inverse, perm = inverse.flip([0]), perm.flip([0])
-    return unique, inverse.new_empty(unique.size(0)).scatter_(0, inverse, perm), inverse
+        """Answers each question on its corresponding text.
+
+        Identical (question, text) pairs are answered once. The remaining pairs are sorted by token length and
+        processed in buckets, so each batch is only padded to the length of its longest member.
+        """
+        pairs = list(zip(list(query), list(texts)))
+        unique_pairs = list(dict.fromkeys(pairs))
+        position = {p: i for i, p in enumerate(unique_pairs)}
+
+        encoded = self.tokenizer([q for q, _ in unique_pairs], [t for _, t in unique_pairs],
+                                 truncation=True, max_length=MAX_SEQUENCE_LENGTH)["input_ids"]
+        order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+        device = next(self.model.parameters()).device
+
+        answers = [None] * len(unique_pairs)
+        num_batches = 0
+        i = 0
+        with torch.inference_mode():
+            while i < len(order):
+                # Sorted ascending, so the longest sequence of the next batch bounds its padding
+                batch_size = self.batch_size or self.pick_batch_size(len(encoded[order[min(i + MAX_BATCH_SIZE, len(order)) - 1]]))
+                batch_ids = order[i: i + batch_size]
+                inputs = self.tokenizer.pad({"input_ids": [encoded[j] for j in batch_ids]}, return_tensors="pt")
+                inputs = {k: v.to(device) for k, v in inputs.items()}
+                result = self.model(**inputs)
+                start = result["start_logits"].argmax(1)
+                # The answer must not end before it starts
+                end_logits = result["end_logits"].masked_fill(
+                    torch.arange(result["end_logits"].shape[1], device=device)[None, :] < start[:, None], float("-inf"))
+                end = end_logits.argmax(1)
+                for k, j in enumerate(batch_ids):
+                    answers[j] = self.tokenizer.decode(inputs["input_ids"][k][start[k]: end[k] + 1],
+                                                       skip_special_tokens=True).strip()
+                i += len(batch_ids)
+                num_batches += 1
+
+        self.last_stats = {"num_pairs": len(pairs), "num_unique_pairs": len(unique_pairs), "num_batches": num_batches}
+        logger.info(f"TextQA answered {len(unique_pairs)} unique of {len(pairs)} pairs in {num_batches} batches.")
+        return [answers[position[p]] for p in pairs]
+
+    def pick_batch_size(self, sequence_length):
+        """Largest batch size whose activations for sequences of the given length fit into the free memory."""
+        device = next(self.model.parameters()).device
+        if device.type == "cuda":
+            free_bytes = torch.cuda.mem_get_info(device)[0]
+        else:
+            free_bytes = psutil.virtual_memory().available
+        config = self.model.config
+        num_layers = config.encoder_layers + config.decoder_layers
+        bytes_per_sequence = sequence_length * config.d_model * num_layers * ACTIVATION_FACTOR * 4
+        batch_size = int(free_bytes * MEMORY_FRACTION // max(bytes_per_sequence, 1))
+        return max(1, min(MAX_BATCH_SIZE, batch_size))
@@ -14,6 +14,10 @@ class BaseTool(ABC):
     def run(self, tables, input_args, output) -> str:
         pass
 
+    def close(self):
+        """Release resources (e.g. shared models) held by the tool."""
+        pass
+
     def validate_args(self, args):
         if len(args) != len(self.args):
             raise ExecutionError(
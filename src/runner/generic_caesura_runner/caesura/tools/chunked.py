@@ -0,0 +1,62 @@
+import logging
+import os
+import time
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = int(os.getenv("CAESURA_CHUNK_SIZE", "256"))
+
+
+class ChunkProgress():
+    def __init__(self, tool_name, total_rows):
+        """Tracks progress and throughput of a chunked tool execution."""
+        self.tool_name = tool_name
+        self.total_rows = total_rows
+        self.processed_rows = 0
+        self.num_chunks = 0
+        self.start_time = time.time()
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.processed_rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def update(self, num_rows):
+        self.processed_rows += num_rows
+        self.num_chunks += 1
+        self.elapsed = time.time() - self.start_time
+        logger.info(f"{self.tool_name}: {self.processed_rows}/{self.total_rows} rows "
+                    f"({self.rows_per_second:.2f} rows/s)")
+
+    def as_dict(self):
+        return {
+            "tool": self.tool_name,
+            "rows": self.processed_rows,
+            "chunks": self.num_chunks,
+            "seconds": round(self.elapsed, 3),
+            "rows_per_second": round(self.rows_per_second, 3),
+        }
+
+
+def run_in_chunks(database, result, new_column, process_chunk, chunk_size=CHUNK_SIZE, tool_name=""):
+    """Fills new_column of the result table chunk by chunk.
+
+    process_chunk(start, end) must return the converted values for rows [start, end). The result table is staged
+    in the working set before the first chunk, so partial outputs are visible while the tool is still running, and
+    only one chunk of model inputs is held in memory at a time.
+    """
+    df = result.data_frame
+    df[new_column] = None
+    column_index = df.columns.get_loc(new_column)
+    database.stage_working_memory(result)
+
+    progress = ChunkProgress(tool_name, len(df))
+    for start in range(0, len(df), chunk_size):
+        end = min(start + chunk_size, len(df))
+        df.iloc[start:end, column_index] = process_chunk(start, end)
+        progress.update(end - start)
+
+    df[new_column] = df[new_column].infer_objects()
+    database.tool_stats.append(progress.as_dict())
+    return progress
@@ -17,6 +17,10 @@ class ImageSelectTool(BaseTool):
         super().__init__(database)
         self.retriever = ImageRetriever()
 
+    def close(self):
+        """Release the shared model."""
+        self.retriever.close()
+
     def run(self, tables, input_args, output):
         """Use the tool."""
         table = tables[0]
@@ -32,8 +32,10 @@ class SqlTool(BaseTool):
 
         except Exception as e:
             err_str = "An error occurred while executing SQL."
-            if "no such column" in str(e):
-                col_name = str(e).split("no such column:")[1].split("\n")[0].strip().split(".")[-1]
+            missing_column = re.search(r'Referenced column "([^"]+)" not found', str(e))
+            if "no such column" in str(e) or missing_column:
+                col_name = missing_column.group(1) if missing_column else \
+                    str(e).split("no such column:")[1].split("\n")[0].strip().split(".")[-1]
                 err_str = f"{err_str} Did you specify the wrong table? {self.database.alternatives(table_name=None, column_name=col_name, thresh=99)}"
             if "json" in str(e).lower():
                 err_str = "The column is not in JSON Format. Use another tool, e.g. Text Question Answering!"
@@ -2,6 +2,7 @@ import re
 from caesura.database.database import Database, Table
 from caesura.tools.backend.text_qa import TextQA
 from caesura.tools.base_tool import BaseTool
+from caesura.tools.chunked import CHUNK_SIZE, run_in_chunks
 import logging
 
 from caesura.observations import ExecutionError
@@ -22,9 +23,6 @@ logger = logging.getLogger(__name__)
 # }
 
 
-MAX_NUM_TEXTS = 200
-
-
 class TextQATool(BaseTool):
     name = "Text Question Answering"
     description = (
@@ -37,9 +35,14 @@ class TextQATool(BaseTool):
     )
     args = ("name of column with TEXT datatype", "name of new column", "question_template", "datatype to automatically cast the result column to [string, int, float, date, boolean]")
 
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, chunk_size: int = CHUNK_SIZE):
         super().__init__(database)
         self.extractor = TextQA()
+        self.chunk_size = chunk_size
+
+    def close(self):
+        """Release the shared model."""
+        self.extractor.close()
 
     def run(self, tables, input_args, output):
         """Use the tool."""
@@ -50,17 +53,19 @@ class TextQATool(BaseTool):
         texts = self.database.get_column_values(table, column, force_datatype="TEXT")
         # query = self.handle_aggregations(query)
 
-        queries = self.get_queries(table, query)
-        result = self.extractor.extract(texts[:MAX_NUM_TEXTS], queries[:MAX_NUM_TEXTS])
-        result = convert(result, datatype)
         ds = self.database.get_table_by_name(table)
-        df = ds.data_frame[:MAX_NUM_TEXTS].copy()
-        # Replace spaces and remove special characters
-        df[new_column] = result
-        result = Table(output if output is not None else table, df,
+        self.check_placeholders(table, query)
+        result = Table(output if output is not None else table, ds.data_frame.copy(),
                        f"Result of text_qa: table={table}, column={column}, query={query}",
                        parent=ds)
 
+        def process_chunk(start, end):
+            queries = self.get_queries(table, query, ds.data_frame.iloc[start:end])
+            return convert(self.extractor.extract(texts[start:end], queries), datatype)
+
+        run_in_chunks(self.database, result, new_column, process_chunk,
+                      chunk_size=self.chunk_size, tool_name=self.name)
+
         # Add the result to the working memory
         return self.database.register_working_memory(result, peek=[new_column])
 
@@ -70,17 +75,25 @@ class TextQATool(BaseTool):
     #             query = " ".join(q for q in query.split() if q not in aggregations)
     #     return query
 
-    def get_queries(self, table, query):
+    def check_placeholders(self, table, query):
         placeholders = [x for x in re.findall("<(.+)>", query)]
         missing = ", ".join(set(placeholders) - set(self.database.tables[table].data_frame.columns))
         if missing:
             raise ExecutionError(description=f"Missing column(s) {missing} from template placeholder in the table {table}. Maybe rearrange the plan to join first.")
-        
+        return placeholders
+
+    def get_queries(self, table, query, data_frame=None):
+        placeholders = self.check_placeholders(table, query)
+        if data_frame is None:
+            data_frame = self.database.tables[table].data_frame
+
         def format_query(row):
             result = query
             for p in placeholders:
                 result = result.replace(f"<{p}>", row[p])
             return result
 
-        queries = self.database.tables[table].data_frame.apply(format_query, axis=1)
+        if not placeholders:
+            return [query] * len(data_frame)
+        queries = data_frame.apply(format_query, axis=1)
         return queries
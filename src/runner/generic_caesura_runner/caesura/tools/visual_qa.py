@@ -3,6 +3,7 @@ import re
 from caesura.database.database import Database, Table
 from caesura.tools.backend.image_qa import VisualQA
 from caesura.tools.base_tool import BaseTool
+from caesura.tools.chunked import CHUNK_SIZE, run_in_chunks
 from caesura.observations import ExecutionError
 from caesura.utils import convert, get_paths_from_images
 
@@ -17,9 +18,6 @@ aggregations = {
     "mean": "mean"
 }
 
-MAX_NUM_IMAGES = 200
-
-
 class VisualQATool(BaseTool):
     name = "Visual Question Answering"
     description = (
@@ -31,9 +29,14 @@ class VisualQATool(BaseTool):
     )
     args = ("name of column with IMAGE datatype", "name of new column with extracted info", "question", "datatype to automatically cast the result column to [string, int, float, date, boolean]")
 
-    def __init__(self, database: Database):
+    def __init__(self, database: Database, chunk_size: int = CHUNK_SIZE):
         super().__init__(database)
         self.extractor = VisualQA()
+        self.chunk_size = chunk_size
+
+    def close(self):
+        """Release the shared model."""
+        self.extractor.close()
 
     def run(self, tables, input_args, output):
         """Use the tool."""
@@ -44,17 +47,18 @@ class VisualQATool(BaseTool):
         query = self.handle_aggregations(query)
 
         images = self.database.get_column_values(table, column, force_datatype="IMAGE")
-        paths = get_paths_from_images(images)
-        result = self.extractor.extract(paths[:MAX_NUM_IMAGES], query)
-        result = convert(result, datatype)
         ds = self.database.get_table_by_name(table)
-        df = ds.data_frame[:MAX_NUM_IMAGES].copy()
-        # Replace spaces and remove special characters
-        df[new_column] = result
-        result = Table(output if output is not None else table, df,
+        result = Table(output if output is not None else table, ds.data_frame.copy(),
                        f"Result of visual_qa: table={table}, column={column}, query={query}",
                        parent=ds)
 
+        def process_chunk(start, end):
+            paths = get_paths_from_images(images[start:end])
+            return convert(self.extractor.extract(paths, query), datatype)
+
+        run_in_chunks(self.database, result, new_column, process_chunk,
+                      chunk_size=self.chunk_size, tool_name=self.name)
+
         # Add the result to the working memory
         return self.database.register_working_memory(result, peek=[new_column])
 
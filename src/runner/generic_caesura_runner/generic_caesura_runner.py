@@ -36,6 +36,7 @@ class GenericCaesuraRunner(GenericRunner):
         model_name: str,
         concurrent_llm_worker: int,
         skip_setup: bool = False,
+        plan_cache: bool = None,
     ):
         """
         Initialize the CAESURA runner.
@@ -45,6 +46,9 @@ class GenericCaesuraRunner(GenericRunner):
             model_name: Name of the model to use (e.g., 'gpt-4-0613', 'gpt-3.5-turbo-0613')
             concurrent_llm_worker: Number of concurrent LLM workers (not used by CAESURA)
             skip_setup: Whether to skip setup (inherited from GenericRunner)
+            plan_cache: Reuse the plans of queries that ran before, skipping the
+                LLM planning phases (default: CAESURA_PLAN_CACHE environment
+                variable, else False). Cache hits report no planning tokens.
         """
         super().__init__(
             use_case,
@@ -65,11 +69,18 @@ class GenericCaesuraRunner(GenericRunner):
                 f"Failed to setup CAESURA database for use case '{use_case}': {e}"
             ) from e
 
+        if plan_cache is None:
+            plan_cache = os.environ.get("CAESURA_PLAN_CACHE", "0") == "1"
+        # Timings of the last CAESURA query, see execute_caesura_query
+        self._last_timings = None
+
         # Initialize single CAESURA agent for reuse
         self.caesura_agent = Caesura(
             database=self.database,
             model_name=self.caesura_model,
             interactive=False,
+            use_plan_cache=plan_cache,
+            plan_cache_path=self.files_path / "cache" / "caesura_plans",
         )
 
     def _map_model_name(self, model_name: str) -> str:
@@ -171,12 +182,19 @@ class GenericCaesuraRunner(GenericRunner):
 
         try:
             query_fn = self._discover_query_impl(query_id)
+            self._last_timings = None
             start_time = time.time()
             results = query_fn()
             execution_time = time.time() - start_time
 
             # Store results in metric
             metric.execution_time = execution_time
+            if self._last_timings is not None:
+                metric.optimization_time = self._last_timings["planning_seconds"]
+                metric.plan_execution_time = self._last_timings[
+                    "execution_seconds"
+                ]
+                metric.plan_cache_hit = self._last_timings["plan_cache_hit"]
             metric.results = (
                 results if isinstance(results, pd.DataFrame) else pd.DataFrame()
             )
@@ -316,6 +334,21 @@ class GenericCaesuraRunner(GenericRunner):
             self.caesura_agent.run(query_text)
             final_result = self.caesura_agent.get_final_result()
 
+            # Report planning (LLM phases or plan cache lookup) and execution time separately
+            timings = self._last_timings = self.caesura_agent.get_timings()
+            print(
+                f"  Planning: {timings['planning_seconds']:.2f}s"
+                f"{' (plan cache hit)' if timings['plan_cache_hit'] else ''}, "
+                f"Execution: {timings['execution_seconds']:.2f}s"
+            )
+
+            # Report throughput of the chunked TextQA / VisualQA tools
+            for stats in self.database.tool_stats:
+                print(
+                    f"  {stats['tool']}: {stats['rows']} rows in {stats['chunks']} chunks, "
+                    f"{stats['seconds']:.2f}s ({stats['rows_per_second']:.2f} rows/s)"
+                )
+
             # Extract results
             if final_result is not None and hasattr(final_result, "data_frame"):
                 result_df = final_result.data_frame.copy()
@@ -0,0 +1,225 @@
+"""
+Batch-size tuning for FlockMTL model definitions.
+
+FlockMTL sends ``batch_size`` tuples per LLM request. Larger batches share
+the instructions across more tuples (fewer tokens) but make each request
+slower and can hurt answer quality. Since a FlockMTL model's batch size is
+fixed by ``CREATE MODEL``, every swept batch size gets its own model alias
+(``<model>__bs<n>``) pointing at the same provider model; queries pick an
+alias through the ``<<model_name>>`` template variable.
+
+Tuning runs a query once per batch size on a sample of every table (temporary
+tables shadowing the originals), measures tokens and latency, scores each
+result against the smallest batch size's result, and persists the cheapest
+batch size that reaches the quality bar per (scenario, query, model).
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+DEFAULT_BATCH_SIZE = 32
+TUNING_BATCH_SIZES = (4, 8, 16, 32, 64)
+TUNING_SAMPLE_ROWS = 50
+TUNING_SEED = 42
+MIN_TUNING_QUALITY = 0.9
+BATCH_SIZE_STORE_PATH = (
+    Path(__file__).resolve().parents[3] / "files" / "flockmtl_batch_sizes.json"
+)
+
+
+def model_alias(model_name: str, batch_size: int) -> str:
+    """Name of the FlockMTL model definition for a batch size."""
+    if batch_size == DEFAULT_BATCH_SIZE:
+        return model_name
+    return f"{model_name}__bs{batch_size}"
+
+
+def ensure_model(
+    conn, model_name: str, batch_size: int = DEFAULT_BATCH_SIZE
+) -> str:
+    """
+    Create the FlockMTL model definition for a batch size if it is missing.
+
+    Args:
+        conn: DuckDB connection with the flockmtl extension loaded
+        model_name: Provider model, e.g. gpt-4o-mini
+        batch_size: Tuples per LLM request
+
+    Returns:
+        The model alias to use as ``model_name`` in queries
+    """
+    alias = model_alias(model_name, batch_size)
+    if alias not in conn.execute("GET MODELS;").fetchdf()["model"].tolist():
+        model_args = json.dumps(
+            {
+                "tuple_format": "json",
+                "batch_size": batch_size,
+                "model_parameters": {"temperature": 0.7},
+            }
+        )
+        conn.execute(
+            f"CREATE MODEL('{alias}', '{model_name}', 'openai', {model_args});"
+        )
+    return alias
+
+
+@contextmanager
+def sampled_tables(
+    conn, sample_rows: int = TUNING_SAMPLE_ROWS, seed: int = TUNING_SEED
+):
+    """
+    Shadow every table and view of the database with a fixed-seed sample.
+
+    Temporary tables take precedence over tables and views of the same name
+    in DuckDB's search path, so queries run unchanged on the sample inside
+    the block.
+    """
+    database = conn.execute("SELECT current_database()").fetchone()[0]
+    tables = [
+        row[0]
+        for row in conn.execute(
+            "SELECT table_name FROM duckdb_tables() "
+            "WHERE database_name = current_database() AND schema_name = 'main' "
+            "AND NOT temporary "
+            "UNION ALL "
+            "SELECT view_name FROM duckdb_views() "
+            "WHERE database_name = current_database() AND schema_name = 'main' "
+            "AND NOT temporary AND NOT internal"
+        ).fetchall()
+    ]
+    try:
+        for table in tables:
+            conn.execute(
+                f'CREATE OR REPLACE TEMP TABLE "{table}" AS '
+                f'SELECT * FROM "{database}".main."{table}" '
+                f"USING SAMPLE reservoir({int(sample_rows)} ROWS) "
+                f"REPEATABLE ({int(seed)})"
+            )
+        yield tables
+    finally:
+        for table in tables:
+            conn.execute(f'DROP TABLE IF EXISTS temp.main."{table}"')
+
+
+def result_agreement(results: pd.DataFrame, reference: pd.DataFrame) -> float:
+    """F1 score of the result rows against the reference rows (as multisets)."""
+    if results is None or reference is None:
+        return 0.0
+    if results.empty and reference.empty:
+        return 1.0
+
+    def rows(df):
+        counts = {}
+        for row in df.astype(str).itertuples(index=False, name=None):
+            counts[row] = counts.get(row, 0) + 1
+        return counts
+
+    result_rows, reference_rows = rows(results), rows(reference)
+    overlap = sum(
+        min(count, reference_rows.get(row, 0))
+        for row, count in result_rows.items()
+    )
+    if overlap == 0:
+        return 0.0
+    precision = overlap / len(results)
+    recall = overlap / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+
+@dataclass
+class BatchSizeTrial:
+    """Measurements of one query on the sample at one batch size."""
+
+    batch_size: int
+    tokens: int = 0
+    money_cost: float = 0.0
+    latency: float = None
+    llm_requests: int = 0
+    quality: float = None
+    error: Optional[str] = None
+
+
+def choose_batch_size(
+    trials: List[BatchSizeTrial],
+    min_quality: float = MIN_TUNING_QUALITY,
+    objective: str = "tokens",
+) -> Optional[BatchSizeTrial]:
+    """
+    Pick the best trial.
+
+    Args:
+        trials: Trials of one query
+        min_quality: Minimum agreement with the reference result
+        objective: "tokens" or "latency", the measure to minimize; the other
+            one breaks ties
+
+    Returns:
+        The best successful trial reaching min_quality, or None
+    """
+    candidates = [
+        t
+        for t in trials
+        if t.error is None
+        and t.llm_requests > 0
+        and (t.quality or 0.0) >= min_quality
+    ]
+    if not candidates:
+        return None
+    if objective == "latency":
+        return min(candidates, key=lambda t: (t.latency, t.tokens))
+    return min(candidates, key=lambda t: (t.tokens, t.latency))
+
+
+class BatchSizeStore:
+    """Persisted tuned batch sizes per (scenario, query, model)."""
+
+    def __init__(self, path: Path = BATCH_SIZE_STORE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(scenario: str, query_id, model_name: str) -> str:
+        return f"{scenario}/Q{query_id}/{model_name}"
+
+    def _load(self) -> Dict[str, dict]:
+        if not self.path.exists():
+            return {}
+        with open(self.path) as f:
+            return json.load(f)
+
+    def get(self, scenario: str, query_id, model_name: str) -> Optional[int]:
+        """Tuned batch size, or None if the query was not tuned."""
+        with self._lock:
+            entry = self._load().get(self._key(scenario, query_id, model_name))
+        return entry["batch_size"] if entry else None
+
+    def put(
+        self,
+        scenario: str,
+        query_id,
+        model_name: str,
+        best: BatchSizeTrial,
+        trials: List[BatchSizeTrial],
+        sample_rows: int,
+    ):
+        with self._lock:
+            entries = self._load()
+            entries[self._key(scenario, query_id, model_name)] = {
+                "batch_size": best.batch_size,
+                "sample_rows": sample_rows,
+                "tuned_at": datetime.now().isoformat(timespec="seconds"),
+                "trials": [asdict(t) for t in trials],
+            }
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(entries, f, indent=2)
+            os.replace(tmp_path, self.path)
@@ -1,14 +1,44 @@
 """
 DuckDB FlockMTL runner implementation.
+
+FlockMTL exposes no token usage, so by default (FLOCKMTL_USAGE_PROXY=1) the
+runner starts a local UsageProxy, publishes its URL for the setups' OpenAI
+secret, and attributes the recorded tokens, cost and request latencies to
+each query.
+
+Batch sizes: queries use the batch size tuned for (scenario, query, model) if
+one was persisted, else 32. With FLOCKMTL_TUNE_BATCH_SIZES (e.g. "8,16,32,64")
+each query is first swept over those batch sizes on a sample of
+FLOCKMTL_TUNING_SAMPLE_ROWS rows per table and the best one is persisted, see
+batch_tuning. FLOCKMTL_STUB_LLM=1 sends all LLM calls to a local stand-in.
 """
 
+import os
 import time
+from contextlib import nullcontext
 from typing import Dict, List
 
 from jinja2 import Environment
 from overrides import override
 
 from runner.generic_runner import GenericQueryMetric, GenericRunner
+from runner.generic_flockmtl_runner.batch_tuning import (
+    MIN_TUNING_QUALITY,
+    TUNING_SAMPLE_ROWS,
+    BatchSizeStore,
+    BatchSizeTrial,
+    choose_batch_size,
+    ensure_model,
+    result_agreement,
+    sampled_tables,
+)
+from runner.generic_flockmtl_runner.stub_llm import StubLLMServer
+from runner.generic_flockmtl_runner.usage_proxy import (
+    PROXY_BASE_URL_ENV,
+    UsageProxy,
+    latency_histogram,
+)
+from runner.model_pricing import model_pricing
 
 jinja_env = Environment(variable_start_string="<<", variable_end_string=">>")
 
@@ -23,6 +53,9 @@ class GenericFlockMTLRunner(GenericRunner):
         model_name: str = "gpt-4o",
         concurrent_llm_worker=20,
         skip_setup: bool = False,
+        usage_proxy: bool = None,
+        tune_batch_sizes: List[int] = None,
+        stub_llm: bool = None,
     ):
         """
         Initialize DuckDB FlockMTL runner.
@@ -30,7 +63,46 @@ class GenericFlockMTLRunner(GenericRunner):
         Args:
             use_case: The use case to run
             model_name: LLM model to use
+            usage_proxy: Route FlockMTL's LLM calls through a local
+                UsageProxy to measure tokens and cost (default:
+                FLOCKMTL_USAGE_PROXY environment variable, else True)
+            tune_batch_sizes: Batch sizes to sweep per query before running
+                it (default: FLOCKMTL_TUNE_BATCH_SIZES, else no tuning)
+            stub_llm: Answer LLM calls with a local StubLLMServer instead of
+                the OpenAI API (default: FLOCKMTL_STUB_LLM, else False)
         """
+        if usage_proxy is None:
+            usage_proxy = os.environ.get("FLOCKMTL_USAGE_PROXY", "1") == "1"
+        if stub_llm is None:
+            stub_llm = os.environ.get("FLOCKMTL_STUB_LLM", "0") == "1"
+        if tune_batch_sizes is None and os.environ.get("FLOCKMTL_TUNE_BATCH_SIZES"):
+            tune_batch_sizes = [
+                int(b) for b in os.environ["FLOCKMTL_TUNE_BATCH_SIZES"].split(",")
+            ]
+        self.tune_batch_sizes = sorted(tune_batch_sizes or [])
+        self.tuning_sample_rows = int(
+            os.environ.get("FLOCKMTL_TUNING_SAMPLE_ROWS", TUNING_SAMPLE_ROWS)
+        )
+        self.batch_size_store = BatchSizeStore()
+
+        self.stub_llm = StubLLMServer().start() if stub_llm else None
+        if self.stub_llm is not None:
+            os.environ.setdefault("OPENAI_API_KEY", "stub")
+            usage_proxy = True
+        # Started before the setups create their OpenAI secret
+        self.usage_proxy = (
+            UsageProxy(
+                upstream=self.stub_llm.base_url if self.stub_llm else None
+            ).start()
+            if usage_proxy
+            else None
+        )
+        if self.usage_proxy is not None:
+            os.environ[PROXY_BASE_URL_ENV] = self.usage_proxy.base_url
+            print(
+                f"FlockMTL LLM calls go through usage proxy {self.usage_proxy.base_url}"  # noqa: E501
+            )
+
         super().__init__(
             use_case,
             scale_factor,
@@ -65,16 +137,28 @@ class GenericFlockMTLRunner(GenericRunner):
 
         for query_id, query_text in query_texts.items():
             try:
+                if self.tune_batch_sizes:
+                    self.tune_batch_size(query_id, query_text)
+                batch_size = self.batch_size_store.get(
+                    self.use_case, query_id, self.model_name
+                )
+                model_alias = (
+                    ensure_model(self.flockmtl_conn, self.model_name, batch_size)
+                    if batch_size is not None
+                    else self.model_name
+                )
+
                 # Replace variable names in the query text
                 templated_query = jinja_env.from_string(query_text).render(
-                    model_name=self.model_name
+                    model_name=model_alias
                 )
 
                 print(templated_query)
 
                 start_time = time.time()
-                query_job = self.flockmtl_conn.execute(templated_query)
-                df = query_job.fetchdf()
+                with self._usage_tag(query_id):
+                    query_job = self.flockmtl_conn.execute(templated_query)
+                    df = query_job.fetchdf()
                 execution_time = time.time() - start_time
 
                 query_metrics[query_id].results = df
@@ -89,9 +173,107 @@ class GenericFlockMTLRunner(GenericRunner):
         print(query_metrics.items())
         for query_id, metrics in query_metrics.items():
             if metrics.status != "failed":
-                # TODO: Implement token usage and cost calculation
-                # Currently no way to extract token usage from FlockMTL
-                metrics.token_usage = 0
-                metrics.money_cost = 0.0
+                metrics.token_usage, metrics.money_cost = self._query_usage(
+                    query_id
+                )
 
         return query_metrics
+
+    def tune_batch_size(self, query_id: int, query_text: str):
+        """
+        Sweep the batch sizes for one query on a sample and persist the best.
+
+        The result at the smallest batch size is the quality reference for
+        the others. Requires the usage proxy to measure tokens.
+        """
+        if self.usage_proxy is None:
+            print("  Batch-size tuning needs the usage proxy, skipping")
+            return
+
+        print(
+            f"  Tuning batch size of Q{query_id} over {self.tune_batch_sizes} on {self.tuning_sample_rows} sampled rows per table"  # noqa: E501
+        )
+        trials = []
+        reference = None
+        with sampled_tables(self.flockmtl_conn, self.tuning_sample_rows):
+            for batch_size in self.tune_batch_sizes:
+                trial = BatchSizeTrial(batch_size=batch_size)
+                tag = ("tuning", query_id, batch_size)
+                try:
+                    model_alias = ensure_model(
+                        self.flockmtl_conn, self.model_name, batch_size
+                    )
+                    templated_query = jinja_env.from_string(query_text).render(
+                        model_name=model_alias
+                    )
+                    start_time = time.time()
+                    with self.usage_proxy.tagged(tag):
+                        df = self.flockmtl_conn.execute(templated_query).fetchdf()
+                    trial.latency = time.time() - start_time
+                    if reference is None:
+                        reference = df
+                    trial.quality = result_agreement(df, reference)
+                except Exception as e:
+                    trial.error = f"{type(e).__name__}: {e}"
+                trial.tokens, trial.money_cost = self._query_usage(tag)
+                trial.llm_requests = len(self.usage_proxy.records_for(tag))
+                trials.append(trial)
+                print(f"    {trial}")
+
+        best = choose_batch_size(trials, MIN_TUNING_QUALITY)
+        if best is None:
+            print(
+                f"  No batch size of Q{query_id} reached quality {MIN_TUNING_QUALITY} with LLM calls on the sample; keeping the current setting"  # noqa: E501
+            )
+            return
+        self.batch_size_store.put(
+            self.use_case,
+            query_id,
+            self.model_name,
+            best,
+            trials,
+            self.tuning_sample_rows,
+        )
+        print(f"  Best batch size for Q{query_id}: {best.batch_size}")
+
+    def _usage_tag(self, query_id: int):
+        if self.usage_proxy is None:
+            return nullcontext()
+        return self.usage_proxy.tagged(query_id)
+
+    def _query_usage(self, tag):
+        """Token usage and money cost of the LLM requests tagged with tag."""
+        if self.usage_proxy is None:
+            return 0, 0.0
+
+        token_usage = 0
+        money_cost = 0.0
+        for record in self.usage_proxy.records_for(tag):
+            token_usage += record.prompt_tokens + record.completion_tokens
+            pricing = model_pricing(record.model)
+            if pricing is None:
+                print(
+                    f"  Warning: No pricing configured for model '{record.model}'. Cost will exclude it."  # noqa: E501
+                )
+                continue
+            money_cost += (
+                record.prompt_tokens * pricing["text"]
+                + record.completion_tokens * pricing["output"]
+            ) / 1_000_000
+        return token_usage, money_cost
+
+    @override
+    def save_metrics(self):
+        """Save metrics, plus the per-request LLM log and latency histogram."""
+        super().save_metrics()
+        if self.usage_proxy is None:
+            return
+
+        requests = self.usage_proxy.to_dataframe()
+        requests_file = self.metrics_path / f"{self.system_name}_llm_requests.csv"
+        requests.to_csv(requests_file, index=False)
+        histogram_file = (
+            self.metrics_path / f"{self.system_name}_llm_latency_histogram.csv"
+        )
+        latency_histogram(requests).to_csv(histogram_file, index=False)
+        print(f"LLM request log saved to: {requests_file}")
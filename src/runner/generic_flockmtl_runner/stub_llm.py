@@ -0,0 +1,162 @@
+"""
+Local stand-in for an OpenAI chat-completions endpoint.
+
+Used to exercise FlockMTL runs (usage capture, batch-size tuning) without an
+API key or network. It answers deterministically, reports ``usage`` computed
+from the message sizes, and simulates latency that grows with the request.
+
+The default answer looks for the JSON array of tuples in the last user
+message and returns ``{"items": [true, ...]}`` with one entry per tuple, the
+shape FlockMTL expects from its scalar functions. Pass ``answer`` to return
+something else.
+"""
+
+import json
+import math
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+
+CHARS_PER_TOKEN = 4
+
+
+def count_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _largest_json_array(text: str) -> Optional[list]:
+    """The longest JSON array embedded in text, if any."""
+    decoder = json.JSONDecoder()
+    best = None
+    start = text.find("[")
+    while start != -1:
+        try:
+            value, end = decoder.raw_decode(text, start)
+        except ValueError:
+            start = text.find("[", start + 1)
+            continue
+        if isinstance(value, list) and (best is None or len(value) > len(best)):
+            best = value
+        start = text.find("[", end)
+    return best
+
+
+def default_answer(request: dict) -> str:
+    messages = request.get("messages") or []
+    user_messages = [m for m in messages if m.get("role") == "user"]
+    content = user_messages[-1].get("content", "") if user_messages else ""
+    if isinstance(content, list):  # multi-part content
+        content = " ".join(
+            part.get("text", "") for part in content if isinstance(part, dict)
+        )
+    tuples = _largest_json_array(content) or []
+    return json.dumps({"items": [True] * len(tuples)})
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        prompt = json.dumps(request.get("messages") or request.get("input") or "")
+        prompt_tokens = count_tokens(prompt)
+
+        if self.path.endswith("/embeddings"):
+            inputs = request.get("input")
+            inputs = inputs if isinstance(inputs, list) else [inputs]
+            body = {
+                "object": "list",
+                "model": request.get("model"),
+                "data": [
+                    {"object": "embedding", "index": i, "embedding": [0.0] * 8}
+                    for i in range(len(inputs))
+                ],
+                "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+            }
+            completion_tokens = 0
+        else:
+            content = stub.answer(request)
+            completion_tokens = count_tokens(content)
+            body = {
+                "id": f"stub-{time.time_ns()}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": request.get("model"),
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+
+        time.sleep(
+            stub.base_latency
+            + stub.seconds_per_1k_tokens * (prompt_tokens + completion_tokens) / 1000
+        )
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class StubLLMServer:
+    """OpenAI-compatible stand-in LLM served from a background thread."""
+
+    def __init__(
+        self,
+        answer: Callable[[dict], str] = default_answer,
+        base_latency: float = 0.05,
+        seconds_per_1k_tokens: float = 0.02,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Initialize the stand-in (not yet listening, see ``start``).
+
+        Args:
+            answer: Function mapping the request JSON to the reply content
+            base_latency: Simulated seconds per request
+            seconds_per_1k_tokens: Simulated seconds per 1k prompt and
+                completion tokens
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+        """
+        self.answer = answer
+        self.base_latency = base_latency
+        self.seconds_per_1k_tokens = seconds_per_1k_tokens
+        self.host = host
+        self.port = port
+        self._server = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self) -> "StubLLMServer":
+        self._server = ThreadingHTTPServer((self.host, self.port), _StubHandler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
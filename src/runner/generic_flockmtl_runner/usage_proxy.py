@@ -0,0 +1,270 @@
+"""
+Local OpenAI-compatible forwarding proxy that records LLM usage.
+
+FlockMTL calls the OpenAI API from inside DuckDB and exposes no token usage.
+Pointing its secret at this proxy (``BASE_URL``) lets the runner see every
+request: the proxy forwards it unchanged to the upstream API, reads ``usage``
+from the response and records prompt/completion tokens and latency, tagged
+with the query that is currently running.
+
+Queries run one at a time, so the runner sets the tag around each query with
+``UsageProxy.tagged``; requests FlockMTL issues in parallel within a query
+all carry that query's tag.
+"""
+
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Hashable, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_UPSTREAM = "https://api.openai.com/v1"
+PROXY_BASE_URL_ENV = "FLOCKMTL_OPENAI_BASE_URL"
+UPSTREAM_TIMEOUT = 600  # seconds
+# Request latency histogram bucket edges (seconds)
+LATENCY_BUCKETS = (0.0, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+# Headers that must not be forwarded verbatim
+_HOP_HEADERS = {
+    "host",
+    "connection",
+    "keep-alive",
+    "transfer-encoding",
+    "content-length",
+    "accept-encoding",
+    "proxy-connection",
+    "upgrade",
+}
+
+
+@dataclass
+class UsageRecord:
+    """One forwarded request."""
+
+    tag: Optional[Hashable]
+    endpoint: str
+    model: Optional[str]
+    status: int
+    prompt_tokens: int
+    completion_tokens: int
+    latency: float
+    started_at: float
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "_ProxyServer"
+
+    def do_POST(self):
+        self._forward()
+
+    def do_GET(self):
+        self._forward()
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output readable
+
+    def _forward(self):
+        proxy = self.server.proxy
+        tag = proxy.tag
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        headers = {
+            k: v for k, v in self.headers.items() if k.lower() not in _HOP_HEADERS
+        }
+        request = urllib.request.Request(
+            proxy.upstream_origin + self.path,
+            data=body,
+            headers=headers,
+            method=self.command,
+        )
+
+        start_time = time.time()
+        try:
+            with urllib.request.urlopen(request, timeout=UPSTREAM_TIMEOUT) as resp:
+                status, resp_headers, payload = resp.status, resp.headers, resp.read()
+        except urllib.error.HTTPError as e:
+            status, resp_headers, payload = e.code, e.headers, e.read()
+        except Exception as e:
+            status, resp_headers = 502, None
+            payload = json.dumps(
+                {"error": {"message": f"Usage proxy: {type(e).__name__}: {e}"}}
+            ).encode()
+        latency = time.time() - start_time
+
+        proxy.record(tag, self.path, body, status, payload, latency, start_time)
+
+        self.send_response(status)
+        content_type = (
+            resp_headers.get("Content-Type") if resp_headers else None
+        ) or "application/json"
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, proxy: "UsageProxy"):
+        super().__init__(address, _ProxyHandler)
+        self.proxy = proxy
+
+
+class UsageProxy:
+    """OpenAI-compatible forwarding proxy recording usage per query tag."""
+
+    def __init__(
+        self,
+        upstream: str = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Initialize the proxy (not yet listening, see ``start``).
+
+        Args:
+            upstream: Upstream API base URL (default: OPENAI_BASE_URL
+                environment variable, else the OpenAI API)
+            host: Interface to listen on
+            port: Port to listen on; 0 picks a free port
+        """
+        upstream = (
+            upstream or os.environ.get("OPENAI_BASE_URL") or DEFAULT_UPSTREAM
+        ).rstrip("/")
+        parts = urlsplit(upstream)
+        self.upstream_origin = f"{parts.scheme}://{parts.netloc}"
+        self.upstream_path = parts.path
+        self.host = host
+        self.port = port
+        self.tag = None
+        self.records: List[UsageRecord] = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Base URL to configure as BASE_URL of the FlockMTL secret."""
+        return f"http://{self.host}:{self.port}{self.upstream_path}"
+
+    def start(self) -> "UsageProxy":
+        """Start serving in a background thread."""
+        self._server = _ProxyServer((self.host, self.port), self)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    @contextmanager
+    def tagged(self, tag: Hashable):
+        """Attribute all requests forwarded inside the block to tag."""
+        previous, self.tag = self.tag, tag
+        try:
+            yield
+        finally:
+            self.tag = previous
+
+    def record(self, tag, path, body, status, payload, latency, started_at):
+        model = None
+        prompt_tokens = completion_tokens = 0
+        try:
+            model = json.loads(body).get("model") if body else None
+        except (ValueError, AttributeError):
+            pass
+        try:
+            response = json.loads(payload)
+            usage = response.get("usage") or {}
+            prompt_tokens = int(
+                usage.get("prompt_tokens", usage.get("input_tokens", 0)) or 0
+            )
+            completion_tokens = int(
+                usage.get("completion_tokens", usage.get("output_tokens", 0)) or 0
+            )
+            model = response.get("model") or model
+        except (ValueError, AttributeError):
+            pass  # non-JSON (e.g. streamed) responses carry no usage
+
+        with self._lock:
+            self.records.append(
+                UsageRecord(
+                    tag=tag,
+                    endpoint=path,
+                    model=model,
+                    status=status,
+                    prompt_tokens=prompt_tokens,
+                    completion_tokens=completion_tokens,
+                    latency=latency,
+                    started_at=started_at,
+                )
+            )
+
+    def records_for(self, tag: Hashable) -> List[UsageRecord]:
+        with self._lock:
+            return [r for r in self.records if r.tag == tag]
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """All records as a DataFrame, one row per request."""
+        with self._lock:
+            return pd.DataFrame(
+                [asdict(r) for r in self.records],
+                columns=list(UsageRecord.__dataclass_fields__),
+            )
+
+
+def latency_histogram(
+    records: pd.DataFrame, buckets: Sequence[float] = LATENCY_BUCKETS
+) -> pd.DataFrame:
+    """
+    Request latency histogram per tag.
+
+    Args:
+        records: Output of ``UsageProxy.to_dataframe``
+        buckets: Bucket edges in seconds
+
+    Returns:
+        DataFrame with one row per tag and one count column per bucket
+    """
+    labels = [
+        f"{lo:g}-{hi:g}s" if np.isfinite(hi) else f">{lo:g}s"
+        for lo, hi in zip(buckets[:-1], buckets[1:])
+    ]
+    if records.empty:
+        return pd.DataFrame(columns=["tag"] + labels)
+    binned = pd.cut(records["latency"], bins=list(buckets), labels=labels, right=False)
+    return (
+        pd.crosstab(records["tag"].astype(str), binned)
+        .reindex(columns=labels, fill_value=0)
+        .rename_axis(columns=None)
+        .reset_index()
+    )
+
+
+def openai_secret_sql(api_key: str) -> str:
+    """
+    CREATE SECRET statement for FlockMTL's OpenAI provider.
+
+    Points the secret at the usage proxy if a runner started one (its URL is
+    published in the FLOCKMTL_OPENAI_BASE_URL environment variable).
+    """
+    base_url = os.environ.get(PROXY_BASE_URL_ENV)
+    base_url_option = f", BASE_URL '{base_url}'" if base_url else ""
+    return f"CREATE SECRET (TYPE OPENAI, API_KEY '{api_key}'{base_url_option});"
@@ -0,0 +1,261 @@
+"""
+Persistent on-disk embedding store for the LOTUS runners.
+
+Embeddings computed by the retrieval models (e5-base-v2 for text, CLIP for
+images) are stored under ``files/<scenario>/data/sf_N/.embeddings``, keyed by
+(model, column, data fingerprint). Vectors are kept as float16 NumPy arrays
+that are memory-mapped on load, next to a persisted FAISS index, so repeated
+runs over the same scale factor skip re-encoding entirely.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+import faiss
+import lotus
+from lotus.models import SentenceTransformersRM
+from lotus.vector_store import FaissVS
+
+EMBEDDINGS_DIR_NAME = ".embeddings"
+
+
+def fingerprint_values(values: Iterable[Any]) -> str:
+    """
+    Compute a stable fingerprint for a column of values.
+
+    File paths are fingerprinted by path, size and modification time rather
+    than by content, so images are never decoded just to compute the key.
+
+    Args:
+        values: Column values (strings, file paths or PIL images)
+
+    Returns:
+        Hex digest identifying the values and their order
+    """
+    digest = hashlib.sha1()
+    for value in values:
+        if isinstance(value, str) and os.path.isfile(value):
+            stat = os.stat(value)
+            token = f"file:{value}:{stat.st_size}:{stat.st_mtime_ns}"
+        elif hasattr(value, "tobytes"):
+            token = "bytes:" + hashlib.sha1(value.tobytes()).hexdigest()
+        else:
+            token = f"value:{value}"
+        digest.update(token.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class EmbeddingStore:
+    """On-disk store of embedding matrices and their FAISS indexes."""
+
+    def __init__(self, root: Path):
+        """
+        Initialize the embedding store.
+
+        Args:
+            root: Directory holding the store, usually
+                ``<data_path>/.embeddings``
+        """
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._loaded = {}
+        # (model, data fingerprint) -> key of the embeddings last resolved
+        self._keys = {}
+
+    @staticmethod
+    def make_key(model: str, column: str, fingerprint: str) -> str:
+        """Build the directory name for a (model, column, fingerprint) key."""
+        safe_model = model.replace("/", "__")
+        safe_column = str(column).replace("/", "_")
+        return f"{safe_model}-{safe_column}-{fingerprint[:16]}"
+
+    def entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def contains(self, key: str) -> bool:
+        return (self.entry_dir(key) / "embeddings.npy").exists()
+
+    def load(self, key: str) -> Optional[np.ndarray]:
+        """
+        Load the embeddings stored under ``key``.
+
+        Returns:
+            Read-only float16 memory map, or None if the key is missing
+        """
+        if key in self._loaded:
+            return self._loaded[key]
+        path = self.entry_dir(key) / "embeddings.npy"
+        if not path.exists():
+            return None
+        embeddings = np.load(path, mmap_mode="r")
+        self._loaded[key] = embeddings
+        return embeddings
+
+    def save(self, key: str, embeddings: np.ndarray, metadata: dict = None):
+        """
+        Persist embeddings and a FAISS inner-product index under ``key``.
+
+        Files are written to a temporary name first and then renamed, so an
+        interrupted run never leaves a half-written entry behind.
+        """
+        entry = self.entry_dir(key)
+        entry.mkdir(parents=True, exist_ok=True)
+
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        tmp_path = entry / "embeddings.tmp.npy"
+        np.save(tmp_path, vectors.astype(np.float16))
+        os.replace(tmp_path, entry / "embeddings.npy")
+
+        index = faiss.IndexFlatIP(vectors.shape[1])
+        index.add(vectors)
+        faiss.write_index(index, str(entry / "index.tmp"))
+        os.replace(entry / "index.tmp", entry / "index")
+
+        with open(entry / "metadata.json", "w") as f:
+            json.dump(
+                {"num_vectors": int(vectors.shape[0]), **(metadata or {})},
+                f,
+                indent=2,
+            )
+        self._loaded.pop(key, None)
+
+    def load_faiss_index(self, key: str):
+        """Read the persisted FAISS index for ``key``, or None if missing."""
+        path = self.entry_dir(key) / "index"
+        if not path.exists():
+            return None
+        return faiss.read_index(str(path))
+
+    def key_for_values(self, model: str, values: Iterable[Any]) -> Optional[str]:
+        """Key of the embeddings last resolved by ``model`` for ``values``, or None."""
+        return self._keys.get((model, fingerprint_values(values)))
+
+    def get_or_compute(
+        self,
+        model: str,
+        column: str,
+        values: Iterable[Any],
+        embed_fn: Callable[[Any], np.ndarray],
+    ) -> Tuple[np.ndarray, str]:
+        """
+        Return embeddings for ``values``, computing and storing them on a miss.
+
+        Args:
+            model: Name of the embedding model
+            column: Name of the embedded column
+            values: Column values to embed
+            embed_fn: Function computing embeddings for ``values``
+
+        Returns:
+            The stored (float16, memory-mapped) embedding matrix with one row
+            per value, and its key
+        """
+        fingerprint = fingerprint_values(values)
+        key = self.make_key(model, column, fingerprint)
+        self._keys[(model, fingerprint)] = key
+        embeddings = self.load(key)
+        if embeddings is None:
+            print(f"  Embedding store miss for {column} ({model}), encoding...")
+            computed = embed_fn(values)
+            self.save(key, computed, metadata={"model": model, "column": column})
+            embeddings = self.load(key)
+        else:
+            print(f"  Embedding store hit for {column} ({model})")
+        return embeddings, key
+
+
+class CachedSentenceTransformersRM(SentenceTransformersRM):
+    """SentenceTransformersRM that resolves document embeddings via a store."""
+
+    def __init__(
+        self,
+        model: str,
+        store: EmbeddingStore,
+        transformer: Any = None,
+        max_batch_size: int = 64,
+        normalize_embeddings: bool = True,
+    ):
+        """
+        Initialize the retrieval model.
+
+        Args:
+            model: Sentence-transformers model name
+            store: Embedding store used for document embeddings
+            transformer: Already loaded SentenceTransformer to reuse (e.g.,
+                from the model registry); loaded from disk if None
+        """
+        if transformer is None:
+            super().__init__(
+                model=model,
+                max_batch_size=max_batch_size,
+                normalize_embeddings=normalize_embeddings,
+            )
+        else:
+            self.model = model
+            self.max_batch_size = max_batch_size
+            self.normalize_embeddings = normalize_embeddings
+            self.transformer = transformer
+        self.model_name = model
+        self.store = store
+
+    def _embed(self, docs: pd.Series | list) -> np.ndarray:
+        column = getattr(docs, "name", None) or "docs"
+        values = list(docs)
+        # Single short strings are query vectors; caching them is not worth it
+        if len(values) <= 1:
+            return super()._embed(docs)
+        embeddings, _ = self.store.get_or_compute(
+            self.model_name,
+            column,
+            values,
+            lambda _: super(CachedSentenceTransformersRM, self)._embed(docs),
+        )
+        # LOTUS searches and joins with these vectors, which FAISS needs as
+        # float32; PersistentFaissVS.index finds the stored index by key
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+class PersistentFaissVS(FaissVS):
+    """FaissVS that reuses the FAISS index persisted in an EmbeddingStore."""
+
+    def __init__(self, store: EmbeddingStore, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store
+        self._store_keys = {}
+
+    def index(self, docs: pd.Series, embeddings: Any, index_dir: str, **kwargs):
+        # The embeddings were just resolved for the same docs by the configured
+        # retrieval model, so the model and the docs' fingerprint identify the
+        # stored entry
+        model = getattr(lotus.settings.rm, "model_name", None)
+        key = self.store.key_for_values(model, docs) if model else None
+        faiss_index = self.store.load_faiss_index(key) if key else None
+        if faiss_index is None or faiss_index.d != np.shape(embeddings)[1]:
+            self._store_keys.pop(index_dir, None)
+            return super().index(docs, embeddings, index_dir, **kwargs)
+
+        self.faiss_index = faiss_index
+        self.vecs = embeddings
+        self.index_dir = index_dir
+        self._store_keys[index_dir] = key
+
+    def load_index(self, index_dir: str):
+        key = self._store_keys.get(index_dir)
+        if key is None:
+            return super().load_index(index_dir)
+        self.index_dir = index_dir
+        self.faiss_index = self.store.load_faiss_index(key)
+        self.vecs = self.store.load(key)  # rows are converted on access
+
+    def get_vectors_from_index(self, index_dir: str, ids: list[Any]) -> np.ndarray:
+        key = self._store_keys.get(index_dir)
+        if key is None:
+            return super().get_vectors_from_index(index_dir, ids)
+        return np.asarray(self.store.load(key)[ids], dtype=np.float32)
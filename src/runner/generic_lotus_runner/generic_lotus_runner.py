@@ -13,46 +13,23 @@ from typing import List
 import lotus
 from lotus.models import LM
 import re
+import weakref
 from PIL import ImageFile
 
 from runner.generic_runner import GenericRunner, GenericQueryMetric
+from runner.model_pricing import model_pricing
+from runner.model_registry import MODEL_REGISTRY
+from runner.generic_lotus_runner.embedding_store import (
+    EMBEDDINGS_DIR_NAME,
+    CachedSentenceTransformersRM,
+    EmbeddingStore,
+    PersistentFaissVS,
+)
+from runner.generic_lotus_runner.operator_profiler import operator_profiler
 
 # Allow loading of truncated images (some source images may be incomplete)
 ImageFile.LOAD_TRUNCATED_IMAGES = True
 
-# Pricing rules: (text_input, audio_input, output) per 1M tokens
-PRICING = {
-    "gpt-4o": {"text": 2.5, "audio": 2.5, "output": 10.0},
-    "gpt-4o-mini": {"text": 0.15, "audio": 0.15, "output": 0.6},
-    "gpt-4o-audio-preview": {
-        "text": 2.5,
-        "audio": 2.5,
-        "output": 10.0,
-    },
-    "gpt-5": {"text": 1.25, "audio": 1.25, "output": 10.0},
-    "gpt-5-mini": {"text": 0.25, "audio": 0.25, "output": 2.0},
-    "gemini-2.0-flash": {
-        "text": 0.15,
-        "audio": 1.0,
-        "output": 0.6,
-    },
-    "gemini-2.5-flash": {
-        "text": 0.3,
-        "audio": 1.0,
-        "output": 2.5,
-    },
-    "gemini-2.5-flash-lite": {
-        "text": 0.1,
-        "audio": 0.3,
-        "output": 0.4,
-    },
-    "gemini-2.5-pro": {
-        "text": 1.25,
-        "audio": 1.25,
-        "output": 10.0,
-    },
-}
-
 
 class GenericLotusRunner(GenericRunner):
     """GenericRunner for LOTUS system."""
@@ -97,6 +74,9 @@ class GenericLotusRunner(GenericRunner):
 
         self._initialize_lotus_with_warmup()
 
+        # Record per-operator stats (exposed as metric.operators)
+        operator_profiler.install()
+
     def _configure_lm(self) -> LM:
         """
         Configure Language Model based on self.model_name.
@@ -176,6 +156,43 @@ class GenericLotusRunner(GenericRunner):
                         "Warning: Connection warmup failed, but continuing..."
                     )
 
+    def _get_embedding_store(self) -> EmbeddingStore:
+        """Return the on-disk embedding store for this scenario and scale factor."""
+        if getattr(self, "_embedding_store", None) is None:
+            self._embedding_store = EmbeddingStore(
+                self.data_path / EMBEDDINGS_DIR_NAME
+            )
+        return self._embedding_store
+
+    def _create_retrieval_model(self, model: str) -> CachedSentenceTransformersRM:
+        """
+        Create a retrieval model whose document embeddings are persisted.
+
+        Args:
+            model: Sentence-transformers model name (e.g., "intfloat/e5-base-v2")
+
+        Returns:
+            Retrieval model backed by the scenario's embedding store; the
+            transformer acquired from the model registry is released when the
+            retrieval model is garbage collected (i.e., once neither the runner
+            nor the LOTUS settings use it)
+        """
+        from sentence_transformers import SentenceTransformer
+
+        key = ("sentence-transformers", model)
+        transformer = MODEL_REGISTRY.acquire(key, lambda: SentenceTransformer(model))
+        rm = CachedSentenceTransformersRM(
+            model=model,
+            store=self._get_embedding_store(),
+            transformer=transformer,
+        )
+        weakref.finalize(rm, MODEL_REGISTRY.release, key)
+        return rm
+
+    def _create_vector_store(self) -> PersistentFaissVS:
+        """Create a FAISS vector store that reuses persisted indexes."""
+        return PersistentFaissVS(store=self._get_embedding_store())
+
     def _calculate_cost(self, prompt_tokens: int, completion_tokens: int) -> float:
         """
         Calculate cost based on prompt and completion tokens.
@@ -187,15 +204,7 @@ class GenericLotusRunner(GenericRunner):
         Returns:
             Total cost in USD
         """
-        model_name = self.model_name.lower()
-        
-        # Find matching pricing configuration
-        pricing_config = None
-        for model_key in PRICING:
-            if model_key.lower() in model_name:
-                pricing_config = PRICING[model_key]
-                break
-        
+        pricing_config = model_pricing(self.model_name)
         if pricing_config is None:
             print(f"Warning: No pricing found for model '{self.model_name}', cost calculation skipped")
             return 0.0
@@ -309,6 +318,7 @@ class GenericLotusRunner(GenericRunner):
 
             metric.token_usage = total_tokens
             metric.money_cost = calculated_cost
+            metric.operators = operator_profiler.drain(self._calculate_cost)
 
         except Exception as e:
             print(f"  Warning: Could not get token usage: {e}")
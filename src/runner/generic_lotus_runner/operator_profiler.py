@@ -0,0 +1,164 @@
+"""
+Per-operator stats for LOTUS queries.
+
+LOTUS only keeps usage totals on the LM (``lm.stats.physical_usage``). The
+profiler wraps the ``sem_*`` DataFrame accessors LOTUS registers on pandas and
+the LM's ``__call__``, and records for each outermost semantic operator call
+its wall time, LLM prompts, tokens, input and output rows. Operators that
+LOTUS invokes internally (e.g., a sem_filter inside a cascade) are attributed
+to the outer operator.
+"""
+
+import functools
+import threading
+import time
+from typing import Callable, List
+
+import lotus
+import pandas as pd
+
+from runner.generic_runner import OperatorMetric, finalize_operators
+
+
+def _physical_usage():
+    lm = lotus.settings.lm
+    if lm is None:
+        return 0, 0
+    usage = lm.stats.physical_usage
+    return usage.prompt_tokens, usage.completion_tokens
+
+
+class LotusOperatorProfiler:
+    """
+    Records semantic operator calls made while it is installed.
+
+    Records are dropped whenever the LM stats are reset (``lm.reset_stats``)
+    and handed out by ``drain``.
+    """
+
+    def __init__(self):
+        self._records: List[OperatorMetric] = []
+        self._llm_calls = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._installed = False
+
+    def install(self):
+        """Wrap the LOTUS accessors and LM (idempotent, process-wide)."""
+        if self._installed:
+            return
+        for name in sorted(getattr(pd.DataFrame, "_accessors", ())):
+            if not name.startswith("sem_"):
+                continue
+            # Accessed on the class, pandas returns the accessor class itself
+            accessor_cls = getattr(pd.DataFrame, name, None)
+            accessor_cls = getattr(accessor_cls, "_accessor", accessor_cls)
+            if isinstance(accessor_cls, type) and hasattr(accessor_cls, "__call__"):
+                accessor_cls.__call__ = self._wrap_operator(
+                    name, accessor_cls.__call__
+                )
+        lm_cls = type(lotus.settings.lm) if lotus.settings.lm is not None else None
+        if lm_cls is not None:
+            lm_cls.__call__ = self._wrap_lm(lm_cls.__call__)
+            lm_cls.reset_stats = self._wrap_reset(lm_cls.reset_stats)
+        self._installed = True
+
+    def reset(self):
+        """Drop the operators recorded so far."""
+        with self._lock:
+            self._records = []
+
+    def drain(
+        self, cost_fn: Callable[[int, int], float]
+    ) -> List[OperatorMetric]:
+        """
+        Take the operators recorded since the last reset or drain.
+
+        Args:
+            cost_fn: Maps (prompt tokens, completion tokens) to a cost
+
+        Returns:
+            Finalized operators in call order
+        """
+        with self._lock:
+            operators, self._records = self._records, []
+        for op in operators:
+            op.cost = cost_fn(op.input_tokens, op.output_tokens)
+        return finalize_operators(operators)
+
+    def _wrap_lm(self, call):
+        profiler = self
+
+        @functools.wraps(call)
+        def counted(lm, messages, *args, **kwargs):
+            with profiler._lock:
+                profiler._llm_calls += len(messages)
+            return call(lm, messages, *args, **kwargs)
+
+        return counted
+
+    def _wrap_reset(self, reset_stats):
+        profiler = self
+
+        # Operators are a breakdown of the LM stats: reset them together, as
+        # the runners do before each query
+        @functools.wraps(reset_stats)
+        def reset(lm, *args, **kwargs):
+            profiler.reset()
+            return reset_stats(lm, *args, **kwargs)
+
+        return reset
+
+    def _wrap_operator(self, name: str, call):
+        profiler = self
+
+        @functools.wraps(call)
+        def profiled(accessor, *args, **kwargs):
+            depth = getattr(profiler._local, "depth", 0)
+            if depth > 0:  # nested call, attributed to the outer operator
+                return call(accessor, *args, **kwargs)
+
+            left = getattr(accessor, "_obj", None)
+            right = args[0] if args else kwargs.get("right", kwargs.get("other"))
+            input_rows = len(left) if left is not None else None
+            if name.endswith("join") and isinstance(right, pd.DataFrame):
+                input_rows = (input_rows or 0) * len(right)  # candidate pairs
+
+            prompt_before, completion_before = _physical_usage()
+            calls_before = profiler._llm_calls
+            start_time = time.time()
+            profiler._local.depth = depth + 1
+            try:
+                result = call(accessor, *args, **kwargs)
+            finally:
+                profiler._local.depth = depth
+            elapsed = time.time() - start_time
+            prompt_after, completion_after = _physical_usage()
+
+            prompt_tokens = prompt_after - prompt_before
+            completion_tokens = completion_after - completion_before
+            with profiler._lock:
+                profiler._records.append(
+                    OperatorMetric(
+                        position=len(profiler._records),
+                        operator=name,
+                        time=elapsed,
+                        llm_calls=profiler._llm_calls - calls_before,
+                        input_tokens=prompt_tokens,
+                        output_tokens=completion_tokens,
+                        total_tokens=prompt_tokens + completion_tokens,
+                        input_rows=input_rows,
+                        output_rows=(
+                            len(result)
+                            if isinstance(result, (pd.DataFrame, pd.Series))
+                            else None
+                        ),
+                    )
+                )
+            return result
+
+        return profiled
+
+
+# One profiler per process: the accessors it wraps are process-wide
+operator_profiler = LotusOperatorProfiler()
@@ -0,0 +1,200 @@
+"""
+Sweep Palimpzest optimizer configurations and derive Pareto frontiers.
+
+Runs every ``config/system/palimpzest/*.json`` configuration (or a chosen
+subset) for one scenario with a single runner instance:
+- data files are read once and shared by all configurations;
+- optionally, LLM responses are cached on disk through litellm and shared
+  by all configurations (and later sweeps). Cached calls still report the
+  tokens and cost of the original response, but not its latency, so the
+  latencies of configurations then depend on the order in which they ran
+  and are left out of the Pareto frontiers;
+- each configuration's metrics, evaluated against the ground truth, are
+  written to ``metrics/palimpzest/evaluate/<config>.json`` (the layout
+  ``BenchmarkPlotter.plot_palimpzest_pareto_evaluation`` reads);
+- ``metrics/palimpzest/evaluate/pareto.csv`` lists cost, latency, quality and
+  optimizer overhead per (query, configuration) and marks the configurations
+  on each query's cost/latency/quality (cost/quality with the LLM cache)
+  Pareto frontier.
+"""
+
+import importlib
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+PALIMPZEST_CONFIG_DIR = (
+    Path(__file__).resolve().parents[3] / "config" / "system" / "palimpzest"
+)
+
+
+def list_configs() -> List[str]:
+    """File names of all Palimpzest configurations."""
+    return sorted(p.name for p in PALIMPZEST_CONFIG_DIR.glob("*.json"))
+
+
+def pareto_frontier(
+    points: pd.DataFrame,
+    minimize: Sequence[str] = ("money_cost", "execution_time"),
+    maximize: Sequence[str] = ("quality",),
+) -> pd.Series:
+    """
+    Mark the non-dominated points.
+
+    A point is dominated if another point is at least as good on every
+    objective and strictly better on one. Points with a missing objective are
+    never on the frontier.
+
+    Args:
+        points: One row per point
+        minimize: Columns to minimize
+        maximize: Columns to maximize
+
+    Returns:
+        Boolean Series aligned with points
+    """
+    columns = list(minimize) + list(maximize)
+    # Negate maximized columns so that all objectives are minimized
+    values = points[columns].astype(float).copy()
+    for column in maximize:
+        values[column] = -values[column]
+    valid = values.notna().all(axis=1)
+
+    on_frontier = pd.Series(False, index=points.index)
+    candidates = values[valid]
+    for idx, row in candidates.iterrows():
+        no_worse = (candidates <= row).all(axis=1)
+        better = (candidates < row).any(axis=1)
+        on_frontier[idx] = not (no_worse & better).any()
+    return on_frontier
+
+
+def _enable_llm_cache(cache_dir: Path):
+    import litellm
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    litellm.enable_cache(type="disk", disk_cache_dir=str(cache_dir))
+    print(f"LLM responses are cached in {cache_dir}")
+
+
+def _share_data_loading(runner):
+    """Make the runner read each data file once across configurations."""
+    load_data = runner.load_data
+    cache: Dict[str, pd.DataFrame] = {}
+
+    def cached_load_data(filename: str, **kwargs) -> pd.DataFrame:
+        key = json.dumps([filename, kwargs], sort_keys=True, default=str)
+        if key not in cache:
+            cache[key] = load_data(filename, **kwargs)
+        # Queries may modify their input (rename, add columns, ...)
+        return cache[key].copy()
+
+    runner.load_data = cached_load_data
+
+
+def run_config_sweep(
+    use_case: str,
+    scale_factor: int = None,
+    configs: Optional[Sequence[str]] = None,
+    queries: Optional[Sequence[int]] = None,
+    sample_budget: Optional[int] = None,
+    llm_cache: bool = False,
+    skip_setup: bool = False,
+) -> pd.DataFrame:
+    """
+    Run and evaluate each configuration and write the Pareto frontier.
+
+    Args:
+        use_case: Scenario to run
+        scale_factor: Scale factor of the scenario
+        configs: Configuration file names (default: all)
+        queries: Query IDs (default: all implemented queries)
+        sample_budget: Optimizer sample budget for every configuration
+            (default: PALIMPZEST_SAMPLE_BUDGET, else each configuration's)
+        llm_cache: Share an on-disk LLM response cache between configurations
+            (latency is then not an objective of the frontiers)
+        skip_setup: Skip the scenario's data setup
+
+    Returns:
+        One row per (query, configuration) with cost, latency, quality,
+        optimizer overhead and an ``on_frontier`` flag
+    """
+    # Imported lazily: the evaluators pull in heavy optional dependencies
+    from evaluator.generic_evaluator import load_evaluator, quality_score
+
+    configs = list(configs or list_configs())
+    module = importlib.import_module(
+        f"scenario.{use_case}.runner.palimpzest_runner.palimpzest_runner"
+    )
+    runner = module.PalimpzestRunner(
+        use_case=use_case, scale_factor=scale_factor, skip_setup=skip_setup
+    )
+    if sample_budget is not None:
+        runner.sample_budget = sample_budget
+    _share_data_loading(runner)
+    if llm_cache:
+        _enable_llm_cache(runner.files_path / "cache" / "palimpzest_llm")
+    evaluator = load_evaluator(use_case, scale_factor)
+    queries = list(queries or runner._discover_queries())
+
+    eval_dir = runner.metrics_path / runner.system_name / "evaluate"
+    eval_dir.mkdir(parents=True, exist_ok=True)
+    metrics_file = runner.metrics_path / f"{runner.system_name}.json"
+
+    rows = []
+    for config in configs:
+        config_name = Path(config).stem
+        print(f"\n=== Palimpzest configuration: {config_name} ===")
+        runner.config_file = config
+        runner.config_data = runner._load_config()
+
+        runner.metrics = runner.execute_queries(queries)
+        runner.save_metrics()
+        evaluator.evaluate_system(runner.system_name, queries=queries)
+        shutil.copyfile(metrics_file, eval_dir / f"{config_name}.json")
+
+        with open(metrics_file) as f:
+            evaluated = json.load(f)
+        for query_id in queries:
+            data = evaluated.get(f"Q{query_id}", {})
+            success = data.get("status") == "success"
+            rows.append(
+                {
+                    "query_id": query_id,
+                    "config": config_name,
+                    "policy": runner.config_data.get("policy"),
+                    "status": data.get("status"),
+                    "execution_time": data.get("execution_time"),
+                    "money_cost": data.get("money_cost"),
+                    "token_usage": data.get("token_usage"),
+                    "optimization_time": data.get("optimization_time"),
+                    "optimization_cost": data.get("optimization_cost"),
+                    "quality": quality_score(data) if success else None,
+                }
+            )
+
+    points = pd.DataFrame(rows)
+    points["sample_budget"] = runner.sample_budget
+    points["llm_cache"] = llm_cache
+    # Cache hits skip the LLM's latency: only cost and quality are comparable
+    minimize = ["money_cost"]
+    if not llm_cache:
+        minimize.append("execution_time")
+    points["on_frontier"] = False
+    for _, group in points.groupby("query_id"):
+        points.loc[group.index, "on_frontier"] = pareto_frontier(
+            group, minimize=minimize
+        )
+
+    pareto_file = eval_dir / "pareto.csv"
+    points.to_csv(pareto_file, index=False)
+    print(
+        points[points["on_frontier"]][
+            ["query_id", "config", "money_cost", "execution_time", "quality"]
+        ].to_string(index=False)
+    )
+    print(f"Pareto frontier saved to: {pareto_file}")
+    return points
@@ -19,11 +19,82 @@ from palimpzest.constants import Model
 import json
 import os
 
-from runner.generic_runner import GenericRunner, GenericQueryMetric
+from runner.generic_runner import (
+    GenericQueryMetric,
+    GenericRunner,
+    OperatorMetric,
+    finalize_operators,
+)
 
 litellm.drop_params = True
 
 
+def _values(stats):
+    """Plan/operator stats are dicts keyed by id in recent Palimpzest versions."""
+    if stats is None:
+        return []
+    return list(stats.values()) if isinstance(stats, dict) else list(stats)
+
+
+def palimpzest_operator_metrics(exec_stats) -> List[OperatorMetric]:
+    """
+    Per-operator stats from Palimpzest's ExecutionStats.
+
+    Operators of the sampled (sentinel) plans are reported with phase
+    "optimization", those of the executed plan(s) with phase "execution".
+
+    Args:
+        exec_stats: ``execution_stats`` of a Palimpzest run
+
+    Returns:
+        Finalized operators in plan order
+    """
+    operators = []
+    for phase, plans in [
+        ("optimization", getattr(exec_stats, "sentinel_plan_stats", None)),
+        ("execution", getattr(exec_stats, "plan_stats", None)),
+    ]:
+        for plan in _values(plans):
+            for op_stats in _values(getattr(plan, "operator_stats", None)):
+                records = getattr(op_stats, "record_op_stats_lst", None) or []
+                input_tokens = sum(
+                    getattr(r, "total_input_tokens", 0) or 0 for r in records
+                )
+                output_tokens = sum(
+                    getattr(r, "total_output_tokens", 0) or 0 for r in records
+                )
+                passed = [
+                    r.passed_operator
+                    for r in records
+                    if getattr(r, "passed_operator", None) is not None
+                ]
+                operators.append(
+                    OperatorMetric(
+                        position=len(operators),
+                        operator=getattr(op_stats, "op_name", "unknown"),
+                        phase=phase,
+                        time=getattr(op_stats, "total_op_time", None),
+                        llm_calls=sum(
+                            1
+                            for r in records
+                            if (getattr(r, "total_input_tokens", 0) or 0) > 0
+                        ),
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                        total_tokens=input_tokens + output_tokens,
+                        cost=getattr(op_stats, "total_op_cost", None),
+                        # Filters and joins report whether each input record
+                        # (pair) passed; other operators one stat per output
+                        input_rows=len(records),
+                        output_rows=sum(passed) if passed else len(records),
+                        details=json.dumps(
+                            getattr(op_stats, "op_details", None), default=str
+                        ),
+                    )
+                )
+    return finalize_operators(operators)
+
+
 class GenericPalimpzestRunner(GenericRunner):
     """GenericRunner for Palimpzest system."""
 
@@ -35,6 +106,7 @@ class GenericPalimpzestRunner(GenericRunner):
         concurrent_llm_worker=20,
         skip_setup: bool = False,
         config_file: Optional[str] = None,
+        sample_budget: Optional[int] = None,
     ):
         """
         Initialize Palimpzest runner.
@@ -45,6 +117,11 @@ class GenericPalimpzestRunner(GenericRunner):
             concurrent_llm_worker: Number of concurrent workers
             skip_setup: Whether to skip scenario setup
             config_file: Optional path to JSON configuration file
+            sample_budget: Number of LLM calls the optimizer may spend
+                sampling operators before choosing a plan; overrides the
+                config file's "sample_budget" (default:
+                PALIMPZEST_SAMPLE_BUDGET environment variable, else the
+                Palimpzest default)
         """
         super().__init__(
             use_case,
@@ -57,6 +134,9 @@ class GenericPalimpzestRunner(GenericRunner):
         env_config_file = os.getenv("PALIMPZEST_CONFIG_FILE")
         self.config_file = config_file or env_config_file
         self.config_data = self._load_config() if self.config_file else None
+        if sample_budget is None and os.getenv("PALIMPZEST_SAMPLE_BUDGET"):
+            sample_budget = int(os.getenv("PALIMPZEST_SAMPLE_BUDGET"))
+        self.sample_budget = sample_budget
 
     @override
     def get_system_name(self) -> str:
@@ -219,6 +299,12 @@ class GenericPalimpzestRunner(GenericRunner):
             if reasoning_effort is not None:
                 config_kwargs["reasoning_effort"] = reasoning_effort
 
+            sample_budget = self.sample_budget
+            if sample_budget is None:
+                sample_budget = self.config_data.get("sample_budget")
+            if sample_budget is not None:
+                config_kwargs["sample_budget"] = sample_budget
+
             return pz.QueryProcessorConfig(**config_kwargs)
         else:
             # Use self.model_name to determine the model when config_data is not provided
@@ -240,6 +326,9 @@ class GenericPalimpzestRunner(GenericRunner):
                     "minimal"  # Use minimal reasoning effort
                 )
 
+            if self.sample_budget is not None:
+                config_kwargs["sample_budget"] = self.sample_budget
+
             return pz.QueryProcessorConfig(**config_kwargs)
 
     def execute_query(self, query_id: int) -> GenericQueryMetric:
@@ -297,6 +386,14 @@ class GenericPalimpzestRunner(GenericRunner):
             # Get usage stats from Palimpzest execution stats
             metric.token_usage = exec_stats.total_tokens
             metric.money_cost = exec_stats.total_execution_cost
+            # Optimizer overhead (sampling), if the plan was chosen by sampling
+            metric.optimization_time = getattr(
+                exec_stats, "optimization_time", None
+            )
+            metric.optimization_cost = getattr(
+                exec_stats, "optimization_cost", None
+            )
+            metric.operators = palimpzest_operator_metrics(exec_stats)
 
             # Print usage for debugging
             print(
@@ -17,6 +17,64 @@ from typing import Any, Dict, List, Optional
 
 import pandas as pd
 
+from runner.audio_variants import VARIANT_ENV as AUDIO_VARIANT_ENV
+from runner.audio_variants import active_audio_variant, use_audio_variant
+from runner.media_tokens import audio_tokens
+from runner.image_dedup import DEDUP_ENV, active_image_dedup, use_image_dedup
+from runner.image_variants import (
+    VARIANT_ENV,
+    active_image_variant,
+    use_image_variant,
+)
+
+
+@dataclass
+class OperatorMetric:
+    """Execution stats of one operator (e.g., one sem_join) of a query."""
+
+    position: int  # order of the operator in the query or plan
+    operator: str  # e.g. "sem_join"
+    label: str = None  # operator with its occurrence, e.g. "sem_join#2"
+    phase: str = "execution"  # or "optimization" (e.g., sampling)
+    time: float = None
+    llm_calls: int = None
+    input_tokens: int = None
+    output_tokens: int = None
+    total_tokens: int = None
+    cost: float = None
+    cost_share: float = None  # fraction of the query's operator cost
+    input_rows: int = None
+    output_rows: int = None
+    selectivity: float = None  # output_rows / input_rows
+    details: str = None
+
+
+def finalize_operators(operators: List[OperatorMetric]) -> List[OperatorMetric]:
+    """
+    Fill in labels, selectivities and cost shares of a query's operators.
+
+    Args:
+        operators: Operators in query order
+
+    Returns:
+        The same operators
+    """
+    occurrences: Dict[str, int] = {}
+    total_cost = sum(op.cost or 0.0 for op in operators)
+    for op in operators:
+        occurrences[op.operator] = occurrences.get(op.operator, 0) + 1
+        if op.label is None:
+            op.label = f"{op.operator}#{occurrences[op.operator]}"
+        if (
+            op.selectivity is None
+            and op.input_rows
+            and op.output_rows is not None
+        ):
+            op.selectivity = op.output_rows / op.input_rows
+        if op.cost is not None and total_cost > 0:
+            op.cost_share = op.cost / total_cost
+    return operators
+
 
 @dataclass
 class GenericQueryMetric:
@@ -29,6 +87,31 @@ class GenericQueryMetric:
     token_usage: int = None
     money_cost: float = None
     error: Optional[str] = None
+    # Optional breakdown of execution_time for systems that expose it
+    # (e.g., BigQuery jobs)
+    queued_time: float = None
+    running_time: float = None
+    download_time: float = None
+    # Time and cost spent by a query optimizer before execution, included in
+    # execution_time and money_cost (e.g., Palimpzest's sampling)
+    optimization_time: float = None
+    optimization_cost: float = None
+    # For systems that plan queries with an LLM and can reuse cached plans
+    # (e.g., CAESURA): whether the plan came from the cache, and the seconds
+    # spent executing it (planning is reported as optimization_time)
+    plan_cache_hit: bool = None
+    plan_execution_time: float = None
+    # Per-operator breakdown for systems that expose it (see OperatorMetric)
+    operators: List[OperatorMetric] = None
+    # Seconds of audio embedded in the LLM requests before and after
+    # preprocessing, and the audio tokens saved (see audio_variants)
+    audio_seconds: float = None
+    audio_seconds_sent: float = None
+    audio_tokens_saved: int = None
+    # LLM requests embedding images and the calls saved by answering
+    # near-duplicates with the response of their group (see image_dedup)
+    image_requests: int = None
+    llm_calls_saved: int = None
 
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -82,6 +165,16 @@ class GenericRunner(ABC):
         self.scale_factor = scale_factor
         self.concurrent_llm_worker = concurrent_llm_worker
 
+        # Variants of the images and recordings sent through litellm, see
+        # image_variants and audio_variants
+        if os.environ.get(VARIANT_ENV):
+            use_image_variant(os.environ[VARIANT_ENV])
+        if os.environ.get(AUDIO_VARIANT_ENV):
+            use_audio_variant(
+                os.environ[AUDIO_VARIANT_ENV],
+                self.files_path / "cache" / "audio_variants" / f"sf_{scale_factor}",
+            )
+
         # Manage scenario-specific data
         self.scenario_handler = GenericRunner.get_scenario_handler(
             self.use_case, self.scale_factor
@@ -89,6 +182,11 @@ class GenericRunner(ABC):
         if not skip_setup and self.scenario_handler is not None:
             self.scenario_handler.setup_scenario([self.get_system_name()])
 
+        # Deduplication of near-duplicate images, indexed once the data is set
+        # up
+        if os.environ.get(DEDUP_ENV):
+            use_image_dedup(os.environ[DEDUP_ENV], self.data_path)
+
     @abstractmethod
     def get_system_name(self) -> str:
         """Return the name of the system (e.g., 'lotus', 'bigquery')."""
@@ -124,7 +222,13 @@ class GenericRunner(ABC):
             Dictionary mapping query IDs to GenericQueryMetric objects
         """
         results = {}
+        audio_cache = active_audio_variant()
+        dedup = active_image_dedup()
         for query_id in query_ids:
+            audio_before = audio_cache.seconds() if audio_cache else None
+            if dedup is not None:
+                dedup.start_query()
+                dedup_before = dedup.counts()
             try:
                 results[query_id] = self.execute_query(query_id)
             except Exception as e:
@@ -135,8 +239,27 @@ class GenericRunner(ABC):
                     status="failed",
                     error=str(e),
                 )
+            if audio_cache is not None:
+                self._record_audio_savings(
+                    results[query_id], audio_before, audio_cache.seconds()
+                )
+            if dedup is not None:
+                requests, saved = dedup.counts()
+                results[query_id].image_requests = requests - dedup_before[0]
+                results[query_id].llm_calls_saved = saved - dedup_before[1]
         return results
 
+    def _record_audio_savings(self, metric: GenericQueryMetric, before, after):
+        seconds = after[0] - before[0]
+        seconds_sent = after[1] - before[1]
+        if seconds <= 0:
+            return
+        metric.audio_seconds = seconds
+        metric.audio_seconds_sent = seconds_sent
+        metric.audio_tokens_saved = audio_tokens(
+            seconds, self.model_name
+        ) - audio_tokens(seconds_sent, self.model_name)
+
     def run_all_queries(
         self, queries: Optional[List[int]] = None
     ) -> Dict[int, GenericQueryMetric]:
@@ -206,6 +329,18 @@ class GenericRunner(ABC):
             metrics_dict[query_name][
                 "concurrent_llm_worker"
             ] = self.concurrent_llm_worker
+            if active_image_variant() is not None:
+                metrics_dict[query_name][
+                    "image_variant"
+                ] = active_image_variant().variant.name
+            if active_audio_variant() is not None:
+                metrics_dict[query_name][
+                    "audio_variant"
+                ] = active_audio_variant().variant.name
+            if active_image_dedup() is not None:
+                metrics_dict[query_name][
+                    "image_dedup_threshold"
+                ] = active_image_dedup().threshold
             self.save_results(query_id, metric.results)
 
         # # write query results to csv files
@@ -215,6 +350,27 @@ class GenericRunner(ABC):
         with open(metrics_file, "w") as f:
             json.dump(metrics_dict, f, indent=2)
         print(f"Metrics saved to: {metrics_file}")
+        if active_image_variant() is not None:
+            print(active_image_variant().summary())
+        if active_audio_variant() is not None:
+            print(active_audio_variant().summary())
+        if active_image_dedup() is not None:
+            print(active_image_dedup().summary())
+
+        self.save_operator_metrics()
+
+    def save_operator_metrics(self):
+        """Save the per-operator stats of all queries as one flat CSV file."""
+        rows = [
+            {"query_id": query_id, **asdict(op)}
+            for query_id, metric in self.metrics.items()
+            for op in metric.operators or []
+        ]
+        if not rows:
+            return
+        operators_file = self.metrics_path / f"{self.system_name}_operators.csv"
+        pd.DataFrame(rows).to_csv(operators_file, index=False)
+        print(f"Operator metrics saved to: {operators_file}")
 
     def _get_empty_results_dataframe(self, query_id: int) -> pd.DataFrame:
         """
@@ -0,0 +1,104 @@
+"""
+Anytime quality-vs-budget profiles for ThalamusDB.
+
+ThalamusDB processes semantic predicates approximately and stops when its
+``Constraints`` (LLM calls, seconds, tokens) are exhausted, returning the best
+result it has so far. A normal benchmark run uses effectively unlimited
+constraints, which yields a single point of that trade-off. A sweep reruns each
+query under a ladder of budgets and degrees of parallelism (DOP), evaluates
+every result against the ground truth, and derives a quality-over-time curve
+per query: the best quality reachable within a given latency, which is what
+matters when deploying under a latency SLO.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import pandas as pd
+
+DEFAULT_DOP = 20
+# Budget used for the dimension that is not swept (effectively unlimited)
+UNLIMITED_SECONDS = 6000
+UNLIMITED_CALLS = 100000000000
+UNLIMITED_TOKENS = 10000000000000000000000
+
+
+@dataclass(frozen=True)
+class Budget:
+    """Constraints of one sweep point."""
+
+    max_seconds: float = UNLIMITED_SECONDS
+    max_calls: int = UNLIMITED_CALLS
+
+    @property
+    def label(self) -> str:
+        parts = []
+        if self.max_seconds != UNLIMITED_SECONDS:
+            parts.append(f"{self.max_seconds:g}s")
+        if self.max_calls != UNLIMITED_CALLS:
+            parts.append(f"{self.max_calls} calls")
+        return " / ".join(parts) or "unlimited"
+
+
+def budget_ladder(
+    seconds: Sequence[float] = (), calls: Sequence[int] = ()
+) -> List[Budget]:
+    """
+    Budgets to sweep: one per time limit and one per call limit.
+
+    Args:
+        seconds: max_seconds values (calls unlimited)
+        calls: max_calls values (time unlimited)
+
+    Returns:
+        The budgets, time limits first, each ladder in increasing order
+    """
+    return [Budget(max_seconds=s) for s in sorted(seconds)] + [
+        Budget(max_calls=c) for c in sorted(calls)
+    ]
+
+
+@dataclass
+class AnytimePoint:
+    """One query run under one budget and DOP."""
+
+    query_id: int
+    dop: int
+    budget: str
+    max_seconds: float
+    max_calls: int
+    status: str
+    execution_time: float = None
+    token_usage: int = None
+    money_cost: float = None
+    row_count: int = 0
+    quality: Optional[float] = None
+    error: Optional[str] = None
+
+
+def quality_curve(points: pd.DataFrame) -> pd.DataFrame:
+    """
+    Quality over time per query and DOP.
+
+    Args:
+        points: One row per AnytimePoint
+
+    Returns:
+        The successful points ordered by execution time, with
+        ``best_quality``: the highest quality reached by any budget that
+        finished within that time
+    """
+    columns = [
+        "query_id",
+        "dop",
+        "execution_time",
+        "budget",
+        "quality",
+        "best_quality",
+    ]
+    ok = points[(points["status"] == "success") & points["quality"].notna()]
+    if ok.empty:
+        return pd.DataFrame(columns=columns)
+    curve = ok.sort_values(["query_id", "dop", "execution_time"]).copy()
+    curve["best_quality"] = curve.groupby(["query_id", "dop"])["quality"].cummax()
+    return curve[columns].reset_index(drop=True)
@@ -2,9 +2,17 @@
 Generic ThalamusDB runner base class
 
 @author: Jiale Lao
+
+Anytime sweep: with THALAMUSDB_SWEEP_SECONDS and/or THALAMUSDB_SWEEP_CALLS
+(comma-separated budgets, e.g. "5,15,60,300") each query is rerun after the
+regular run under every budget and every DOP in THALAMUSDB_SWEEP_DOPS
+(default: 20). Each result is evaluated against the ground truth and the
+points and the resulting quality-over-time curves are written to
+metrics/thalamusdb_anytime.csv and metrics/thalamusdb_anytime_curve.csv.
 """
 
 import time
+from dataclasses import asdict
 import pandas as pd
 from typing import Dict, Any, List, Optional
 
@@ -27,6 +35,22 @@ from tdb.queries.query import Query
 
 import traceback
 from ..generic_runner import GenericRunner, GenericQueryMetric
+from ..model_pricing import model_pricing
+from .anytime import (
+    DEFAULT_DOP,
+    UNLIMITED_CALLS,
+    UNLIMITED_SECONDS,
+    UNLIMITED_TOKENS,
+    AnytimePoint,
+    Budget,
+    budget_ladder,
+    quality_curve,
+)
+
+
+def _env_list(name: str, cast=float) -> List:
+    value = os.environ.get(name)
+    return [cast(v) for v in value.split(",")] if value else []
 
 
 class GenericThalamusDBRunner(GenericRunner):
@@ -40,6 +64,9 @@ class GenericThalamusDBRunner(GenericRunner):
         concurrent_llm_worker: int,
         db_path: str,
         skip_setup: bool = False,
+        sweep_seconds: List[float] = None,
+        sweep_calls: List[int] = None,
+        sweep_dops: List[int] = None,
     ):
         """
         Initialize the ThalamusDB runner.
@@ -49,6 +76,12 @@ class GenericThalamusDBRunner(GenericRunner):
             model_name: Name of the model to use
             concurrent_llm_worker: Number of concurrent LLM workers
             db_path: Path to the DuckDB database file
+            sweep_seconds: max_seconds budgets of the anytime sweep (default:
+                THALAMUSDB_SWEEP_SECONDS, else none)
+            sweep_calls: max_calls budgets of the anytime sweep (default:
+                THALAMUSDB_SWEEP_CALLS, else none)
+            sweep_dops: DOP values of the anytime sweep (default:
+                THALAMUSDB_SWEEP_DOPS, else 20)
         """
         super().__init__(
             use_case,
@@ -72,12 +105,38 @@ class GenericThalamusDBRunner(GenericRunner):
             "gpt_5mini": "gpt_5mini",
             "gemini-2.5-pro": "gemini_2.5pro"
         }
-        self.engine = ExecutionEngine(
-            self.db,
-            dop=20,
-            model_config_path=f"{Path(__file__).resolve().parents[3]}/config/system/thalamusdb/{model_name_to_file_name[self.model_name]}.json",
+        self.model_config_path = f"{Path(__file__).resolve().parents[3]}/config/system/thalamusdb/{model_name_to_file_name[self.model_name]}.json"
+        self._engines = {}
+        self.engine = self._get_engine(DEFAULT_DOP)
+        self.constraints = self._constraints(Budget())
+
+        if sweep_seconds is None:
+            sweep_seconds = _env_list("THALAMUSDB_SWEEP_SECONDS", float)
+        if sweep_calls is None:
+            sweep_calls = _env_list("THALAMUSDB_SWEEP_CALLS", int)
+        if sweep_dops is None:
+            sweep_dops = _env_list("THALAMUSDB_SWEEP_DOPS", int) or [DEFAULT_DOP]
+        self.sweep_budgets = budget_ladder(sweep_seconds, sweep_calls)
+        self.sweep_dops = sorted(sweep_dops)
+        self.anytime_points: List[AnytimePoint] = []
+
+    def _get_engine(self, dop: int) -> ExecutionEngine:
+        """Execution engine with the given degree of parallelism (cached)."""
+        if dop not in self._engines:
+            self._engines[dop] = ExecutionEngine(
+                self.db,
+                dop=dop,
+                model_config_path=self.model_config_path,
+            )
+        return self._engines[dop]
+
+    @staticmethod
+    def _constraints(budget: Budget) -> Constraints:
+        return Constraints(
+            max_calls=budget.max_calls,
+            max_seconds=budget.max_seconds,
+            max_tokens=UNLIMITED_TOKENS,
         )
-        self.constraints = Constraints(max_calls=100000000000, max_seconds=6000, max_tokens=10000000000000000000000)
 
     def get_system_name(self) -> str:
         """Return the name of the system."""
@@ -145,6 +204,92 @@ class GenericThalamusDBRunner(GenericRunner):
                 results=self._get_empty_results_dataframe(query_id),
             )
 
+    def execute_queries(
+        self, query_ids: List[int]
+    ) -> Dict[int, GenericQueryMetric]:
+        results = super().execute_queries(query_ids)
+        if self.sweep_budgets:
+            self.run_anytime_sweep(query_ids)
+        return results
+
+    def run_anytime_sweep(self, query_ids: List[int]) -> List[AnytimePoint]:
+        """
+        Rerun queries under every sweep budget and DOP and evaluate them.
+
+        Args:
+            query_ids: Queries to sweep
+
+        Returns:
+            One AnytimePoint per (query, DOP, budget)
+        """
+        # Imported lazily: the evaluators pull in heavy optional dependencies
+        from evaluator.generic_evaluator import load_evaluator, quality_score
+
+        evaluator = load_evaluator(self.use_case, self.scale_factor)
+        engine, constraints = self.engine, self.constraints
+        print(
+            f"\nAnytime sweep: {len(query_ids)} queries x DOP {self.sweep_dops} x budgets {[b.label for b in self.sweep_budgets]}"  # noqa: E501
+        )
+        try:
+            for query_id in query_ids:
+                for dop in self.sweep_dops:
+                    self.engine = self._get_engine(dop)
+                    for budget in self.sweep_budgets:
+                        self.constraints = self._constraints(budget)
+                        # Through execute_queries, so every point starts with
+                        # a fresh image dedup response cache
+                        metric = self.execute_queries([query_id])[query_id]
+                        point = AnytimePoint(
+                            query_id=query_id,
+                            dop=dop,
+                            budget=budget.label,
+                            max_seconds=budget.max_seconds,
+                            max_calls=budget.max_calls,
+                            status=metric.status,
+                            execution_time=metric.execution_time,
+                            token_usage=metric.token_usage,
+                            money_cost=metric.money_cost,
+                            row_count=len(metric.results),
+                            error=metric.error,
+                        )
+                        if metric.status == "success":
+                            try:
+                                point.quality = quality_score(
+                                    evaluator.evaluate_results(
+                                        query_id, metric.results
+                                    )
+                                )
+                            except Exception as e:
+                                point.error = f"evaluation failed: {e}"
+                        print(
+                            f"  Q{query_id} DOP {dop} {budget.label}: {point.status}, {point.execution_time:.2f}s, quality {point.quality}"  # noqa: E501
+                        )
+                        self.anytime_points.append(point)
+        finally:
+            self.engine, self.constraints = engine, constraints
+        return self.anytime_points
+
+    def save_metrics(self):
+        """Save metrics, plus the anytime sweep points and curves if any."""
+        super().save_metrics()
+        if not self.anytime_points:
+            return
+
+        points = pd.DataFrame([asdict(p) for p in self.anytime_points])
+        for column, unlimited in [
+            ("max_seconds", UNLIMITED_SECONDS),
+            ("max_calls", UNLIMITED_CALLS),
+        ]:
+            points[column] = points[column].where(points[column] != unlimited)
+        points_file = self.metrics_path / f"{self.system_name}_anytime.csv"
+        points.to_csv(points_file, index=False)
+
+        curve = quality_curve(points)
+        curve_file = self.metrics_path / f"{self.system_name}_anytime_curve.csv"
+        curve.to_csv(curve_file, index=False)
+        print(curve.to_string(index=False))
+        print(f"Anytime sweep saved to: {points_file}, {curve_file}")
+
     def execute_thalamusdb_query(self, sql_query: str) -> Dict[str, Any]:
         """
         Execute a ThalamusDB SQL query and return results with metrics.
@@ -174,39 +319,6 @@ class GenericThalamusDBRunner(GenericRunner):
                     else:
                         result_df = pd.DataFrame(result_df)
 
-                # Pricing rules: (text_input, audio_input, output)
-                PRICING = {
-                    "gpt-4o": {"text": 2.5, "audio": 2.5, "output": 10.0},
-                    "gpt-4o-mini": {"text": 0.15, "audio": 0.15, "output": 0.6},
-                    "gpt-4o-audio-preview": {
-                        "text": 2.5,
-                        "audio": 2.5,
-                        "output": 10.0,
-                    },
-                    "gpt-5": {"text": 1.25, "audio": 1.25, "output": 10.0},
-                    "gpt-5-mini": {"text": 0.25, "audio": 0.25, "output": 2.0},
-                    "gemini-2.0-flash": {
-                        "text": 0.15,
-                        "audio": 1.0,
-                        "output": 0.6,
-                    },
-                    "gemini-2.5-flash": {
-                        "text": 0.3,
-                        "audio": 1.0,
-                        "output": 2.5,
-                    },
-                    "gemini-2.5-flash-lite": {
-                        "text": 0.1,
-                        "audio": 0.3,
-                        "output": 0.4,
-                    },
-                    "gemini-2.5-pro": {
-                        "text": 1.25,
-                        "audio": 1.25,
-                        "output": 10.0,
-                    },
-                }
-
                 token_usage_total = 0
                 money_cost_total = 0.0
                 per_model_costs = {}
@@ -218,9 +330,11 @@ class GenericThalamusDBRunner(GenericRunner):
                     non_audio_tokens = max(0, input_tokens - audio_tokens)
                     total_tokens = input_tokens + output_tokens
 
-                    rates = PRICING.get(
-                        model_name, {"text": 0.0, "audio": 0.0, "output": 0.0}
-                    )
+                    rates = model_pricing(model_name) or {
+                        "text": 0.0,
+                        "audio": 0.0,
+                        "output": 0.0,
+                    }
                     cost_usd = (
                         (non_audio_tokens * rates["text"] / 1_000_000.0)
                         + (audio_tokens * rates["audio"] / 1_000_000.0)
@@ -0,0 +1,390 @@
+"""
+Perceptual-hash deduplication of the images sent to the models.
+
+Camera-trap images (animals) and product shots (ecomm) contain many
+near-duplicates, and every one of them costs its own LLM call in a semantic
+filter such as "the image contains a zebra". With deduplication enabled
+(``run.py --image-dedup <threshold>`` or the SEMBENCH_IMAGE_DEDUP environment
+variable), images are grouped by their 64-bit perceptual hash (DCT pHash):
+an image joins the group of the nearest representative if that one is at
+most ``threshold`` bits away (ties go to the earliest group), else it starts
+a new group (0 only groups images with identical hashes). Of all requests that
+are identical except for images of the same groups, only the first one is
+sent; the others get a copy of its response, with zero token usage, so the
+result of the representative is fanned out to the other members.
+
+The hashes of a dataset's images (image files under the data directory and
+image paths referenced by its CSV files) are computed once and persisted next
+to the data (``files/<scenario>/data/sf_<N>/image_phash.csv``), so groups are
+formed in a fixed order and images sent unchanged are matched by their
+content hash instead of being hashed again. Images that are re-encoded before
+being sent (e.g., by LOTUS) are hashed when they are first seen.
+
+Responses are shared within a query only, so the cost of every query stays
+independent of the queries run before it. FlockMTL and BigQuery read images
+outside of this process and are not deduplicated.
+"""
+
+import base64
+import copy
+import csv
+import hashlib
+import io
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from runner.litellm_patch import (
+    install_completion_hook,
+    map_message_parts,
+    part_url,
+    request_messages,
+    with_part_url,
+)
+
+DEDUP_ENV = "SEMBENCH_IMAGE_DEDUP"
+INDEX_FILE = "image_phash.csv"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".gif"}
+HASH_SIZE = 8  # bits per side of the low-frequency DCT block (64-bit hash)
+HIGHFREQ_FACTOR = 4  # images are shrunk to (HASH_SIZE * factor)^2 pixels
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    """Orthonormal DCT-II matrix of size n x n."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix
+
+
+_DCT = _dct_matrix(HASH_SIZE * HIGHFREQ_FACTOR)
+
+
+def phash(data: bytes) -> int:
+    """
+    Perceptual hash of an encoded image.
+
+    The image is converted to grayscale and shrunk to 32x32 pixels; the bits
+    of the hash tell which of the 8x8 lowest DCT frequencies are above their
+    median, so re-encoding and resizing change few bits.
+    """
+    from PIL import Image
+
+    size = HASH_SIZE * HIGHFREQ_FACTOR
+    with Image.open(io.BytesIO(data)) as image:
+        pixels = np.asarray(
+            image.convert("L").resize((size, size), Image.LANCZOS), dtype=float
+        )
+    low = (_DCT @ pixels @ _DCT.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    bits = low > np.median(low)
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+
+def hamming(hashes: np.ndarray, value: int) -> np.ndarray:
+    """Number of bits in which each hash differs from value."""
+    xor = np.bitwise_xor(hashes.astype(np.uint64), np.uint64(value))
+    bits = np.unpackbits(xor.view(np.uint8)).reshape(-1, 64)
+    return bits.sum(axis=1)
+
+
+def dataset_images(data_path: Path) -> List[Path]:
+    """
+    Image files of a dataset: files under its data directory and paths in
+    its CSV files.
+    """
+    data_path = Path(data_path)
+    images = set()
+    if not data_path.exists():
+        return []
+    for path in data_path.rglob("*"):
+        if path.suffix.lower() in IMAGE_SUFFIXES and path.is_file():
+            images.add(path)
+    for csv_file in data_path.glob("*.csv"):
+        if csv_file.name == INDEX_FILE:
+            continue
+        df = pd.read_csv(csv_file, dtype=str)
+        for column in df.columns:
+            values = df[column].dropna()
+            is_image = values.str.lower().str.endswith(tuple(IMAGE_SUFFIXES))
+            if len(values) and is_image.all():
+                images.update(
+                    Path(value)
+                    if os.path.isabs(value)
+                    else data_path / value
+                    for value in values.unique()
+                )
+    return sorted(path for path in images if path.is_file())
+
+
+class ImageHashIndex:
+    """Perceptual hashes of a dataset's images, persisted next to the data."""
+
+    def __init__(self, paths: List[str], sha1s: List[str], hashes: List[int]):
+        self.paths = paths
+        self.sha1s = sha1s
+        self.hashes = hashes
+
+    @classmethod
+    def load(cls, data_path: Path) -> "ImageHashIndex":
+        """
+        Load the index of a dataset, computing the hashes of the images that
+        are not in it yet (and saving it if any were added).
+        """
+        index_file = Path(data_path) / INDEX_FILE
+        known = {}
+        if index_file.exists():
+            with open(index_file, newline="") as f:
+                for row in csv.DictReader(f):
+                    known[row["path"]] = (row["sha1"], int(row["phash"], 16))
+
+        paths, sha1s, hashes = [], [], []
+        added = 0
+        for path in dataset_images(data_path):
+            key = str(path)
+            if key not in known:
+                try:
+                    data = path.read_bytes()
+                    known[key] = (hashlib.sha1(data).hexdigest(), phash(data))
+                    added += 1
+                except Exception as e:  # not decodable by PIL
+                    print(f"Warning: cannot hash image {path}: {e}")
+                    continue
+            paths.append(key)
+            sha1s.append(known[key][0])
+            hashes.append(known[key][1])
+
+        index = cls(paths, sha1s, hashes)
+        if added:
+            index.save(index_file)
+            print(f"Hashed {added} images, index saved to: {index_file}")
+        return index
+
+    def save(self, index_file: Path):
+        tmp_file = Path(f"{index_file}.{threading.get_ident()}.tmp")
+        with open(tmp_file, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["path", "sha1", "phash"])
+            for row in zip(self.paths, self.sha1s, self.hashes):
+                writer.writerow([row[0], row[1], f"{row[2]:016x}"])
+        os.replace(tmp_file, index_file)
+
+    def groups(self, threshold: int) -> List[int]:
+        """Representative hash of every image (see ImageDedup)."""
+        grouping = ImageDedup(threshold)
+        return [grouping.group_of(value) for value in self.hashes]
+
+
+class ImageDedup:
+    """Groups of near-duplicate images and the responses shared by them."""
+
+    def __init__(self, threshold: int, index: ImageHashIndex = None):
+        self.threshold = threshold
+        self.index = index
+        self._lock = threading.Lock()
+        self._representatives: List[int] = []
+        self._rep_array = np.zeros(0, dtype=np.uint64)
+        self._groups: Dict[int, int] = {}  # hash -> representative hash
+        self._hash_of: Dict[str, int] = {}  # sha1 -> hash
+        self._results: Dict[str, object] = {}
+        self._pending: Dict[str, threading.Event] = {}
+        self.reset_stats()
+        if index is not None:
+            self._hash_of.update(zip(index.sha1s, index.hashes))
+            for value in index.hashes:
+                self.group_of(value)
+
+    def reset_stats(self):
+        self.requests = 0  # requests with at least one embedded image
+        self.saved = 0  # of which answered by fanning out another response
+        self.hashed = 0  # images hashed because they were not in the index
+
+    def counts(self) -> Tuple[int, int]:
+        """(image requests, calls saved) so far."""
+        return self.requests, self.saved
+
+    def start_query(self):
+        """Forget the responses of the previous query."""
+        with self._lock:
+            self._results.clear()
+
+    @property
+    def groups(self) -> int:
+        return len(self._representatives)
+
+    def group_of(self, value: int) -> int:
+        """Representative hash of the group of a hash: the nearest representative
+        within the threshold, else the hash itself as a new group."""
+        with self._lock:
+            if value in self._groups:
+                return self._groups[value]
+            representative = value
+            if len(self._rep_array):
+                distances = hamming(self._rep_array, value)
+                nearest = int(np.argmin(distances))
+                if distances[nearest] <= self.threshold:
+                    representative = self._representatives[nearest]
+            if representative == value:
+                self._representatives.append(value)
+                self._rep_array = np.append(self._rep_array, np.uint64(value))
+            self._groups[value] = representative
+            return representative
+
+    def group_of_image(self, data: bytes) -> int:
+        """Representative hash of the group of an encoded image."""
+        key = hashlib.sha1(data).hexdigest()
+        value = self._hash_of.get(key)
+        if value is None:
+            value = phash(data)
+            with self._lock:
+                self._hash_of[key] = value
+                self.hashed += 1
+        return self.group_of(value)
+
+    def _group_url(self, url: str) -> Tuple[str, bool]:
+        """Placeholder of an image data URL's group (unchanged otherwise)."""
+        if not url.startswith("data:image") or ";base64," not in url:
+            return url, False
+        try:
+            group = self.group_of_image(base64.b64decode(url.split(",", 1)[1]))
+        except Exception:  # not decodable by PIL (e.g., SVG): not grouped
+            return url, False
+        return f"image-group:{group:016x}", True
+
+    def request_key(self, args: tuple, kwargs: dict) -> Optional[str]:
+        """
+        Key shared by the requests that only differ in images of the same
+        groups, None if the request embeds no images.
+        """
+        model, messages = request_messages(args, kwargs)
+        grouped = False
+
+        def group_part(part):
+            nonlocal grouped
+            url = part_url(part)
+            if url is None:
+                return part
+            url, is_image = self._group_url(url)
+            grouped |= is_image
+            return with_part_url(part, url)
+
+        canonical = map_message_parts(messages, group_part)
+        if not grouped:
+            return None
+        options = {
+            k: v for k, v in kwargs.items() if k not in ("model", "messages")
+        }
+        return json.dumps(
+            [model, canonical, args[2:], options], sort_keys=True, default=str
+        )
+
+    def complete(self, original, args: tuple, kwargs: dict):
+        """Send a request, or fan out the response of an equivalent one."""
+        if kwargs.get("stream"):
+            return original(*args, **kwargs)
+        key = self.request_key(args, kwargs)
+        if key is None:
+            return original(*args, **kwargs)
+
+        while True:
+            with self._lock:
+                if key in self._results:
+                    self.requests += 1
+                    self.saved += 1
+                    return _fanned_out(self._results[key])
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.requests += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # An equivalent request is in flight: wait for its response (if
+            # it fails, this request is sent instead)
+            pending.wait()
+
+        try:
+            response = original(*args, **kwargs)
+            with self._lock:
+                self._results[key] = response
+            return response
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def summary(self) -> str:
+        saved = self.saved / self.requests if self.requests else 0.0
+        return (
+            f"Image dedup (threshold {self.threshold}): {self.groups} groups, "
+            f"{self.requests} image requests, {self.saved} calls saved "
+            f"({saved:.0%}), {self.hashed} images hashed on the fly"
+        )
+
+
+def _fanned_out(response):
+    """Copy of a response for another group member, with zero usage."""
+    response = copy.deepcopy(response)
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        for name in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if hasattr(usage, name):
+                setattr(usage, name, 0)
+    hidden_params = getattr(response, "_hidden_params", None)
+    if isinstance(hidden_params, dict) and "response_cost" in hidden_params:
+        hidden_params["response_cost"] = 0.0
+    return response
+
+
+_active: Optional[ImageDedup] = None
+
+
+def use_image_dedup(
+    threshold: Optional[str], data_path: Path = None
+) -> Optional[ImageDedup]:
+    """
+    Enable (or disable) the deduplication of the images sent through litellm.
+
+    Args:
+        threshold: Maximum Hamming distance between the hashes of images of
+            the same group, "off" (or an empty value) disables it; None reads
+            SEMBENCH_IMAGE_DEDUP
+        data_path: Data directory of the dataset, whose index is loaded (or
+            built)
+
+    Returns:
+        The active deduplication, or None if disabled
+    """
+    global _active
+    if threshold is None:
+        threshold = os.environ.get(DEDUP_ENV)
+    if threshold in (None, "", "off"):
+        _active = None
+        return None
+    threshold = int(threshold)
+    if not 0 <= threshold < 64:
+        raise ValueError(f"Image dedup threshold must be in [0, 63]: {threshold}")
+    index = ImageHashIndex.load(data_path) if data_path is not None else None
+    _active = ImageDedup(threshold, index)
+    if not install_completion_hook("_image_dedup", _complete):
+        print("Warning: litellm is not installed, images are not deduplicated")
+    print(
+        f"Images are deduplicated with threshold {threshold} "
+        f"({_active.groups} groups of {len(index.hashes) if index else 0} images)"
+    )
+    return _active
+
+
+def active_image_dedup() -> Optional[ImageDedup]:
+    """The active deduplication, None if disabled."""
+    return _active
+
+
+def _complete(original, args: tuple, kwargs: dict):
+    dedup = _active
+    if dedup is None:
+        return original(*args, **kwargs)
+    return dedup.complete(original, args, kwargs)
@@ -0,0 +1,226 @@
+"""
+Resolution-capped, re-encoded image variants for LLM requests.
+
+The scenarios reference images at their original resolution, and LOTUS
+(``ImageArray``), Palimpzest (``ImageFilepath``) and ThalamusDB all embed them
+into their requests as base64 data URLs sent through litellm. With an image
+variant selected (``run.py --image-variant`` or the SEMBENCH_IMAGE_VARIANT
+environment variable), every embedded image is replaced by a variant whose
+longest side is at most ``max_side`` pixels, re-encoded as JPEG or WebP:
+
+    original      send images unchanged (default)
+    768           longest side <= 768px, JPEG (quality 85)
+    512-webp      longest side <= 512px, WebP (quality 85)
+    1024-jpeg-90  longest side <= 1024px, JPEG quality 90
+
+Images are never upscaled, and an image that needs no downscaling keeps its
+original encoding if that is smaller. Variants are cached on disk by the
+hash of the original image and the variant
+(``files/cache/image_variants/<variant>``), so every image is re-encoded once
+across queries, systems and runs.
+
+FlockMTL and BigQuery read images outside of this process and always get the
+originals.
+"""
+
+import base64
+import hashlib
+import io
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Tuple
+
+from runner.litellm_patch import (
+    install_message_hook,
+    map_message_parts,
+    part_url,
+    with_part_url,
+)
+
+VARIANT_ENV = "SEMBENCH_IMAGE_VARIANT"
+VARIANT_CACHE_DIR = (
+    Path(__file__).resolve().parents[2] / "files" / "cache" / "image_variants"
+)
+DEFAULT_QUALITY = 85
+# Format name: (PIL format, MIME type)
+FORMATS = {
+    "jpeg": ("JPEG", "image/jpeg"),
+    "webp": ("WEBP", "image/webp"),
+}
+
+
+@dataclass(frozen=True)
+class ImageVariant:
+    """Maximum resolution and encoding of the images sent to a model."""
+
+    max_side: int
+    format: str = "jpeg"
+    quality: int = DEFAULT_QUALITY
+
+    @classmethod
+    def parse(cls, spec: Optional[str]) -> Optional["ImageVariant"]:
+        """
+        Parse "<max_side>[-<format>[-<quality>]]".
+
+        Returns:
+            The variant, or None for "original" (or an empty spec)
+        """
+        if not spec or spec == "original":
+            return None
+        parts = spec.lower().split("-")
+        fmt = parts[1] if len(parts) > 1 else "jpeg"
+        if fmt == "jpg":
+            fmt = "jpeg"
+        if fmt not in FORMATS:
+            raise ValueError(
+                f"Unknown image format '{fmt}' in '{spec}' (use one of {', '.join(FORMATS)})"  # noqa: E501
+            )
+        quality = int(parts[2]) if len(parts) > 2 else DEFAULT_QUALITY
+        return cls(max_side=int(parts[0]), format=fmt, quality=quality)
+
+    @property
+    def name(self) -> str:
+        return f"{self.max_side}-{self.format}-{self.quality}"
+
+    @property
+    def mime_type(self) -> str:
+        return FORMATS[self.format][1]
+
+    def encode(self, data: bytes) -> Tuple[bytes, str]:
+        """
+        Downscale and re-encode one image.
+
+        Args:
+            data: Encoded original image
+
+        Returns:
+            (encoded variant, MIME type); the original (and None as MIME
+            type) if the variant would not be smaller
+        """
+        from PIL import Image
+
+        with Image.open(io.BytesIO(data)) as image:
+            resize = max(image.size) > self.max_side
+            image = image.convert("RGB")
+            if resize:
+                image.thumbnail((self.max_side, self.max_side), Image.LANCZOS)
+            out = io.BytesIO()
+            image.save(out, format=FORMATS[self.format][0], quality=self.quality)
+        encoded = out.getvalue()
+        if not resize and len(encoded) >= len(data):
+            return data, None
+        return encoded, self.mime_type
+
+
+class ImageVariantCache:
+    """On-disk cache of the variants of images embedded in requests."""
+
+    def __init__(self, variant: ImageVariant, cache_dir: Path = None):
+        self.variant = variant
+        self.cache_dir = Path(cache_dir or VARIANT_CACHE_DIR) / variant.name
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self.images = 0
+        self.hits = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def get(self, data: bytes) -> Tuple[bytes, Optional[str]]:
+        """The (cached) variant of an encoded image, see ImageVariant.encode."""
+        key = hashlib.sha1(data).hexdigest()
+        variant_path = self.cache_dir / f"{key}.{self.variant.format}"
+        # Empty marker: the variant is not smaller than the original
+        original_path = self.cache_dir / f"{key}.orig"
+        hit = True
+        if variant_path.exists():
+            variant, mime_type = variant_path.read_bytes(), self.variant.mime_type
+        elif original_path.exists():
+            variant, mime_type = data, None
+        else:
+            hit = False
+            variant, mime_type = self.variant.encode(data)
+            path = original_path if mime_type is None else variant_path
+            # Written under a temporary name: other threads may read it
+            tmp_path = self.cache_dir / f"{key}.{threading.get_ident()}.tmp"
+            tmp_path.write_bytes(b"" if mime_type is None else variant)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self.images += 1
+            self.hits += hit
+            self.bytes_in += len(data)
+            self.bytes_out += len(variant)
+        return variant, mime_type
+
+    def rewrite_url(self, url: str) -> str:
+        """Replace a base64 image data URL by its variant."""
+        if not url.startswith("data:image") or ";base64," not in url:
+            return url  # remote or local paths are left to the provider
+        _, payload = url.split(",", 1)
+        try:
+            variant, mime_type = self.get(base64.b64decode(payload))
+        except Exception:  # not decodable by PIL (e.g., SVG): send as is
+            return url
+        if mime_type is None:
+            return url
+        return f"data:{mime_type};base64,{base64.b64encode(variant).decode()}"
+
+    def rewrite_messages(self, messages):
+        """Copy of chat messages with every embedded image replaced."""
+
+        def rewrite_part(part):
+            url = part_url(part)
+            return part if url is None else with_part_url(part, self.rewrite_url(url))
+
+        return map_message_parts(messages, rewrite_part)
+
+    def summary(self) -> str:
+        saved = 1 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+        return (
+            f"Image variant {self.variant.name}: {self.images} images "
+            f"({self.hits} cached), {self.bytes_in / 1e6:.1f}MB -> "
+            f"{self.bytes_out / 1e6:.1f}MB ({saved:.0%} smaller)"
+        )
+
+
+_active: Optional[ImageVariantCache] = None
+
+
+def use_image_variant(spec: Optional[str]) -> Optional[ImageVariantCache]:
+    """
+    Select the variant of the images sent through litellm.
+
+    Can be called again to switch variants (or back to "original").
+
+    Args:
+        spec: Variant spec (see ImageVariant.parse); None reads
+            SEMBENCH_IMAGE_VARIANT
+
+    Returns:
+        The active cache, or None if images are sent unchanged
+    """
+    global _active
+    if spec is None:
+        spec = os.environ.get(VARIANT_ENV)
+    variant = ImageVariant.parse(spec)
+    if variant is None:
+        _active = None
+        return None
+    if _active is None or _active.variant != variant:
+        _active = ImageVariantCache(variant)
+    if not install_message_hook("_image_variants", _rewrite_messages):
+        print("Warning: litellm is not installed, images are sent unchanged")
+    print(f"Images are sent as variant {variant.name}")
+    return _active
+
+
+def active_image_variant() -> Optional[ImageVariantCache]:
+    """The cache of the selected variant, None if images are sent unchanged."""
+    return _active
+
+
+def _rewrite_messages(messages):
+    cache = _active
+    return cache.rewrite_messages(messages) if cache is not None else None
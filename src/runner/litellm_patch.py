@@ -0,0 +1,171 @@
+"""
+Interposing on litellm's ``completion`` for every system that uses it.
+
+LOTUS, Palimpzest and ThalamusDB send their LLM requests through litellm, but
+import ``completion`` by name, so replacing ``litellm.completion`` alone does
+not reach them. ``patch_completion`` rebinds every reference that a loaded
+module holds to the current function (``acompletion`` and
+``batch_completion`` call it internally).
+
+``install_completion_hook`` and ``install_message_hook`` install a hook once
+per marker (again if the patch was undone since, e.g., by a DryRun), and
+``map_message_parts`` walks the content parts of chat messages for the hooks
+that rewrite embedded media.
+"""
+
+import sys
+from typing import Any, Callable, List, Optional
+
+
+def patch_completion(
+    make_completion: Callable[[Callable], Callable]
+) -> Optional[Callable[[], None]]:
+    """
+    Replace litellm's completion function process-wide.
+
+    Args:
+        make_completion: Maps the current completion function to its
+            replacement, which usually calls it
+
+    Returns:
+        A function undoing the patch, or None if litellm is not installed
+    """
+    try:
+        import litellm
+        import litellm.main
+    except ImportError:
+        return None
+
+    original = litellm.main.completion
+    completion = make_completion(original)
+    completion.__wrapped__ = original
+    patched = {litellm.main, litellm} | {
+        module
+        for module in list(sys.modules.values())
+        if getattr(module, "completion", None) is original
+    }
+    for module in patched:
+        setattr(module, "completion", completion)
+
+    def undo():
+        for module in patched:
+            setattr(module, "completion", original)
+
+    return undo
+
+
+def is_patched(marker: str) -> bool:
+    """
+    Whether a replacement carrying the attribute marker is in effect.
+
+    Replacements wrap each other, so the whole chain is searched.
+    """
+    try:
+        import litellm.main
+    except ImportError:
+        return False
+    completion = litellm.main.completion
+    while completion is not None:
+        if getattr(completion, marker, False):
+            return True
+        completion = getattr(completion, "__wrapped__", None)
+    return False
+
+
+def install_completion_hook(
+    marker: str, hook: Callable[[Callable, tuple, dict], Any]
+) -> bool:
+    """
+    Route every completion call through ``hook(original, args, kwargs)``.
+
+    The hook is installed once per marker; it is installed again if the
+    replacement carrying the marker is no longer in effect (e.g., because
+    a DryRun that was patched over it was undone).
+
+    Args:
+        marker: Attribute identifying the replacement in the chain
+        hook: Function sending the request, usually by calling original
+
+    Returns:
+        False if litellm is not installed
+    """
+    if is_patched(marker):
+        return True
+
+    def make_completion(original):
+        def completion(*args, **kwargs):
+            return hook(original, args, kwargs)
+
+        setattr(completion, marker, True)
+        return completion
+
+    return patch_completion(make_completion) is not None
+
+
+def install_message_hook(
+    marker: str, rewrite: Callable[[List[Any]], Optional[List[Any]]]
+) -> bool:
+    """
+    Rewrite the messages of every completion call with ``rewrite``.
+
+    Args:
+        marker: Attribute identifying the replacement in the chain
+        rewrite: Maps the messages of a request to the messages to send,
+            None sends them unchanged
+
+    Returns:
+        False if litellm is not installed
+    """
+
+    def hook(original, args, kwargs):
+        _, messages = request_messages(args, kwargs)
+        messages = rewrite(messages)
+        if messages is not None:
+            if len(args) > 1:
+                args = (args[0], messages) + args[2:]
+            else:
+                kwargs = {**kwargs, "messages": messages}
+        return original(*args, **kwargs)
+
+    return install_completion_hook(marker, hook)
+
+
+def request_messages(args: tuple, kwargs: dict):
+    """The (model, messages) of a completion call."""
+    model = kwargs.get("model", args[0] if args else None)
+    messages = kwargs.get("messages", args[1] if len(args) > 1 else [])
+    return model, messages
+
+
+def map_message_parts(messages, fn: Callable[[Any], Any]) -> List[Any]:
+    """Copy of chat messages with every content part replaced by fn(part)."""
+    mapped = []
+    for message in messages or []:
+        content = message.get("content") if isinstance(message, dict) else None
+        if not isinstance(content, list):
+            mapped.append(message)
+            continue
+        mapped.append({**message, "content": [fn(part) for part in content]})
+    return mapped
+
+
+def part_url(part) -> Optional[str]:
+    """URL of an ``image_url`` part or data URL of a ``file`` part, else None."""
+    if not isinstance(part, dict):
+        return None
+    if part.get("type") == "image_url":
+        url = part["image_url"]
+        return url.get("url", "") if isinstance(url, dict) else url
+    if part.get("type") == "file":
+        return part["file"].get("file_data") or ""
+    return None
+
+
+def with_part_url(part: dict, url: str) -> dict:
+    """Copy of an ``image_url`` or ``file`` part with its URL replaced."""
+    if part["type"] == "image_url":
+        image_url = part["image_url"]
+        if isinstance(image_url, dict):
+            return {**part, "image_url": {**image_url, "url": url}}
+        return {**part, "image_url": url}
+    return {**part, "file": {**part["file"], "file_data": url}}
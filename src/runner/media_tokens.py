@@ -0,0 +1,39 @@
+"""
+Input tokens of images and audio under the providers' published formulas.
+
+Shared by the dry-run estimates and the runners' audio-variant metrics.
+"""
+
+import math
+
+GEMINI_IMAGE_TOKENS = 258  # per image up to 384x384, else per 768x768 tile
+GEMINI_AUDIO_TOKENS_PER_SECOND = 32
+OPENAI_IMAGE_BASE_TOKENS = 85
+OPENAI_IMAGE_TILE_TOKENS = 170  # per 512x512 tile after resizing
+OPENAI_AUDIO_TOKENS_PER_SECOND = 10
+
+
+def image_tokens(width: int, height: int, model: str) -> int:
+    """Input tokens of one image of the given size."""
+    if "gemini" in (model or ""):
+        if width <= 384 and height <= 384:
+            return GEMINI_IMAGE_TOKENS
+        return GEMINI_IMAGE_TOKENS * math.ceil(width / 768) * math.ceil(height / 768)
+
+    # OpenAI: fit into 2048x2048, scale the shortest side to 768, 512px tiles
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return OPENAI_IMAGE_BASE_TOKENS + OPENAI_IMAGE_TILE_TOKENS * tiles
+
+
+def audio_tokens(seconds: float, model: str) -> int:
+    """Input tokens of an audio clip of the given duration."""
+    per_second = (
+        GEMINI_AUDIO_TOKENS_PER_SECOND
+        if "gemini" in (model or "")
+        else OPENAI_AUDIO_TOKENS_PER_SECOND
+    )
+    return math.ceil(seconds * per_second)
@@ -0,0 +1,43 @@
+"""
+Prices of the models the runners call through litellm or an OpenAI proxy.
+
+Shared by the runners that compute the money cost of their LLM requests
+(LOTUS, FlockMTL) and the dry-run estimates, so estimates match what the
+runners charge.
+"""
+
+from typing import Dict, Optional
+
+# Prices per 1M tokens (USD); images are billed as text input
+PRICING = {
+    "gpt-4o": {"text": 2.5, "audio": 2.5, "output": 10.0},
+    "gpt-4o-mini": {"text": 0.15, "audio": 0.15, "output": 0.6},
+    "gpt-4o-audio-preview": {"text": 2.5, "audio": 2.5, "output": 10.0},
+    "gpt-4.1": {"text": 2.0, "audio": 2.0, "output": 8.0},
+    "gpt-4.1-mini": {"text": 0.4, "audio": 0.4, "output": 1.6},
+    "gpt-5": {"text": 1.25, "audio": 1.25, "output": 10.0},
+    "gpt-5-mini": {"text": 0.25, "audio": 0.25, "output": 2.0},
+    "gpt-5-nano": {"text": 0.05, "audio": 0.05, "output": 0.4},
+    "gemini-2.0-flash": {"text": 0.15, "audio": 1.0, "output": 0.6},
+    "gemini-2.5-flash": {"text": 0.3, "audio": 1.0, "output": 2.5},
+    "gemini-2.5-flash-lite": {"text": 0.1, "audio": 0.3, "output": 0.4},
+    "gemini-2.5-pro": {"text": 1.25, "audio": 1.25, "output": 10.0},
+    "text-embedding-3-small": {"text": 0.02, "audio": 0.02, "output": 0.0},
+    "text-embedding-3-large": {"text": 0.13, "audio": 0.13, "output": 0.0},
+}
+
+
+def model_pricing(model: Optional[str]) -> Optional[Dict[str, float]]:
+    """
+    Pricing of the longest PRICING key that prefixes the model name.
+
+    A provider prefix (e.g., "gemini/") is ignored, so "gpt-4o-mini" is not
+    priced as "gpt-4o".
+
+    Returns:
+        Prices per 1M text input, audio input and output tokens, or None if
+        the model is unknown
+    """
+    name = (model or "").split("/")[-1].lower()
+    matches = [key for key in PRICING if name.startswith(key)]
+    return PRICING[max(matches, key=len)] if matches else None
@@ -0,0 +1,166 @@
+"""
+Process-wide registry for local ML models (BLIP, BART, sentence-transformers).
+
+Runners and CAESURA tools resolve their models through ``MODEL_REGISTRY``
+instead of calling ``from_pretrained`` themselves, so every model is loaded
+from disk at most once per process. Models are loaded lazily on first
+``acquire`` and reference counted. Unreferenced models stay cached and are
+only evicted (least recently used first) when an optional memory budget would
+otherwise be exceeded.
+
+The budget is read from the ``SEMBENCH_MODEL_MEMORY_BUDGET_GB`` environment
+variable; if it is unset, models are never evicted.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+def estimate_model_bytes(model: Any) -> int:
+    """
+    Estimate the memory footprint of a model in bytes.
+
+    Args:
+        model: A torch module, or a tuple/list whose torch modules are summed
+            (e.g., a (model, processor) pair)
+
+    Returns:
+        Bytes held by parameters and buffers; 0 for non-torch objects
+    """
+    parts = model if isinstance(model, (tuple, list)) else (model,)
+    total = 0
+    for part in parts:
+        if hasattr(part, "parameters") and callable(part.parameters):
+            total += sum(p.numel() * p.element_size() for p in part.parameters())
+        if hasattr(part, "buffers") and callable(part.buffers):
+            total += sum(b.numel() * b.element_size() for b in part.buffers())
+    return total
+
+
+@dataclass
+class _RegistryEntry:
+    """A loaded model together with its bookkeeping."""
+
+    model: Any
+    size_bytes: int
+    ref_count: int = 0
+    last_used: float = field(default_factory=time.time)
+
+
+class ModelRegistry:
+    """Lazy, reference-counted cache of loaded models."""
+
+    def __init__(self, memory_budget_bytes: Optional[int] = None):
+        """
+        Initialize the registry.
+
+        Args:
+            memory_budget_bytes: Upper bound on the summed size of cached
+                models. None disables eviction.
+        """
+        self.memory_budget_bytes = memory_budget_bytes
+        self._entries: "OrderedDict[Hashable, _RegistryEntry]" = OrderedDict()
+        self._lock = threading.RLock()
+        self.load_counts: Dict[Hashable, int] = {}
+        # Size of every model loaded so far, kept after eviction
+        self._known_sizes: Dict[Hashable, int] = {}
+
+    def acquire(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        size_hint_bytes: Optional[int] = None,
+    ) -> Any:
+        """
+        Return the model for ``key``, loading it with ``loader`` if needed.
+
+        Every call must be balanced by a call to ``release(key)``. Unused
+        models are evicted before loading, to make room for the model's size
+        as measured when it was last loaded (else ``size_hint_bytes``), and
+        again after loading if the measured size turns out larger.
+
+        Args:
+            key: Identifier of the model, e.g. ("blip-vqa", model name)
+            loader: Zero-argument function that loads the model
+            size_hint_bytes: Expected size of a model that was not loaded yet
+
+        Returns:
+            The cached model object
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                expected_bytes = self._known_sizes.get(key, size_hint_bytes or 0)
+                self._make_room(expected_bytes)
+                model = loader()
+                entry = _RegistryEntry(
+                    model=model, size_bytes=estimate_model_bytes(model)
+                )
+                self._known_sizes[key] = entry.size_bytes
+                if entry.size_bytes > expected_bytes:
+                    self._make_room(entry.size_bytes)
+                self._entries[key] = entry
+                self.load_counts[key] = self.load_counts.get(key, 0) + 1
+            entry.ref_count += 1
+            entry.last_used = time.time()
+            self._entries.move_to_end(key)
+            return entry.model
+
+    def release(self, key: Hashable):
+        """Drop one reference to ``key``; the model stays cached."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.ref_count > 0:
+                entry.ref_count -= 1
+
+    def evict_unused(self):
+        """Remove all models that are currently not referenced."""
+        with self._lock:
+            for key in [k for k, e in self._entries.items() if e.ref_count == 0]:
+                del self._entries[key]
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size_bytes for e in self._entries.values())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return per-model size, reference count and number of loads."""
+        with self._lock:
+            return {
+                str(key): {
+                    "size_mb": entry.size_bytes / 1024**2,
+                    "ref_count": entry.ref_count,
+                    "num_loads": self.load_counts.get(key, 0),
+                }
+                for key, entry in self._entries.items()
+            }
+
+    def _make_room(self, required_bytes: int):
+        """Evict unreferenced models (LRU first) until ``required_bytes`` fit."""
+        if self.memory_budget_bytes is None:
+            return
+        for key in list(self._entries.keys()):
+            if self.total_bytes() + required_bytes <= self.memory_budget_bytes:
+                return
+            if self._entries[key].ref_count == 0:
+                print(f"Model registry: evicting {key} to stay within budget")
+                del self._entries[key]
+        if self.total_bytes() + required_bytes > self.memory_budget_bytes:
+            print(
+                "Warning: Model registry memory budget exceeded by models "
+                "that are still in use"
+            )
+
+
+def _budget_from_env() -> Optional[int]:
+    budget_gb = os.getenv("SEMBENCH_MODEL_MEMORY_BUDGET_GB")
+    if not budget_gb:
+        return None
+    return int(float(budget_gb) * 1024**3)
+
+
+MODEL_REGISTRY = ModelRegistry(memory_budget_bytes=_budget_from_env())
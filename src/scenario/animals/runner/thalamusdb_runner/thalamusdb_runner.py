@@ -6,11 +6,9 @@ Created on Aug 8, 2025
 ThalamusDB runner implementation for animals use case.
 """
 
-import os
 from typing import Dict, Any
 from pathlib import Path
 import duckdb
-import pandas as pd
 
 # if you use local thalamusdb codes, please uncomment the following codes
 # import sys
@@ -24,6 +22,7 @@ import pandas as pd
 # sys.path.insert(0, tdb_path)
 # end of local codes version
 
+from runner.duckdb_catalog import TableSource, build_catalog
 from runner.generic_thalamusdb_runner.generic_thalamusdb_runner import (
     GenericThalamusDBRunner,
 )
@@ -55,50 +54,28 @@ class ThalamusDBRunner(GenericThalamusDBRunner):
         )
         db_path = db_folder / db_name
 
-        if not os.path.exists(db_path):
-            # Step 1: Read CSVs
-            image_data_df = pd.read_csv(f"{db_folder}/image_data.csv")
-            audio_data_df = pd.read_csv(f"{db_folder}/audio_data.csv")
-
-            # Step 2: Connect to a persistent DuckDB file
-            conn = duckdb.connect(
-                db_path
-            )  # Creates the file if it doesn't exist
-
-            # Step 3: Save DataFrames as persistent tables
-            # Create ImageData table with columns: image, city, stationID
-            # Note: Species column is not visible to ThalamusDB
-            image_df_visible = image_data_df[
-                ["ImagePath", "City", "StationID"]
-            ].rename(
-                columns={
-                    "ImagePath": "image",
-                    "City": "city",
-                    "StationID": "stationID",
-                }
-            )
-
-            # Create AudioData table with columns: audio, city, stationID
-            # Note: Animal column is not visible to ThalamusDB
-            audio_df_visible = audio_data_df[
-                ["AudioPath", "City", "StationID"]
-            ].rename(
-                columns={
-                    "AudioPath": "audio",
-                    "City": "city",
-                    "StationID": "stationID",
-                }
-            )
-
-            conn.register("image_df_visible", image_df_visible)
-            conn.register("audio_df_visible", audio_df_visible)
-
-            conn.execute(
-                "CREATE TABLE ImageData AS SELECT * FROM image_df_visible"
-            )
-            conn.execute(
-                "CREATE TABLE AudioData AS SELECT * FROM audio_df_visible"
-            )
+        # Build the tables, skipping the ones whose CSV did not change
+        conn = duckdb.connect(db_path)  # Creates the file if it doesn't exist
+        build_catalog(
+            conn,
+            [
+                # ImageData table with columns: image, city, stationID
+                # Note: Species column is not visible to ThalamusDB
+                TableSource(
+                    "ImageData",
+                    f"{db_folder}/image_data.csv",
+                    columns="ImagePath AS image, City AS city, StationID AS stationID",
+                ),
+                # AudioData table with columns: audio, city, stationID
+                # Note: Animal column is not visible to ThalamusDB
+                TableSource(
+                    "AudioData",
+                    f"{db_folder}/audio_data.csv",
+                    columns="AudioPath AS audio, City AS city, StationID AS stationID",
+                ),
+            ],
+        )
+        conn.close()
 
         super().__init__(
             use_case, scale_factor, model_name, concurrent_llm_worker, db_path
@@ -2,9 +2,14 @@ import pandas as pd
 from google.cloud import storage, bigquery
 from google.api_core.exceptions import NotFound
 import os
-import uuid
-import concurrent.futures
-import hashlib 
+
+from runner.generic_bigquery_runner.gcs_sync import (
+    compute_fingerprint,
+    get_or_create_bucket,
+    set_table_fingerprint,
+    sync_listed_files,
+    table_is_current,
+)
 
 
 PROJECT_ID = "bq-mm-benchmark"
@@ -21,20 +26,6 @@ class BigQueryAnimalsSetup:
         self.bq_client = bigquery.Client(project=PROJECT_ID)
         self.gcs_bucket_name = f"{self.bq_client.project}-animals_dataset"
 
-    def upload_file_to_gcs(self, bucket_name, local_file_path, gcs_destination_blob_name, add_cols):
-        try:
-            bucket = self.gcs_client.bucket(bucket_name)
-            blob = bucket.blob(gcs_destination_blob_name)
-
-            blob.upload_from_filename(local_file_path)
-
-            gcs_uri = f"gs://{bucket_name}/{gcs_destination_blob_name}"
-
-            return [gcs_uri] + add_cols
-        except Exception as e:
-            print(f"  Error uploading '{local_file_path}': {e}")
-            return None
-
     def create_bq_dataset_and_table(self, dataset_id, table_id, location, schema):
         """Creates the BigQuery dataset and table if they don't exist."""
         dataset_ref = self.bq_client.dataset(dataset_id)
@@ -70,124 +61,57 @@ class BigQueryAnimalsSetup:
         )
         job.result() 
 
-    def upload_images(self, local_path: str, gcs_folder: str, path_col: str, table_id: str, schema: list):
-        if not os.path.exists(local_path):
-            print(f"No files found in '{local_path}'. Skipping.")
-            return
-
-        full_df = pd.read_csv(local_path)
-        all_files_to_upload = []
-        for _, row in full_df.iterrows():
-            local_file_path = row[path_col]
-            if not os.path.exists(local_file_path):
-                print(f"Warning: File {local_file_path} does not exist. Skipping.")
-                continue
-            blob_file_name = os.path.join(gcs_folder, local_file_path.split("/")[-1])
-            all_files_to_upload.append((row[full_df.columns[full_df.columns != path_col].tolist()].to_list(), local_file_path, blob_file_name))
-
-        # Create a bucket if it doesn't exist
-        bucket = self.gcs_client.lookup_bucket(self.gcs_bucket_name)
-        if bucket is None:
-            print(f"Bucket {self.gcs_bucket_name} not found. Creating it...")
-            bucket = self.gcs_client.create_bucket(self.gcs_bucket_name)
-        
-        # Clean up old files in the GCS folder to ensure fresh upload
-        print(f"Cleaning up old files in gs://{self.gcs_bucket_name}/{gcs_folder}/...")
-        blobs_to_delete = bucket.list_blobs(prefix=f"{gcs_folder}/")
-        for blob in blobs_to_delete:
-            blob.delete()
-
-        # Write images to GCS
-        records = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_file = {
-                executor.submit(self.upload_file_to_gcs, self.gcs_bucket_name, local_path, gcs_blob_name, add_cols):
-                local_path for add_cols, local_path, gcs_blob_name in all_files_to_upload
-            }
-            for future in concurrent.futures.as_completed(future_to_file):
-                local_path = future_to_file[future]
-                try:
-                    res = future.result()
-                    if res:
-                        record_dict = {col_name: val for col_name, val in zip(full_df.columns[full_df.columns != path_col], res[1:])}
-                        record_dict[path_col] = res[0]
-                        records.append(record_dict)
-                except Exception as exc:
-                    print(f"'{local_path}' generated an exception: {exc}")
-
-        if not records:
-            print("No images were uploaded to GCS. Skipping BigQuery upload.")
-            return
-
-        df_image_data = pd.DataFrame(records)
-        
-        bq_table_ref = self.create_bq_dataset_and_table(BQ_DATASET_ID, table_id, BQ_TABLE_LOCATION, schema)
+    def upload_media(self, local_path: str, gcs_folder: str, path_col: str, table_id: str, schema: list,
+                     synced_table_id: str):
+        """
+        Sync the media files listed in a CSV to GCS and load their metadata into BigQuery.
 
-        try:
-            self.upload_df_to_bigquery(df_image_data, bq_table_ref, schema)
-            print(f"Images uploaded to GCS and metadata loaded into BigQuery table {table_id}!")
-        except Exception as e:
-            print(f"An error occurred during BigQuery upload: {e}")
+        Only files whose checksum differs from the GCS object are uploaded. The load job
+        is skipped if synced_table_id carries the fingerprint of the CSV, the media and
+        the schema.
 
-    def upload_audio(self, local_path: str, gcs_folder: str, path_col: str, table_id: str, schema: list):
-        """Upload audio files to GCS and metadata to BigQuery."""
+        Returns:
+            The fingerprint to store on synced_table_id once the caller has finished
+            building it, or None if it is up to date or nothing could be uploaded.
+        """
         if not os.path.exists(local_path):
             print(f"No files found in '{local_path}'. Skipping.")
-            return
+            return None
 
         full_df = pd.read_csv(local_path)
-        all_files_to_upload = []
-        for _, row in full_df.iterrows():
-            local_file_path = row[path_col]
-            if not os.path.exists(local_file_path):
-                print(f"Warning: File {local_file_path} does not exist. Skipping.")
-                continue
-            blob_file_name = os.path.join(gcs_folder, local_file_path.split("/")[-1])
-            all_files_to_upload.append((row[full_df.columns[full_df.columns != path_col].tolist()].to_list(), local_file_path, blob_file_name))
-
-        # Create a bucket if it doesn't exist
-        bucket = self.gcs_client.lookup_bucket(self.gcs_bucket_name)
-        if bucket is None:
-            print(f"Bucket {self.gcs_bucket_name} not found. Creating it...")
-            bucket = self.gcs_client.create_bucket(self.gcs_bucket_name)
-        
-        # Clean up old files in the GCS folder to ensure fresh upload
-        print(f"Cleaning up old files in gs://{self.gcs_bucket_name}/{gcs_folder}/...")
-        blobs_to_delete = bucket.list_blobs(prefix=f"{gcs_folder}/")
-        for blob in blobs_to_delete:
-            blob.delete()
-
-        # Write audio files to GCS
-        records = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_file = {
-                executor.submit(self.upload_file_to_gcs, self.gcs_bucket_name, local_path, gcs_blob_name, add_cols):
-                local_path for add_cols, local_path, gcs_blob_name in all_files_to_upload
-            }
-            for future in concurrent.futures.as_completed(future_to_file):
-                local_path = future_to_file[future]
-                try:
-                    res = future.result()
-                    if res:
-                        record_dict = {col_name: val for col_name, val in zip(full_df.columns[full_df.columns != path_col], res[1:])}
-                        record_dict[path_col] = res[0]
-                        records.append(record_dict)
-                except Exception as exc:
-                    print(f"'{local_path}' generated an exception: {exc}")
-
-        if not records:
-            print("No audio files were uploaded to GCS. Skipping BigQuery upload.")
-            return
-
-        df_audio_data = pd.DataFrame(records)
-        
+        bucket = get_or_create_bucket(self.gcs_client, self.gcs_bucket_name)
+        records, sync = sync_listed_files(bucket, full_df, path_col, gcs_folder)
+        print(f"Synced gs://{self.gcs_bucket_name}/{gcs_folder}/: {sync.summary()}")
+        for blob_name, exc in sync.failed.items():
+            print(f"  Error uploading '{blob_name}': {exc}")
+
+        if records.empty:
+            print("No files were uploaded to GCS. Skipping BigQuery upload.")
+            return None
+
+        fingerprint = compute_fingerprint(local_path, sync.fingerprint, schema)
+        if table_is_current(self.bq_client, self.table_path(synced_table_id), fingerprint):
+            print(f"BigQuery table {synced_table_id} is up to date, skipping load.")
+            return None
+
         bq_table_ref = self.create_bq_dataset_and_table(BQ_DATASET_ID, table_id, BQ_TABLE_LOCATION, schema)
 
         try:
-            self.upload_df_to_bigquery(df_audio_data, bq_table_ref, schema)
-            print(f"Audio files uploaded to GCS and metadata loaded into BigQuery table {table_id}!")
+            self.upload_df_to_bigquery(records, bq_table_ref, schema)
+            print(f"Files uploaded to GCS and metadata loaded into BigQuery table {table_id}!")
         except Exception as e:
             print(f"An error occurred during BigQuery upload: {e}")
+            return None
+        return fingerprint
+
+    def upload_images(self, local_path: str, gcs_folder: str, path_col: str, table_id: str, schema: list,
+                      synced_table_id: str = None):
+        return self.upload_media(local_path, gcs_folder, path_col, table_id, schema, synced_table_id or table_id)
+
+    def upload_audio(self, local_path: str, gcs_folder: str, path_col: str, table_id: str, schema: list,
+                     synced_table_id: str = None):
+        """Upload audio files to GCS and metadata to BigQuery."""
+        return self.upload_media(local_path, gcs_folder, path_col, table_id, schema, synced_table_id or table_id)
 
     def finalize_image_upload(self, table_name, table_name_multimodal, image_url_table, url_col, bucket):
         # Create an external images table
@@ -247,73 +171,8 @@ class BigQueryAnimalsSetup:
             print(f"An error occurred: {e}")
             return False
 
-    def get_table_row_count(self, table_id):
-        """Get the number of rows in a BigQuery table."""
-        table_full_id = f"{PROJECT_ID}.{BQ_DATASET_ID}.{table_id}"
-        try:
-            query = f"SELECT COUNT(*) as row_count FROM `{table_full_id}`"
-            result = self.bq_client.query(query).result()
-            return next(result).row_count
-        except Exception as e:
-            print(f"Error getting row count for {table_id}: {e}")
-            return -1
-
-    def get_local_csv_hash(self, file_path):
-        """Get hash of local CSV file content."""
-        if not os.path.exists(file_path):
-            return None
-        
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-
-    def is_data_synchronized(self, local_csv_path, table_id):
-        """Check if local CSV data matches cloud table data."""
-        if not os.path.exists(local_csv_path):
-            print(f"Local file {local_csv_path} not found")
-            return False
-            
-        if not self.table_exists(table_id):
-            return False
-            
-        # Quick check: compare row counts
-        local_df = pd.read_csv(local_csv_path)
-        local_row_count = len(local_df)
-        cloud_row_count = self.get_table_row_count(table_id)
-        
-        if local_row_count != cloud_row_count:
-            print(f"Row count mismatch for {table_id}: local={local_row_count}, cloud={cloud_row_count}")
-            return False
-            
-        # Additional check: file modification time vs last upload
-        # This is a heuristic - if local file was modified recently, it might need re-upload
-        local_mtime = os.path.getmtime(local_csv_path)
-        
-        # Store hash for future comparison (simple approach)
-        hash_file = f"{local_csv_path}.hash"
-        current_hash = self.get_local_csv_hash(local_csv_path)
-        
-        if os.path.exists(hash_file):
-            with open(hash_file, 'r') as f:
-                stored_hash = f.read().strip()
-            if current_hash != stored_hash:
-                print(f"Local file {local_csv_path} has changed since last upload")
-                return False
-        else:
-            # First time, assume sync needed
-            return False
-            
-        return True
-
-    def mark_data_synchronized(self, local_csv_path):
-        """Mark local data as synchronized by storing its hash."""
-        current_hash = self.get_local_csv_hash(local_csv_path)
-        if current_hash:
-            hash_file = f"{local_csv_path}.hash"
-            with open(hash_file, 'w') as f:
-                f.write(current_hash)
+    def table_path(self, table_id):
+        return f"{PROJECT_ID}.{BQ_DATASET_ID}.{table_id}"
 
     def setup_data(self, scale_factor: int = 200, data_dir: str = "files/animals/data/"):
         """Setup BigQuery tables for animals scenario.
@@ -335,25 +194,24 @@ class BigQueryAnimalsSetup:
         # Each scale factor will OVERWRITE the previous data in BigQuery
         image_csv_path = os.path.join(actual_data_dir, "image_data.csv")
 
-        # Always upload when scale_factor data differs from what's currently in BigQuery
-        # We check if the current CSV matches what was last uploaded
-        needs_upload = not self.is_data_synchronized(image_csv_path, "image_data_images")
-
-        if needs_upload:
-            print(f"Uploading/updating ImageData with animal images to BigQuery (SF={scale_factor})...")
-            image_schema = [
-                bigquery.SchemaField("Species", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("ImagePath", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("City", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("StationID", "STRING", mode="REQUIRED"),
-            ]
-            self.upload_images(
-                local_path=image_csv_path,
-                gcs_folder="animal_images",
-                path_col="ImagePath",
-                table_id="image_data_images",
-                schema=image_schema
-            )
+        # Images are synced by checksum, and the tables are only rebuilt when the
+        # fingerprint of the CSV and images differs from the one on image_data_mm
+        print(f"Syncing ImageData with animal images to BigQuery (SF={scale_factor})...")
+        image_schema = [
+            bigquery.SchemaField("Species", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("ImagePath", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("City", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("StationID", "STRING", mode="REQUIRED"),
+        ]
+        fingerprint = self.upload_images(
+            local_path=image_csv_path,
+            gcs_folder="animal_images",
+            path_col="ImagePath",
+            table_id="image_data_images",
+            schema=image_schema,
+            synced_table_id="image_data_mm",
+        )
+        if fingerprint is not None:
             self.finalize_image_upload(
                 table_name="image_data_external",
                 table_name_multimodal="image_data_mm",
@@ -361,30 +219,27 @@ class BigQueryAnimalsSetup:
                 url_col="ImagePath",
                 bucket=f"gs://{self.gcs_bucket_name}/animal_images/*"
             )
-            self.mark_data_synchronized(image_csv_path)
-        else:
-            print(f"ImageData tables exist and are synchronized (SF={scale_factor}), skipping upload.")
+            set_table_fingerprint(self.bq_client, self.table_path("image_data_mm"), fingerprint)
 
         # Upload AudioData table with animal audio
         audio_csv_path = os.path.join(actual_data_dir, "audio_data.csv")
 
-        needs_upload = not self.is_data_synchronized(audio_csv_path, "audio_data_files")
-
-        if needs_upload:
-            print(f"Uploading/updating AudioData with animal audio to BigQuery (SF={scale_factor})...")
-            audio_schema = [
-                bigquery.SchemaField("Animal", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("AudioPath", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("City", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("StationID", "STRING", mode="REQUIRED"),
-            ]
-            self.upload_audio(
-                local_path=audio_csv_path,
-                gcs_folder="animal_audio",
-                path_col="AudioPath",
-                table_id="audio_data_files",
-                schema=audio_schema
-            )
+        print(f"Syncing AudioData with animal audio to BigQuery (SF={scale_factor})...")
+        audio_schema = [
+            bigquery.SchemaField("Animal", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("AudioPath", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("City", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("StationID", "STRING", mode="REQUIRED"),
+        ]
+        fingerprint = self.upload_audio(
+            local_path=audio_csv_path,
+            gcs_folder="animal_audio",
+            path_col="AudioPath",
+            table_id="audio_data_files",
+            schema=audio_schema,
+            synced_table_id="audio_data_mm",
+        )
+        if fingerprint is not None:
             self.finalize_audio_upload(
                 table_name="audio_data_external",
                 table_name_multimodal="audio_data_mm",
@@ -392,6 +247,4 @@ class BigQueryAnimalsSetup:
                 url_col="AudioPath",
                 bucket=f"gs://{self.gcs_bucket_name}/animal_audio/*"
             )
-            self.mark_data_synchronized(audio_csv_path)
-        else:
-            print(f"AudioData tables exist and are synchronized (SF={scale_factor}), skipping upload.")
\ No newline at end of file
+            set_table_fingerprint(self.bq_client, self.table_path("audio_data_mm"), fingerprint)
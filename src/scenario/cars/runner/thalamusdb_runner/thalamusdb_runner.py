@@ -5,9 +5,9 @@ ThalamusDB system runner implementation for Cars scenario.
 from pathlib import Path
 import sys
 import duckdb
-import pandas as pd
 
 sys.path.append(str(Path(__file__).parent.parent.parent.parent))
+from runner.duckdb_catalog import TableSource, build_catalog
 from runner.generic_thalamusdb_runner.generic_thalamusdb_runner import GenericThalamusDBRunner
 
 
@@ -33,59 +33,60 @@ class ThalamusDBRunner(GenericThalamusDBRunner):
             skip_setup=skip_setup
         )
 
-        # Now create the tables if they don't exist
-        conn = duckdb.connect(str(db_path))
-        tables = conn.execute("SHOW TABLES").fetchall()
-
-        if len(tables) == 0:
-            # Read CSVs and create tables
-            cars_df = pd.read_csv(f"{db_folder}/car_data_{scale_factor}.csv")
-            audio_df = pd.read_csv(f"{db_folder}/audio_car_data_{scale_factor}.csv")
-            complaints_df = pd.read_csv(f"{db_folder}/text_complaints_data_{scale_factor}.csv")
-            images_df = pd.read_csv(f"{db_folder}/image_car_data_{scale_factor}.csv")
-
-            # Convert relative paths to absolute paths
-            # The paths in CSVs are relative to the repository root
-            repo_root = Path(__file__).resolve().parents[5]
-
-            if 'audio_path' in audio_df.columns:
-                audio_df['audio_path'] = audio_df['audio_path'].apply(
-                    lambda x: str(repo_root / x) if pd.notna(x) and not Path(x).is_absolute() else x
-                )
-
-            if 'image_path' in images_df.columns:
-                images_df['image_path'] = images_df['image_path'].apply(
-                    lambda x: str(repo_root / x) if pd.notna(x) and not Path(x).is_absolute() else x
-                )
+        # Build the tables, skipping the ones whose CSV did not change
+        # The paths in the media CSVs are relative to the repository root
+        repo_root = Path(__file__).resolve().parents[5]
 
-            # Create tables
-            conn.execute("CREATE TABLE cars AS SELECT * FROM cars_df")
-            conn.execute("CREATE TABLE car_audio AS SELECT * FROM audio_df")
-            conn.execute("CREATE TABLE car_complaints AS SELECT * FROM complaints_df")
-            conn.execute("CREATE TABLE car_images AS SELECT * FROM images_df")
-
-            # Create intermediate table for Q6 (XOR logic query)
-            # This table contains cars with at least 2 modalities
-            create_two_more_modalities = """
-            CREATE OR REPLACE TABLE two_more_modalities AS (
-                SELECT
-                    cars.car_id,
-                    cars.year,
-                    car_complaints.complaint_id,
-                    car_complaints.summary,
-                    car_images.image_id,
-                    car_images.image_path,
-                    car_audio.audio_id,
-                    car_audio.audio_path
-                FROM cars
-                LEFT JOIN car_images ON cars.car_id = car_images.car_id
-                LEFT JOIN car_audio ON cars.car_id = car_audio.car_id
-                LEFT JOIN car_complaints ON cars.car_id = car_complaints.car_id
-                WHERE (car_audio.audio_id IS NOT NULL AND car_complaints.complaint_id IS NOT NULL) OR
-                      (car_images.image_id IS NOT NULL AND car_complaints.complaint_id IS NOT NULL) OR
-                      (car_images.image_id IS NOT NULL AND car_audio.audio_id IS NOT NULL)
+        def absolute(column):
+            return (
+                f"CASE WHEN {column} IS NULL OR {column} LIKE '/%' THEN {column} "
+                f"ELSE '{repo_root}/' || {column} END AS {column}"
             )
-            """
-            conn.execute(create_two_more_modalities)
+
+        conn = duckdb.connect(str(db_path))
+        build_catalog(
+            conn,
+            [
+                TableSource("cars", f"{db_folder}/car_data_{scale_factor}.csv"),
+                TableSource(
+                    "car_audio",
+                    f"{db_folder}/audio_car_data_{scale_factor}.csv",
+                    columns=f"* REPLACE ({absolute('audio_path')})",
+                ),
+                TableSource(
+                    "car_complaints",
+                    f"{db_folder}/text_complaints_data_{scale_factor}.csv",
+                ),
+                TableSource(
+                    "car_images",
+                    f"{db_folder}/image_car_data_{scale_factor}.csv",
+                    columns=f"* REPLACE ({absolute('image_path')})",
+                ),
+                # Intermediate table for Q6 (XOR logic query)
+                # This table contains cars with at least 2 modalities
+                TableSource(
+                    "two_more_modalities",
+                    query="""
+                    SELECT
+                        cars.car_id,
+                        cars.year,
+                        car_complaints.complaint_id,
+                        car_complaints.summary,
+                        car_images.image_id,
+                        car_images.image_path,
+                        car_audio.audio_id,
+                        car_audio.audio_path
+                    FROM cars
+                    LEFT JOIN car_images ON cars.car_id = car_images.car_id
+                    LEFT JOIN car_audio ON cars.car_id = car_audio.car_id
+                    LEFT JOIN car_complaints ON cars.car_id = car_complaints.car_id
+                    WHERE (car_audio.audio_id IS NOT NULL AND car_complaints.complaint_id IS NOT NULL) OR
+                          (car_images.image_id IS NOT NULL AND car_complaints.complaint_id IS NOT NULL) OR
+                          (car_images.image_id IS NOT NULL AND car_audio.audio_id IS NOT NULL)
+                    """,
+                    depends_on=["cars", "car_audio", "car_complaints", "car_images"],
+                ),
+            ],
+        )
 
         conn.close()
@@ -2,9 +2,14 @@ import pandas as pd
 from google.cloud import storage, bigquery
 from google.api_core.exceptions import NotFound
 import os
-import uuid
-import concurrent.futures
-import hashlib
+
+from runner.generic_bigquery_runner.gcs_sync import (
+    compute_fingerprint,
+    get_or_create_bucket,
+    set_table_fingerprint,
+    sync_listed_files,
+    table_is_current,
+)
 
 
 PROJECT_ID = "bq-mm-benchmark"
@@ -21,20 +26,6 @@ class BigQueryCarsSetup:
         self.bq_client = bigquery.Client(project=PROJECT_ID)
         self.gcs_bucket_name = f"{self.bq_client.project}-cars_dataset"
 
-    def upload_file_to_gcs(self, bucket_name, local_file_path, gcs_destination_blob_name, add_cols):
-        try:
-            bucket = self.gcs_client.bucket(bucket_name)
-            blob = bucket.blob(gcs_destination_blob_name)
-
-            blob.upload_from_filename(local_file_path)
-
-            gcs_uri = f"gs://{bucket_name}/{gcs_destination_blob_name}"
-
-            return [gcs_uri] + add_cols
-        except Exception as e:
-            print(f"  Error uploading '{local_file_path}': {e}")
-            return None 
-
     def create_bq_dataset_and_table(self, dataset_id, table_id, location, schema):
         """Creates the BigQuery dataset and table if they don't exist."""
         dataset_ref = self.bq_client.dataset(dataset_id)
@@ -72,69 +63,33 @@ class BigQueryCarsSetup:
         job.result()
 
 
-    def upload_images(self, local_path: str, gcs_folder: str, path_col: str, table_id: str):
+    def upload_images(self, local_path: str, gcs_folder: str, path_col: str, table_id: str,
+                      synced_table_id: str = None):
+        """
+        Sync the images (or audio files) listed in a CSV to GCS and load their metadata into BigQuery.
+
+        Only files whose checksum differs from the GCS object are uploaded. The load job
+        is skipped if synced_table_id carries the fingerprint of the CSV, the files and
+        the schema.
+
+        Returns:
+            The fingerprint to store on synced_table_id once the caller has finished
+            building it, or None if it is up to date or nothing could be uploaded.
+        """
         if not os.path.exists(local_path):
             print(f"No files found in '{local_path}'. Skipping.")
-            return
+            return None
 
         full_df = pd.read_csv(local_path)
-        all_files_to_upload = []
-        for _, row in full_df.iterrows():
-            local_file_path = row[path_col]
-            if not os.path.exists(local_file_path):
-                print(f"Warning: File {local_file_path} does not exist. Skipping.")
-                continue
-            blob_file_name = os.path.join(gcs_folder, local_file_path.split("/")[-1])
-            all_files_to_upload.append((row[full_df.columns[full_df.columns != path_col].tolist()].to_list(), local_file_path, blob_file_name))
-
-        # Create a bucket if it doesn't exist
-        bucket = self.gcs_client.lookup_bucket(self.gcs_bucket_name)
-        if bucket is None:
-            print(f"Bucket {self.gcs_bucket_name} not found. Creating it...")
-            bucket = self.gcs_client.create_bucket(self.gcs_bucket_name)
-
-        # Clean up old files in the GCS folder to ensure fresh upload
-        print(f"Cleaning up old files in gs://{self.gcs_bucket_name}/{gcs_folder}/...")
-        blobs_to_delete = list(bucket.list_blobs(prefix=f"{gcs_folder}/"))
-        if blobs_to_delete:
-            print(f"  Deleting {len(blobs_to_delete)} old files in parallel...")
-            with concurrent.futures.ThreadPoolExecutor(max_workers=20) as delete_executor:
-                delete_futures = [delete_executor.submit(blob.delete) for blob in blobs_to_delete]
-                concurrent.futures.wait(delete_futures)
-            print(f"  Cleanup completed!")
-        else:
-            print(f"  No old files to delete.")
-
-        # Write images to GCS
-        records = []
-        total_files = len(all_files_to_upload)
-        print(f"Uploading {total_files} files to GCS with 20 concurrent workers...")
-        completed = 0
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-            future_to_file = {
-                executor.submit(self.upload_file_to_gcs, self.gcs_bucket_name, local_path, gcs_blob_name, add_cols):
-                local_path for add_cols, local_path, gcs_blob_name in all_files_to_upload
-            }
-            for future in concurrent.futures.as_completed(future_to_file):
-                local_path = future_to_file[future]
-                try:
-                    res = future.result()
-                    if res:
-                        record_dict = {col_name: val for col_name, val in zip(full_df.columns[full_df.columns != path_col], res[1:])}
-                        record_dict[path_col] = res[0]
-                        records.append(record_dict)
-                    completed += 1
-                    if completed % 10 == 0 or completed == total_files:
-                        print(f"  Progress: {completed}/{total_files} files uploaded ({100*completed//total_files}%)")
-                except Exception as exc:
-                    print(f"'{local_path}' generated an exception: {exc}")
-                    completed += 1
-
-        if not records:
-            print("No images were uploaded to GCS. Skipping BigQuery upload.")
-            return
+        bucket = get_or_create_bucket(self.gcs_client, self.gcs_bucket_name)
+        df_image_data, sync = sync_listed_files(bucket, full_df, path_col, gcs_folder)
+        print(f"Synced gs://{self.gcs_bucket_name}/{gcs_folder}/: {sync.summary()}")
+        for blob_name, exc in sync.failed.items():
+            print(f"  Error uploading '{blob_name}': {exc}")
 
-        df_image_data = pd.DataFrame(records)
+        if df_image_data.empty:
+            print("No images were uploaded to GCS. Skipping BigQuery upload.")
+            return None
 
         if "audio" not in table_id:
             bq_schema = [
@@ -149,6 +104,11 @@ class BigQueryCarsSetup:
                 bigquery.SchemaField("audio_id", "INTEGER", mode="REQUIRED"),
             ]
 
+        fingerprint = compute_fingerprint(local_path, sync.fingerprint, bq_schema)
+        if table_is_current(self.bq_client, self.table_path(synced_table_id or table_id), fingerprint):
+            print(f"BigQuery table {synced_table_id or table_id} is up to date, skipping load.")
+            return None
+
         bq_table_ref = self.create_bq_dataset_and_table(BQ_DATASET_ID, table_id, BQ_TABLE_LOCATION, bq_schema)
 
         try:
@@ -156,6 +116,8 @@ class BigQueryCarsSetup:
             print(f"Files uploaded to GCS and metadata loaded into BigQuery table {table_id}!")
         except Exception as e:
             print(f"An error occurred during BigQuery upload: {e}")
+            return None
+        return fingerprint
 
     def upload_csv_to_bigquery(self, dataset_id: str, csv_file_path: str, table_name: str):
             print(f"Uploading data into table {table_name} from {csv_file_path}...")
@@ -210,70 +172,18 @@ class BigQueryCarsSetup:
             print(f"An error occurred: {e}")
             return False
 
-    def get_table_row_count(self, table_id):
-        """Get the number of rows in a BigQuery table."""
-        table_full_id = f"{PROJECT_ID}.{BQ_DATASET_ID}.{table_id}"
-        try:
-            query = f"SELECT COUNT(*) as row_count FROM `{table_full_id}`"
-            result = self.bq_client.query(query).result()
-            return next(result).row_count
-        except Exception as e:
-            print(f"Error getting row count for {table_id}: {e}")
-            return -1
-
-    def get_local_csv_hash(self, file_path):
-        """Get hash of local CSV file content."""
-        if not os.path.exists(file_path):
-            return None
-
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-
-    def is_data_synchronized(self, local_csv_path, table_id):
-        """Check if local CSV data matches cloud table data."""
-        if not os.path.exists(local_csv_path):
-            print(f"Local file {local_csv_path} not found")
-            return False
-
-        if not self.table_exists(table_id):
-            return False
-
-        # Quick check: compare row counts
-        local_df = pd.read_csv(local_csv_path)
-        local_row_count = len(local_df)
-        cloud_row_count = self.get_table_row_count(table_id)
-
-        if local_row_count != cloud_row_count:
-            print(f"Row count mismatch for {table_id}: local={local_row_count}, cloud={cloud_row_count}")
-            return False
+    def table_path(self, table_id):
+        return f"{PROJECT_ID}.{BQ_DATASET_ID}.{table_id}"
 
-        # Additional check: file modification time vs last upload
-        # Store hash for future comparison
-        hash_file = f"{local_csv_path}.hash"
-        current_hash = self.get_local_csv_hash(local_csv_path)
-
-        if os.path.exists(hash_file):
-            with open(hash_file, 'r') as f:
-                stored_hash = f.read().strip()
-            if current_hash != stored_hash:
-                print(f"Local file {local_csv_path} has changed since last upload")
-                return False
-        else:
-            # First time, assume sync needed
-            return False
-
-        return True
-
-    def mark_data_synchronized(self, local_csv_path):
-        """Mark local data as synchronized by storing its hash."""
-        current_hash = self.get_local_csv_hash(local_csv_path)
-        if current_hash:
-            hash_file = f"{local_csv_path}.hash"
-            with open(hash_file, 'w') as f:
-                f.write(current_hash)
+    def sync_csv_table(self, csv_path: str, table_name: str, label: str, scale_factor: int):
+        """Load a CSV into BigQuery unless the table carries the fingerprint of the same file."""
+        fingerprint = compute_fingerprint(csv_path)
+        if table_is_current(self.bq_client, self.table_path(table_name), fingerprint):
+            print(f"{label} table exists and is synchronized (SF={scale_factor}), skipping upload.")
+            return
+        print(f"Uploading/updating {label.lower()} data to BigQuery (SF={scale_factor})...")
+        self.upload_csv_to_bigquery(BQ_DATASET_ID, csv_file_path=csv_path, table_name=table_name)
+        set_table_fingerprint(self.bq_client, self.table_path(table_name), fingerprint)
 
     def setup_data(self, scale_factor: int = 157376, data_dir: str = "files/cars/data/"):
         """Setup BigQuery tables for cars scenario.
@@ -290,18 +200,18 @@ class BigQueryCarsSetup:
         dataset.location = "US"
         self.bq_client.create_dataset(dataset, exists_ok=True)
 
-        # Upload car images
+        # Media is synced by checksum; the tables are only rebuilt when the fingerprint
+        # of the CSV and files differs from the one stored on the multimodal table
         image_csv_path = os.path.join(actual_data_dir, f"image_car_data_{scale_factor}.csv")
-        needs_upload = not self.is_data_synchronized(image_csv_path, "car_images")
-
-        if needs_upload:
-            print(f"Uploading/updating car images to BigQuery (SF={scale_factor})...")
-            self.upload_images(
-                local_path=image_csv_path,
-                gcs_folder="car_images",
-                path_col="image_path",
-                table_id="car_images"
-            )
+        print(f"Syncing car images to BigQuery (SF={scale_factor})...")
+        fingerprint = self.upload_images(
+            local_path=image_csv_path,
+            gcs_folder="car_images",
+            path_col="image_path",
+            table_id="car_images",
+            synced_table_id="car_mm",
+        )
+        if fingerprint is not None:
             self.finalize_image_upload(
                 table_name="cars_images",
                 table_name_multimodal="car_mm",
@@ -309,22 +219,19 @@ class BigQueryCarsSetup:
                 url_col="image_path",
                 bucket="gs://bq-mm-benchmark-cars_dataset/car_images/*"
             )
-            self.mark_data_synchronized(image_csv_path)
-        else:
-            print(f"Car images tables exist and are synchronized (SF={scale_factor}), skipping upload.")
+            set_table_fingerprint(self.bq_client, self.table_path("car_mm"), fingerprint)
 
         # Upload car audio
         audio_csv_path = os.path.join(actual_data_dir, f"audio_car_data_{scale_factor}.csv")
-        needs_upload = not self.is_data_synchronized(audio_csv_path, "car_audio")
-
-        if needs_upload:
-            print(f"Uploading/updating car audio to BigQuery (SF={scale_factor})...")
-            self.upload_images(
-                local_path=audio_csv_path,
-                gcs_folder="car_audios",
-                path_col="audio_path",
-                table_id="car_audio"
-            )
+        print(f"Syncing car audio to BigQuery (SF={scale_factor})...")
+        fingerprint = self.upload_images(
+            local_path=audio_csv_path,
+            gcs_folder="car_audios",
+            path_col="audio_path",
+            table_id="car_audio",
+            synced_table_id="audio_mm",
+        )
+        if fingerprint is not None:
             self.finalize_image_upload(
                 table_name="cars_audios",
                 table_name_multimodal="audio_mm",
@@ -332,34 +239,20 @@ class BigQueryCarsSetup:
                 url_col="audio_path",
                 bucket="gs://bq-mm-benchmark-cars_dataset/car_audios/*"
             )
-            self.mark_data_synchronized(audio_csv_path)
-        else:
-            print(f"Car audio tables exist and are synchronized (SF={scale_factor}), skipping upload.")
+            set_table_fingerprint(self.bq_client, self.table_path("audio_mm"), fingerprint)
 
         # Upload car metadata (cars table)
         cars_csv_path = os.path.join(actual_data_dir, f"car_data_{scale_factor}.csv")
         if not os.path.exists(cars_csv_path):
             print(f"Warning: {cars_csv_path} not found, skipping cars table upload")
         else:
-            needs_upload = not self.is_data_synchronized(cars_csv_path, "cars")
-            if needs_upload or not self.table_exists("cars"):
-                print(f"Uploading/updating cars data to BigQuery (SF={scale_factor})...")
-                self.upload_csv_to_bigquery(BQ_DATASET_ID, csv_file_path=cars_csv_path, table_name='cars')
-                self.mark_data_synchronized(cars_csv_path)
-            else:
-                print(f"Cars table exists and is synchronized (SF={scale_factor}), skipping upload.")
+            self.sync_csv_table(cars_csv_path, "cars", "Cars", scale_factor)
 
         # Upload complaints
         complaints_csv_path = os.path.join(actual_data_dir, f"text_complaints_data_{scale_factor}.csv")
         if not os.path.exists(complaints_csv_path):
             print(f"Warning: {complaints_csv_path} not found, skipping complaints table upload")
         else:
-            needs_upload = not self.is_data_synchronized(complaints_csv_path, "complaints")
-            if needs_upload or not self.table_exists("complaints"):
-                print(f"Uploading/updating complaints data to BigQuery (SF={scale_factor})...")
-                self.upload_csv_to_bigquery(BQ_DATASET_ID, csv_file_path=complaints_csv_path, table_name='complaints')
-                self.mark_data_synchronized(complaints_csv_path)
-            else:
-                print(f"Complaints table exists and is synchronized (SF={scale_factor}), skipping upload.")
+            self.sync_csv_table(complaints_csv_path, "complaints", "Complaints", scale_factor)
 
         print("Data setup completed successfully!")
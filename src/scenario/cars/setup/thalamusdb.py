@@ -8,6 +8,9 @@ import duckdb
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+from runner.duckdb_catalog import TableSource, build_catalog
+from runner.generic_flockmtl_runner.batch_tuning import ensure_model
+
 CARS_FILES_DIR = os.path.abspath(
     Path(__file__).resolve().parents[4] / "files" / "cars" / "data"
 )
@@ -31,47 +34,31 @@ class ThalamusDBCarsSetup:
                 f"""CREATE SECRET (TYPE OPENAI,API_KEY '{os.environ.get('OPENAI_API_KEY')}');"""
             )
 
-            if not model_name in self.thalamusdb_conn.execute("GET MODELS;").fetchdf()["model"].tolist():
-                self.thalamusdb_conn.execute("""
-                    CREATE MODEL(
-                    'model_name',
-                    'model_name',
-                    'openai',
-                    {"tuple_format": "json", "batch_size": 32, "model_parameters": {"temperature": 0.7}}
-                    );
-                """.replace("model_name", model_name))
-
-
-    def _upload_file_to_db(self, csv_path: str, table_name: str):
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError(f"File not found at path: {csv_path}. Please run the download script first.")
-
-        self.thalamusdb_conn.execute(f"""
-            CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_csv_auto('{csv_path}');
-            """)
-
+            ensure_model(self.thalamusdb_conn, model_name)
 
     def setup_data(self, data_dir: str, scale_factor: int = 157376):
         sf_dir = os.path.join(data_dir, "data", f"sf_{scale_factor}")
 
-        self._upload_file_to_db(
-            csv_path=os.path.join(sf_dir, f"car_data_{scale_factor}.csv"),
-            table_name="cars"
-        )
-
-        self._upload_file_to_db(
-            csv_path=os.path.join(sf_dir, f"audio_car_data_{scale_factor}.csv"),
-            table_name="car_audio"
-        )
-
-        self._upload_file_to_db(
-            csv_path=os.path.join(sf_dir, f"text_complaints_data_{scale_factor}.csv"),
-            table_name="car_complaints"
-        )
-
-        self._upload_file_to_db(
-            csv_path=os.path.join(sf_dir, f"image_car_data_{scale_factor}.csv"),
-            table_name="car_images"
+        build_catalog(
+            self.thalamusdb_conn,
+            [
+                TableSource(
+                    "cars",
+                    os.path.join(sf_dir, f"car_data_{scale_factor}.csv"),
+                ),
+                TableSource(
+                    "car_audio",
+                    os.path.join(sf_dir, f"audio_car_data_{scale_factor}.csv"),
+                ),
+                TableSource(
+                    "car_complaints",
+                    os.path.join(sf_dir, f"text_complaints_data_{scale_factor}.csv"),
+                ),
+                TableSource(
+                    "car_images",
+                    os.path.join(sf_dir, f"image_car_data_{scale_factor}.csv"),
+                ),
+            ],
         )
 
     def get_connection(self):
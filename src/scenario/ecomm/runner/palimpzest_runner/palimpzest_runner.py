@@ -14,6 +14,7 @@ from runner.generic_runner import GenericQueryMetric, GenericRunner
 sys.path.append(str(Path(__file__).parent.parent.parent.parent))
 from runner.generic_palimpzest_runner.generic_palimpzest_runner import (
     GenericPalimpzestRunner,
+    palimpzest_operator_metrics,
 )
 
 
@@ -59,6 +60,9 @@ class PalimpzestRunner(GenericPalimpzestRunner):
             )
             metric.status = "success"
             metric.money_cost = results.execution_stats.total_execution_cost
+            metric.operators = palimpzest_operator_metrics(
+                results.execution_stats
+            )
 
         except Exception as e:
             metric.status = "failed"
@@ -1,32 +1,30 @@
 import os
 import duckdb
-import pandas as pd
+
+from runner.duckdb_catalog import TableSource, build_catalog
 
 
 class ThalamusDBEcommSetup:
     def setup_data(self, data_dir: str):
         db_path = os.path.join(data_dir, "thalamusdb.duckdb")
-        if os.path.exists(db_path):
-            os.remove(db_path)
 
+        # Tables are only rebuilt when a Parquet file changed.
         con = duckdb.connect(db_path)
-        con.execute(f"set file_search_path = '{data_dir}'")
-        con.execute(
-            f"""CREATE OR REPLACE TABLE styles_details AS
-            SELECT 
-              *,
-              -- ThalamusDB cannot execute semantic filters on expressions or multiple columns, so we have to manually concatenate and materialize them.
-              -- Further, ThalamusDB cannot deal with columns containing strings with single quotes, so we remove them.
-              replace(productDisplayName || ' ' || productDescriptors.description.value, '''', '') AS full_product_description
-            FROM 'styles_details.parquet'
-            """
-        )
-        con.execute(
-            f"""CREATE OR REPLACE TABLE image_mapping AS
-            SELECT
-              *,
-              '{os.path.join(data_dir, 'images', '')}' || filename AS local_image_path
-            FROM 'image_mapping.parquet'
-            """
+        build_catalog(
+            con,
+            [
+                TableSource(
+                    "styles_details",
+                    os.path.join(data_dir, "styles_details.parquet"),
+                    # ThalamusDB cannot execute semantic filters on expressions or multiple columns, so we have to manually concatenate and materialize them.
+                    # Further, ThalamusDB cannot deal with columns containing strings with single quotes, so we remove them.
+                    columns="*, replace(productDisplayName || ' ' || productDescriptors.description.value, '''', '') AS full_product_description",  # noqa: E501
+                ),
+                TableSource(
+                    "image_mapping",
+                    os.path.join(data_dir, "image_mapping.parquet"),
+                    columns=f"*, '{os.path.join(data_dir, 'images', '')}' || filename AS local_image_path",  # noqa: E501
+                ),
+            ],
         )
         con.close()
@@ -15,6 +15,7 @@ from runner.generic_runner import GenericQueryMetric, GenericRunner
 sys.path.append(str(Path(__file__).parent.parent.parent.parent))
 from runner.generic_palimpzest_runner.generic_palimpzest_runner import (
     GenericPalimpzestRunner,
+    palimpzest_operator_metrics,
 )
 
 
@@ -70,6 +71,10 @@ class PalimpzestRunner(GenericPalimpzestRunner):
                 if not isinstance(results, tuple)
                 else results[1]
             )
+            if not isinstance(results, tuple):
+                metric.operators = palimpzest_operator_metrics(
+                    results.execution_stats
+                )
 
         except Exception as e:
             metric.status = "failed"
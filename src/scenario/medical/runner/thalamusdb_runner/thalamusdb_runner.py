@@ -25,6 +25,7 @@ from scenario.medical.setup.flockmtl import FlockMTLMedicalSetup
 # sys.path.insert(0, tdb_path)
 # end of local codes version
 
+from runner.duckdb_catalog import TableSource, build_catalog
 from runner.generic_thalamusdb_runner.generic_thalamusdb_runner import (
     GenericThalamusDBRunner,
 )
@@ -77,21 +78,33 @@ class ThalamusDBRunner(GenericThalamusDBRunner):
             )
 
             # Create intermediates for query 6, workaround for WITH ... AS
-            create_t1 = """
-            CREATE OR REPLACE TABLE audio_denorm AS(
-                SELECT patient_id, location, MAX(IF(filtration_type = 'bell', path, NULL)) AS bell_audio, MAX(IF(filtration_type = 'bell', audio_id, NULL)) AS bell_audio_id, MAX(IF(filtration_type = 'extended', path, NULL)) AS extended_audio, MAX(IF(filtration_type = 'extended', audio_id, NULL)) AS extended_audio_id, MAX(IF(filtration_type = 'diaphragm', path, NULL)) AS diaphragm_audio, MAX(IF(filtration_type = 'diaphragm', audio_id, NULL)) AS diaphragm_audio_id FROM lung_audio GROUP BY patient_id, location
+            # (only rebuilt when the tables they are built from changed)
+            build_catalog(
+                db.get_connection(),
+                [
+                    TableSource(
+                        "audio_denorm",
+                        query="""
+                        SELECT patient_id, location, MAX(IF(filtration_type = 'bell', path, NULL)) AS bell_audio, MAX(IF(filtration_type = 'bell', audio_id, NULL)) AS bell_audio_id, MAX(IF(filtration_type = 'extended', path, NULL)) AS extended_audio, MAX(IF(filtration_type = 'extended', audio_id, NULL)) AS extended_audio_id, MAX(IF(filtration_type = 'diaphragm', path, NULL)) AS diaphragm_audio, MAX(IF(filtration_type = 'diaphragm', audio_id, NULL)) AS diaphragm_audio_id FROM lung_audio GROUP BY patient_id, location
+                        """,
+                        depends_on=["lung_audio"],
+                    ),
+                    TableSource(
+                        "two_more_modalities",
+                        query="""
+                        SELECT patients.patient_id, patients.age, symptoms_texts.symptom_id, symptoms_texts.symptoms, x_ray_images.xray_id, x_ray_images.image_path, audio_denorm.bell_audio_id, audio_denorm.bell_audio, audio_denorm.extended_audio_id, audio_denorm.extended_audio, audio_denorm.diaphragm_audio_id, audio_denorm.diaphragm_audio
+                        FROM patients
+                        LEFT JOIN audio_denorm ON patients.patient_id = audio_denorm.patient_id
+                        LEFT JOIN symptoms_texts ON patients.patient_id = symptoms_texts.patient_id
+                        LEFT JOIN x_ray_images ON patients.patient_id = x_ray_images.patient_id
+                        WHERE (audio_denorm.bell_audio_id IS NOT NULL AND symptoms_texts.symptom_id IS NOT NULL) OR (x_ray_images.xray_id IS NOT NULL AND symptoms_texts.symptom_id IS NOT NULL) OR (x_ray_images.xray_id IS NOT NULL AND audio_denorm.bell_audio_id IS NOT NULL)
+                        """,
+                        depends_on=[
+                            "patients",
+                            "audio_denorm",
+                            "symptoms_texts",
+                            "x_ray_images",
+                        ],
+                    ),
+                ],
             )
-            """
-            db.run_query(create_t1)
-
-            create_t2 = """
-            CREATE OR REPLACE TABLE two_more_modalities AS(
-                SELECT patients.patient_id, patients.age, symptoms_texts.symptom_id, symptoms_texts.symptoms, x_ray_images.xray_id, x_ray_images.image_path, audio_denorm.bell_audio_id, audio_denorm.bell_audio, audio_denorm.extended_audio_id, audio_denorm.extended_audio, audio_denorm.diaphragm_audio_id, audio_denorm.diaphragm_audio
-                FROM patients
-                LEFT JOIN audio_denorm ON patients.patient_id = audio_denorm.patient_id
-                LEFT JOIN symptoms_texts ON patients.patient_id = symptoms_texts.patient_id
-                LEFT JOIN x_ray_images ON patients.patient_id = x_ray_images.patient_id
-                WHERE (audio_denorm.bell_audio_id IS NOT NULL AND symptoms_texts.symptom_id IS NOT NULL) OR (x_ray_images.xray_id IS NOT NULL AND symptoms_texts.symptom_id IS NOT NULL) OR (x_ray_images.xray_id IS NOT NULL AND audio_denorm.bell_audio_id IS NOT NULL)
-            )
-            """
-            db.run_query(create_t2)
@@ -9,9 +9,7 @@ from src.runner.generic_lotus_runner.generic_lotus_runner import (
 )
 
 # Import additional modules for approximate policy
-from lotus.models import SentenceTransformersRM
 from lotus.types import CascadeArgs
-from lotus.vector_store import FaissVS
 
 
 class LotusRunner(GenericLotusRunner):
@@ -44,9 +42,9 @@ class LotusRunner(GenericLotusRunner):
         # Initialize components for approximate policy
         if hasattr(self, "policy") and self.policy == "approximate":
             # Initialize both embedding models for mixed modality support
-            self.rm_text = SentenceTransformersRM(model="intfloat/e5-base-v2")
-            self.rm_image = SentenceTransformersRM("clip-ViT-B-32")
-            self.vs = FaissVS()
+            self.rm_text = self._create_retrieval_model("intfloat/e5-base-v2")
+            self.rm_image = self._create_retrieval_model("clip-ViT-B-32")
+            self.vs = self._create_vector_store()
             self.cascade_args = CascadeArgs(
                 recall_target=0.8, precision_target=0.8
             )
@@ -4,6 +4,7 @@ from typing import Any, Dict
 
 import duckdb
 
+from runner.duckdb_catalog import TableSource, build_catalog
 from runner.generic_thalamusdb_runner.generic_thalamusdb_runner import (
     GenericThalamusDBRunner,
 )
@@ -43,46 +44,26 @@ class ThalamusDBRunner(GenericThalamusDBRunner):
             skip_setup=skip_setup
         )
 
-        # Now create the tables if they don't exist (data should be generated by now)
-        # Note: The database file may already exist (created by parent init),
-        # so we check for tables instead of file existence
+        # Now build the tables (data should be generated by now), skipping
+        # the ones whose CSV did not change
         conn = duckdb.connect(db_path)
-        tables = conn.execute("SHOW TABLES").fetchall()
-
-        if len(tables) == 0:
-            self.conn = conn
-            self._setup_data(data_dir=db_folder)
-        else:
-            conn.close()
-
-    def _add_table(self, csv_filepath: str, table_name: str) -> None:
-        if not os.path.exists(csv_filepath):
-            raise FileNotFoundError(f"CSV file not found: {csv_filepath}")
-
-        self.conn.execute(
-            f"CREATE TABLE IF NOT EXISTS {table_name} AS SELECT * FROM read_csv_auto('{csv_filepath}')"  # noqa: E501
-        )
-
-    def _setup_data(self, data_dir: str) -> None:
-        self._add_table(
-            os.path.join(data_dir, "ap_warrior.csv"),
-            table_name="ap_warrior",
-        )
-
-        self._add_table(
-            os.path.join(data_dir, "lizzy_caplan_text_data.csv"),
-            table_name="movies",
-        )
-
-        self._add_table(
-            os.path.join(data_dir, "tampa_international_airport.csv"),
-            table_name="tampa_airport",
-        )
-
-        self._add_table(
-            os.path.join(data_dir, "thalamusdb_images.csv"),
-            table_name="images",
+        build_catalog(
+            conn,
+            [
+                TableSource("ap_warrior", os.path.join(db_folder, "ap_warrior.csv")),
+                TableSource(
+                    "movies", os.path.join(db_folder, "lizzy_caplan_text_data.csv")
+                ),
+                TableSource(
+                    "tampa_airport",
+                    os.path.join(db_folder, "tampa_international_airport.csv"),
+                ),
+                TableSource(
+                    "images", os.path.join(db_folder, "thalamusdb_images.csv")
+                ),
+            ],
         )
+        conn.close()
 
     def _execute_q1(self):
         raise NotImplementedError(
@@ -1,7 +1,14 @@
 import os
 
 from google.cloud import bigquery, storage
-from google.cloud.storage import transfer_manager
+
+from runner.generic_bigquery_runner.gcs_sync import (
+    compute_fingerprint,
+    get_or_create_bucket,
+    set_table_fingerprint,
+    sync_files,
+    table_is_current,
+)
 
 
 class BigQueryMMQASetup:
@@ -15,9 +22,13 @@ class BigQueryMMQASetup:
     def _upload_csv_to_bigquery(
         self, dataset_id: str, csv_file_path: str, table_name: str
     ):
-        print(f"Uploading data into table {table_name} from {csv_file_path}...")
-
         table_id = f"{dataset_id}.{table_name}"
+        fingerprint = compute_fingerprint(csv_file_path)
+        if table_is_current(self.bq_client, table_id, fingerprint):
+            print(f"Table {table_name} is up to date, skipping upload.")
+            return
+
+        print(f"Uploading data into table {table_name} from {csv_file_path}...")
 
         with open(csv_file_path, "rb") as source_file:
             load_job = self.bq_client.load_table_from_file(
@@ -31,42 +42,31 @@ class BigQueryMMQASetup:
                 ),
             )
         load_job.result()
+        set_table_fingerprint(self.bq_client, table_id, fingerprint)
 
     def _upload_images_to_gcs(
         self, dataset_id, table_name, bucket_name: str, images_dir: str
     ):
-        print(
-            f"Uploading images from {images_dir} to GCS bucket {bucket_name}..."
-        )
-        storage_client = storage.Client()
-        bucket = storage_client.lookup_bucket(bucket_name)
-        if bucket is None:
-            print(f"Bucket {bucket_name} not found. Creating it...")
-            bucket = storage_client.create_bucket(bucket_name)
-        else:
-            # Clear existing images in bucket to ensure clean state for new scale factor
-            print(f"Clearing existing images from bucket {bucket_name}...")
-            blobs = list(bucket.list_blobs())
-            if blobs:
-                bucket.delete_blobs(blobs)
-                print(f"Deleted {len(blobs)} existing images from bucket.")
+        print(f"Syncing images from {images_dir} to GCS bucket {bucket_name}...")
+        bucket = get_or_create_bucket(storage.Client(), bucket_name)
 
-        string_paths = []
-        for f in os.listdir(images_dir):
-            if f.endswith(".jpg") or f.endswith(".png"):
-                string_paths.append(f)
+        # Only changed images are uploaded; images that are no longer part of
+        # the data (e.g. after switching scale factor) are deleted
+        files = {
+            f: os.path.join(images_dir, f)
+            for f in os.listdir(images_dir)
+            if f.endswith(".jpg") or f.endswith(".png")
+        }
+        sync = sync_files(bucket, files)
+        print(f"Synced gs://{bucket_name}/: {sync.summary()}")
+        for name, exc in sync.failed.items():
+            print("Failed to upload {} due to exception: {}".format(name, exc))
 
-        results = transfer_manager.upload_many_from_filenames(
-            bucket, string_paths, source_directory=images_dir, max_workers=16
-        )
-
-        for name, result in zip(string_paths, results):
-            if isinstance(result, Exception):
-                print(
-                    "Failed to upload {} due to exception: {}".format(
-                        name, result
-                    )
-                )
+        table_id = f"{dataset_id}.{table_name}"
+        fingerprint = compute_fingerprint(sync.fingerprint)
+        if table_is_current(self.bq_client, table_id, fingerprint):
+            print(f"External table {table_id} is up to date, skipping.")
+            return
 
         # Create external table in BigQuery for images in GCS
         print(
@@ -83,6 +83,7 @@ class BigQueryMMQASetup:
         """
         )
         query_job.result()
+        set_table_fingerprint(self.bq_client, table_id, fingerprint)
 
     def setup_data(self, data_dir: str):
         dataset_id = f"{self.bq_client.project}.mmqa"
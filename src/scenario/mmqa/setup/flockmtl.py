@@ -3,6 +3,10 @@ from pathlib import Path
 
 import duckdb
 
+from runner.duckdb_catalog import TableSource, build_catalog
+from runner.generic_flockmtl_runner.batch_tuning import ensure_model
+from runner.generic_flockmtl_runner.usage_proxy import openai_secret_sql
+
 MMQA_FILES_DIR = os.path.abspath(
     Path(__file__).resolve().parents[4] / "files" / "mmqa" / "data"
 )
@@ -25,65 +29,32 @@ class FlockMTLMMQASetup:
         self.flockmtl_conn.load_extension("flockmtl")
 
         self.flockmtl_conn.execute(
-            f"""CREATE SECRET (
-                TYPE OPENAI,
-                API_KEY '{os.environ.get('OPENAI_API_KEY')}'
-            );
-            """
+            openai_secret_sql(os.environ.get("OPENAI_API_KEY"))
         )
 
-        if (
-            model_name
-            not in self.flockmtl_conn.execute("GET MODELS;")
-            .fetchdf()["model"]
-            .tolist()
-        ):
-            self.flockmtl_conn.execute(
-                """
-                CREATE MODEL(
-                    'model_name',
-                    'model_name',
-                    'openai',
-                    {
-                        "tuple_format": "json",
-                        "batch_size": 32,
-                        "model_parameters": {"temperature": 0.7}
-                    }
-                );
-                """.replace(
-                    "model_name", model_name
-                )
-            )
-
-    def _upload_file_to_db(self, csv_path: str, table_name: str):
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError(f"File not found at path: {csv_path}.")
-
-        self.flockmtl_conn.execute(
-            f"""
-            CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_csv_auto('{csv_path}');
-            """  # noqa: E501
-        )
+        ensure_model(self.flockmtl_conn, model_name)
 
     def setup_data(self, data_dir: str):
-        self._upload_file_to_db(
-            csv_path=os.path.join(data_dir, "ben_piazza.csv"),
-            table_name="ben_piazza",
-        )
-
-        self._upload_file_to_db(
-            csv_path=os.path.join(data_dir, "ben_piazza_text_data.csv"),
-            table_name="ben_piazza_text_data",
-        )
-
-        self._upload_file_to_db(
-            csv_path=os.path.join(data_dir, "lizzy_caplan_text_data.csv"),
-            table_name="lizzy_caplan_text_data",
-        )
-
-        self._upload_file_to_db(
-            csv_path=os.path.join(data_dir, "tampa_international_airport.csv"),
-            table_name="tampa_international_airport",
+        build_catalog(
+            self.flockmtl_conn,
+            [
+                TableSource(
+                    "ben_piazza",
+                    os.path.join(data_dir, "ben_piazza.csv"),
+                ),
+                TableSource(
+                    "ben_piazza_text_data",
+                    os.path.join(data_dir, "ben_piazza_text_data.csv"),
+                ),
+                TableSource(
+                    "lizzy_caplan_text_data",
+                    os.path.join(data_dir, "lizzy_caplan_text_data.csv"),
+                ),
+                TableSource(
+                    "tampa_international_airport",
+                    os.path.join(data_dir, "tampa_international_airport.csv"),
+                ),
+            ],
         )
 
     def get_connection(self):
@@ -21,9 +21,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent.parent))
 from runner.generic_lotus_runner.generic_lotus_runner import GenericLotusRunner
 
 # Import additional modules for approximate policy
-from lotus.models import SentenceTransformersRM
 from lotus.types import CascadeArgs
-from lotus.vector_store import FaissVS
 
 
 class LotusRunner(GenericLotusRunner):
@@ -54,8 +52,8 @@ class LotusRunner(GenericLotusRunner):
 
         # Initialize components for approximate policy
         if hasattr(self, "policy") and self.policy == "approximate":
-            self.rm_text = SentenceTransformersRM(model="intfloat/e5-base-v2")
-            self.vs = FaissVS()
+            self.rm_text = self._create_retrieval_model("intfloat/e5-base-v2")
+            self.vs = self._create_vector_store()
             self.cascade_args = CascadeArgs(
                 recall_target=0.8, precision_target=0.8
             )
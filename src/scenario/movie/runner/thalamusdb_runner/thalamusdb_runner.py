@@ -10,7 +10,6 @@ import os
 from typing import Dict, Any
 from pathlib import Path
 import duckdb
-import pandas as pd
 
 # if you use local thalamusdb codes, please uncomment the following codes
 # import sys
@@ -24,6 +23,7 @@ import pandas as pd
 # sys.path.insert(0, tdb_path)
 # end of local codes version
 
+from runner.duckdb_catalog import TableSource, build_catalog
 from runner.generic_thalamusdb_runner.generic_thalamusdb_runner import (
     GenericThalamusDBRunner,
 )
@@ -62,25 +62,16 @@ class ThalamusDBRunner(GenericThalamusDBRunner):
             skip_setup=skip_setup
         )
 
-        # Now create the tables if they don't exist (data should be generated by now)
-        # Note: The database file may already exist (created by parent init),
-        # so we check for tables instead of file existence
+        # Now build the tables (data should be generated by now), skipping
+        # the ones whose CSV did not change
         conn = duckdb.connect(db_path)
-        tables = conn.execute("SHOW TABLES").fetchall()
-
-        if len(tables) == 0:
-            # Step 1: Read CSVs (these should exist now after setup_scenario)
-            movies_df = pd.read_csv(f"{db_folder}/Movies.csv")
-            reviews_df = pd.read_csv(f"{db_folder}/Reviews.csv")
-
-            # Step 2: Save DataFrames as persistent tables
-            conn.register("movies_df", movies_df)
-            conn.register("reviews_df", reviews_df)
-
-            conn.execute("CREATE TABLE Movies AS SELECT * FROM movies_df")
-            conn.execute("CREATE TABLE Reviews AS SELECT * FROM reviews_df")
-            print("Database tables created successfully")
-
+        build_catalog(
+            conn,
+            [
+                TableSource("Movies", f"{db_folder}/Movies.csv"),
+                TableSource("Reviews", f"{db_folder}/Reviews.csv"),
+            ],
+        )
         conn.close()
 
     def _execute_q1(self) -> Dict[str, Any]:
@@ -1,11 +1,17 @@
 import os
 import pandas as pd
 from google.cloud import bigquery, storage
-from google.cloud.storage import transfer_manager
 from google.api_core.exceptions import NotFound
 import glob
-import concurrent.futures
-import hashlib
+
+from runner.generic_bigquery_runner.gcs_sync import (
+    compute_fingerprint,
+    get_or_create_bucket,
+    set_table_fingerprint,
+    sync_files,
+    sync_listed_files,
+    table_is_current,
+)
 
 PROJECT_ID = "bq-mm-benchmark"
 BQ_DATASET_ID = "movie"
@@ -22,20 +28,6 @@ class BigQueryMovieSetup:
         self.gcs_bucket_name = f"{self.bq_client.project}-movie_dataset"
 
 
-    def upload_file_to_gcs(self, bucket_name, local_file_path, gcs_destination_blob_name, add_cols):
-        try:
-            bucket = self.gcs_client.bucket(bucket_name)
-            blob = bucket.blob(gcs_destination_blob_name)
-
-            blob.upload_from_filename(local_file_path)
-
-            gcs_uri = f"gs://{bucket_name}/{gcs_destination_blob_name}"
-
-            return [gcs_uri] + add_cols
-        except Exception as e:
-            print(f"  Error uploading '{local_file_path}': {e}")
-            return None
-
     def create_bq_dataset_and_table(self, dataset_id, table_id, location, schema):
         """Creates the BigQuery dataset and table if they don't exist."""
         dataset_ref = self.bq_client.dataset(dataset_id)
@@ -90,23 +82,20 @@ class BigQueryMovieSetup:
         load_job.result()
     
     def _upload_images_to_gcs(self, dataset_id, table_name, bucket_name: str, images_dir: str):
-        print(f"Uploading images from {images_dir} to GCS bucket {bucket_name}...")
-        storage_client = storage.Client()
-        bucket = storage_client.lookup_bucket(bucket_name)
-        if bucket is None:
-            print(f"Bucket {bucket_name} not found. Creating it...")
-            bucket = storage_client.create_bucket(bucket_name)
-
-        string_paths = [os.path.basename(f) for f in glob.glob(os.path.join(images_dir, '*.jpg'))]
-
-        results = transfer_manager.upload_many_from_filenames(
-            bucket, string_paths, source_directory=images_dir, max_workers=16
-        )
+        print(f"Syncing images from {images_dir} to GCS bucket {bucket_name}...")
+        bucket = get_or_create_bucket(self.gcs_client, bucket_name)
+
+        files = {os.path.basename(f): f for f in glob.glob(os.path.join(images_dir, '*.jpg'))}
+        sync = sync_files(bucket, files, delete_extra=False)
+        print(f"Synced gs://{bucket_name}/: {sync.summary()}")
+        for name, exc in sync.failed.items():
+            print("Failed to upload {} due to exception: {}".format(name, exc))
+
+        fingerprint = compute_fingerprint(sync.fingerprint)
+        if table_is_current(self.bq_client, self.table_path(table_name), fingerprint):
+            print(f"External table {dataset_id}.{table_name} is up to date, skipping.")
+            return
 
-        for name, result in zip(string_paths, results):
-            if isinstance(result, Exception):
-                print("Failed to upload {} due to exception: {}".format(name, result))
-        
         # Create external table in BigQuery for images in GCS
         print(f"Creating external table {dataset_id}.{table_name} for images in GCS...")
         query_job = self.bq_client.query(f"""
@@ -118,59 +107,41 @@ class BigQueryMovieSetup:
             );
         """)
         query_job.result()
-        
+        set_table_fingerprint(self.bq_client, self.table_path(table_name), fingerprint)
+
+    def upload_images(self, local_path: str, gcs_folder: str, path_col: str, table_id: str, schema: list,
+                      synced_table_id: str = None):
+        """
+        Sync the images listed in a CSV to GCS and load their metadata into BigQuery.
 
-    def upload_images(self, local_path: str, gcs_folder: str, path_col: str, table_id: str, schema: list):
+        Only files whose checksum differs from the GCS object are uploaded. The load job
+        is skipped if synced_table_id carries the fingerprint of the CSV, the images and
+        the schema.
+
+        Returns:
+            The fingerprint to store on synced_table_id once the caller has finished
+            building it, or None if it is up to date or nothing could be uploaded.
+        """
         if not os.path.exists(local_path):
             print(f"No files found in '{local_path}'. Skipping.")
-            return
+            return None
 
         full_df = pd.read_csv(local_path)
-        all_files_to_upload = []
-        for _, row in full_df.iterrows():
-            local_file_path = row[path_col]
-            if not os.path.exists(local_file_path):
-                print(f"Warning: File {local_file_path} does not exist. Skipping.")
-                continue
-            blob_file_name = os.path.join(gcs_folder, local_file_path.split("/")[-1])
-            all_files_to_upload.append((row[full_df.columns[full_df.columns != path_col].tolist()].to_list(), local_file_path, blob_file_name))
-
-        # Create a bucket if it doesn't exist
-        bucket = self.gcs_client.lookup_bucket(self.gcs_bucket_name)
-        if bucket is None:
-            print(f"Bucket {self.gcs_bucket_name} not found. Creating it...")
-            bucket = self.gcs_client.create_bucket(self.gcs_bucket_name)
-        
-        # Clean up old files in the GCS folder to ensure fresh upload
-        print(f"Cleaning up old files in gs://{self.gcs_bucket_name}/{gcs_folder}/...")
-        blobs_to_delete = bucket.list_blobs(prefix=f"{gcs_folder}/")
-        for blob in blobs_to_delete:
-            blob.delete()
-
-        # Write images to GCS
-        records = []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            future_to_file = {
-                executor.submit(self.upload_file_to_gcs, self.gcs_bucket_name, local_path, gcs_blob_name, add_cols):
-                local_path for add_cols, local_path, gcs_blob_name in all_files_to_upload
-            }
-            for future in concurrent.futures.as_completed(future_to_file):
-                local_path = future_to_file[future]
-                try:
-                    res = future.result()
-                    if res:
-                        record_dict = {col_name: val for col_name, val in zip(full_df.columns[full_df.columns != path_col], res[1:])}
-                        record_dict[path_col] = res[0]
-                        records.append(record_dict)
-                except Exception as exc:
-                    print(f"'{local_path}' generated an exception: {exc}")
-
-        if not records:
+        bucket = get_or_create_bucket(self.gcs_client, self.gcs_bucket_name)
+        df_image_data, sync = sync_listed_files(bucket, full_df, path_col, gcs_folder)
+        print(f"Synced gs://{self.gcs_bucket_name}/{gcs_folder}/: {sync.summary()}")
+        for blob_name, exc in sync.failed.items():
+            print(f"  Error uploading '{blob_name}': {exc}")
+
+        if df_image_data.empty:
             print("No images were uploaded to GCS. Skipping BigQuery upload.")
-            return
+            return None
+
+        fingerprint = compute_fingerprint(local_path, sync.fingerprint, schema)
+        if table_is_current(self.bq_client, self.table_path(synced_table_id or table_id), fingerprint):
+            print(f"BigQuery table {synced_table_id or table_id} is up to date, skipping load.")
+            return None
 
-        df_image_data = pd.DataFrame(records)
-        
         bq_table_ref = self.create_bq_dataset_and_table(BQ_DATASET_ID, table_id, BQ_TABLE_LOCATION, schema)
 
         try:
@@ -178,6 +149,8 @@ class BigQueryMovieSetup:
             print(f"Images uploaded to GCS and metadata loaded into BigQuery table {table_id}!")
         except Exception as e:
             print(f"An error occurred during BigQuery upload: {e}")
+            return None
+        return fingerprint
 
     def finalize_image_upload(self, table_name, table_name_multimodal, image_url_table, url_col, bucket):
         # Create an external images table
@@ -214,73 +187,8 @@ class BigQueryMovieSetup:
             print(f"An error occurred: {e}")
             return False
 
-    def get_table_row_count(self, table_id):
-        """Get the number of rows in a BigQuery table."""
-        table_full_id = f"{PROJECT_ID}.{BQ_DATASET_ID}.{table_id}"
-        try:
-            query = f"SELECT COUNT(*) as row_count FROM `{table_full_id}`"
-            result = self.bq_client.query(query).result()
-            return next(result).row_count
-        except Exception as e:
-            print(f"Error getting row count for {table_id}: {e}")
-            return -1
-
-    def get_local_csv_hash(self, file_path):
-        """Get hash of local CSV file content."""
-        if not os.path.exists(file_path):
-            return None
-        
-        hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_md5.update(chunk)
-        return hash_md5.hexdigest()
-
-    def is_data_synchronized(self, local_csv_path, table_id):
-        """Check if local CSV data matches cloud table data."""
-        if not os.path.exists(local_csv_path):
-            print(f"Local file {local_csv_path} not found")
-            return False
-            
-        if not self.table_exists(table_id):
-            return False
-            
-        # Quick check: compare row counts
-        local_df = pd.read_csv(local_csv_path)
-        local_row_count = len(local_df)
-        cloud_row_count = self.get_table_row_count(table_id)
-        
-        if local_row_count != cloud_row_count:
-            print(f"Row count mismatch for {table_id}: local={local_row_count}, cloud={cloud_row_count}")
-            return False
-            
-        # Additional check: file modification time vs last upload
-        # This is a heuristic - if local file was modified recently, it might need re-upload
-        local_mtime = os.path.getmtime(local_csv_path)
-        
-        # Store hash for future comparison (simple approach)
-        hash_file = f"{local_csv_path}.hash"
-        current_hash = self.get_local_csv_hash(local_csv_path)
-        
-        if os.path.exists(hash_file):
-            with open(hash_file, 'r') as f:
-                stored_hash = f.read().strip()
-            if current_hash != stored_hash:
-                print(f"Local file {local_csv_path} has changed since last upload")
-                return False
-        else:
-            # First time, assume sync needed
-            return False
-            
-        return True
-
-    def mark_data_synchronized(self, local_csv_path):
-        """Mark local data as synchronized by storing its hash."""
-        current_hash = self.get_local_csv_hash(local_csv_path)
-        if current_hash:
-            hash_file = f"{local_csv_path}.hash"
-            with open(hash_file, 'w') as f:
-                f.write(current_hash)
+    def table_path(self, table_id):
+        return f"{PROJECT_ID}.{BQ_DATASET_ID}.{table_id}"
 
     def setup_data(self, scale_factor: int = 2000, data_dir: str = "files/movie/data/"):
         """Setup BigQuery tables for movie scenario.
@@ -297,28 +205,13 @@ class BigQueryMovieSetup:
         dataset.location = "US"
         self.bq_client.create_dataset(dataset, exists_ok=True)
 
-        # Upload Movies table
-        movies_csv_path = os.path.join(actual_data_dir, "Movies.csv")
-        needs_upload = (not self.table_exists("movies") or 
-                       not self.is_data_synchronized(movies_csv_path, "movies"))
-        
-        if needs_upload:
-            print("Uploading/updating Movies data to BigQuery...")
-            self._upload_csv_to_bigquery(dataset_id, csv_file_path=movies_csv_path, table_name='movies')
-            self.mark_data_synchronized(movies_csv_path)
-        else:
-            print("Movies table exists and is synchronized, skipping upload.")
-
-        # Upload Reviews table
-        reviews_csv_path = os.path.join(actual_data_dir, "Reviews.csv")
-        needs_upload = (not self.table_exists("reviews") or 
-                       not self.is_data_synchronized(reviews_csv_path, "reviews"))
-        
-        if needs_upload:
-            print("Uploading/updating Reviews data to BigQuery...")
-            self._upload_csv_to_bigquery(dataset_id, csv_file_path=reviews_csv_path, table_name='reviews')
-            self.mark_data_synchronized(reviews_csv_path)
-        else:
-            print("Reviews table exists and is synchronized, skipping upload.")
-
-        # TODO: also create the 'us.mmb-bigquery-storage-connection' BigQuery external connection
\ No newline at end of file
+        # Tables are only reloaded when the CSV differs from the one they were loaded from
+        for label, csv_name, table_name in [("Movies", "Movies.csv", "movies"), ("Reviews", "Reviews.csv", "reviews")]:
+            csv_path = os.path.join(actual_data_dir, csv_name)
+            fingerprint = compute_fingerprint(csv_path)
+            if table_is_current(self.bq_client, self.table_path(table_name), fingerprint):
+                print(f"{label} table exists and is synchronized, skipping upload.")
+                continue
+            print(f"Uploading/updating {label} data to BigQuery...")
+            self._upload_csv_to_bigquery(dataset_id, csv_file_path=csv_path, table_name=table_name)
+            set_table_fingerprint(self.bq_client, self.table_path(table_name), fingerprint)
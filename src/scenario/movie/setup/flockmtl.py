@@ -8,6 +8,10 @@ import duckdb
 import pyarrow as pa
 import pyarrow.parquet as pq
 
+from runner.duckdb_catalog import TableSource, build_catalog
+from runner.generic_flockmtl_runner.batch_tuning import ensure_model
+from runner.generic_flockmtl_runner.usage_proxy import openai_secret_sql
+
 MOVIE_FILES_DIR = os.path.abspath(
     Path(__file__).resolve().parents[4] / "files" / "movie" / "data"
 )
@@ -25,42 +29,25 @@ class FlockMTLMovieSetup:
         self.flockmtl_conn.install_extension("flockmtl", repository="community")
         self.flockmtl_conn.load_extension("flockmtl")
 
-        self.flockmtl_conn.execute(
-            f"""CREATE SECRET (TYPE OPENAI,API_KEY '{os.environ.get('OPENAI_API_KEY')}');"""
-        )
-
-        if not model_name in self.flockmtl_conn.execute("GET MODELS;").fetchdf()["model"].tolist():
-            self.flockmtl_conn.execute("""
-                CREATE MODEL(
-                'model_name',
-                'model_name', 
-                'openai', 
-                {"tuple_format": "json", "batch_size": 32, "model_parameters": {"temperature": 0.7}}
-                );
-            """.replace("model_name", model_name))
+        self.flockmtl_conn.execute(openai_secret_sql(os.environ.get('OPENAI_API_KEY')))
 
-
-    def _upload_file_to_db(self, csv_path: str, table_name: str):
-        if not os.path.exists(csv_path):
-            raise FileNotFoundError(f"File not found at path: {csv_path}. Please run the download script first.")
-
-        self.flockmtl_conn.execute(f"""
-            CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_csv_auto('{csv_path}');
-            """)
-        
+        ensure_model(self.flockmtl_conn, model_name)
 
     def setup_data(self, data_dir: str):
-        self._upload_file_to_db(
-            csv_path=os.path.join(data_dir, "data/Movies_2000.csv"), 
-            table_name="movies_2000"
-        )
-
-        self._upload_file_to_db(
-            csv_path=os.path.join(data_dir, "data/Reviews_2000.csv"), 
-            table_name="reviews_2000"
+        build_catalog(
+            self.flockmtl_conn,
+            [
+                TableSource(
+                    "movies_2000",
+                    os.path.join(data_dir, "data/Movies_2000.csv"),
+                ),
+                TableSource(
+                    "reviews_2000",
+                    os.path.join(data_dir, "data/Reviews_2000.csv"),
+                ),
+            ],
         )
 
-
     def get_connection(self):
         """
         Returns the FlockMTL connection.